@@ -0,0 +1,70 @@
+"""
+Compare bar update cost of ArrayManager in shift mode and ring mode.
+"""
+
+from datetime import datetime
+from time import perf_counter
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+from vnpy.trader.utility import ArrayManager
+
+
+def generate_bars(count: int) -> list:
+    """"""
+    bars = []
+    dt = datetime.now()
+
+    for i in range(count):
+        price = 3000 + i % 100
+        bar = BarData(
+            symbol="IF888",
+            exchange=Exchange.CFFEX,
+            datetime=dt,
+            interval=Interval.MINUTE,
+            open_price=price,
+            high_price=price + 2,
+            low_price=price - 2,
+            close_price=price + 1,
+            volume=100,
+            open_interest=1000,
+            gateway_name="BENCHMARK"
+        )
+        bars.append(bar)
+
+    return bars
+
+
+def run_update(size: int, ring: bool, bars: list, with_indicator: bool) -> float:
+    """"""
+    am = ArrayManager(size, ring=ring)
+
+    start = perf_counter()
+    for bar in bars:
+        am.update_bar(bar)
+        if with_indicator:
+            am.sma(20)
+    end = perf_counter()
+
+    return end - start
+
+
+def main():
+    """"""
+    bars = generate_bars(100_000)
+
+    for with_indicator in [False, True]:
+        print(f"with_indicator: {with_indicator}")
+
+        for size in [100, 1000, 5000, 10000]:
+            shift_cost = run_update(size, False, bars, with_indicator)
+            ring_cost = run_update(size, True, bars, with_indicator)
+
+            print(
+                f"size {size:>6}  shift {shift_cost:.3f}s  "
+                f"ring {ring_cost:.3f}s  speedup {shift_cost / ring_cost:.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compare binomial tree models on pricing, greeks and implied volatility
+of a chain of American options: pure python, shipped cython build (if
+it can be loaded on this platform) and numpy.
+"""
+
+from time import perf_counter
+from types import ModuleType
+from typing import Callable, List
+
+import numpy as np
+
+from vnpy.app.option_master.pricing import binomial_tree, binomial_tree_numpy
+
+try:
+    from vnpy.app.option_master.pricing import binomial_tree_cython
+except ImportError:
+    binomial_tree_cython = None
+
+
+STRIKE_COUNT = 100
+UNDERLYING_PRICE = 3.0
+INTEREST_RATE = 0.03
+TIME_TO_EXPIRY = 0.25
+
+
+def generate_chain() -> tuple:
+    """
+    Generate calls and puts of strikes around underlying price, with
+    volatility from a smile.
+    """
+    strikes = np.linspace(0.7, 1.3, STRIKE_COUNT) * UNDERLYING_PRICE
+    k = np.concatenate([strikes, strikes])
+    cp = np.concatenate([np.ones(STRIKE_COUNT), -np.ones(STRIKE_COUNT)])
+    v = 0.2 + (k / UNDERLYING_PRICE - 1) ** 2
+    t = np.full(len(k), TIME_TO_EXPIRY)
+
+    price = binomial_tree_numpy.calculate_price(UNDERLYING_PRICE, k, INTEREST_RATE, t, v, cp)
+    return price, k, t, v, cp
+
+
+def run_scalar(model: ModuleType, func: str, args: List[np.ndarray]) -> tuple:
+    """
+    Run model function option by option, return total cost and count
+    of options failed.
+    """
+    function: Callable = getattr(model, func)
+    rows = list(zip(*[arg.tolist() for arg in args]))
+    failed = 0
+
+    start = perf_counter()
+    for row in rows:
+        try:
+            function(*row)
+        except ArithmeticError:
+            failed += 1
+    return perf_counter() - start, failed
+
+
+def run_vector(func: str, args: List[np.ndarray]) -> float:
+    """
+    Run numpy model function on the whole chain, return cost.
+    """
+    function: Callable = getattr(binomial_tree_numpy, func)
+
+    start = perf_counter()
+    function(*args)
+    return perf_counter() - start
+
+
+def main():
+    """"""
+    price, k, t, v, cp = generate_chain()
+    f = np.full(len(k), UNDERLYING_PRICE)
+    r = np.full(len(k), INTEREST_RATE)
+
+    tasks = {
+        "price": ("calculate_price", [f, k, r, t, v, cp]),
+        "greeks": ("calculate_greeks", [f, k, r, t, v, cp]),
+        "impv": ("calculate_impv", [price, f, k, r, t, cp]),
+    }
+
+    models = {"python": binomial_tree}
+    if binomial_tree_cython:
+        models["cython"] = binomial_tree_cython
+    else:
+        print("cython      not available on this platform")
+
+    for task, (func, args) in tasks.items():
+        for name, model in models.items():
+            cost, failed = run_scalar(model, func, args)
+            print(
+                f"{name:<12}{task:<8}{len(k)} options  {cost * 1000:>9,.2f} ms"
+                f"  failed {failed}"
+            )
+
+        cost = run_vector(func, args)
+        print(f"{'numpy':<12}{task:<8}{len(k)} options  {cost * 1000:>9,.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Measure rows per second of saving bar and tick data into each database backend.
+
+Fill in the settings of backends available, those failed to connect are skipped.
+"""
+
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database.database import BaseDatabaseManager, DB_TZ
+from vnpy.trader.database.initialize import init
+from vnpy.trader.object import BarData, TickData
+
+
+SYMBOL = "BENCHMARK"
+
+BACKENDS = {
+    "sqlite": {
+        "driver": "sqlite",
+        "database": "benchmark.db",
+    },
+    "mysql": {
+        "driver": "mysql",
+        "database": "vnpy",
+        "host": "localhost",
+        "port": 3306,
+        "user": "root",
+        "password": "",
+    },
+    "postgresql": {
+        "driver": "postgresql",
+        "database": "vnpy",
+        "host": "localhost",
+        "port": 5432,
+        "user": "postgres",
+        "password": "",
+    },
+    "mongodb": {
+        "driver": "mongodb",
+        "database": "vnpy",
+        "host": "localhost",
+        "port": 27017,
+        "user": "",
+        "password": "",
+        "authentication_source": "admin",
+    },
+}
+
+
+def generate_bars(count: int) -> list:
+    """"""
+    bars = []
+    dt = datetime(2020, 1, 1, tzinfo=DB_TZ)
+
+    for i in range(count):
+        price = 3000 + i % 100
+        bar = BarData(
+            symbol=SYMBOL,
+            exchange=Exchange.CFFEX,
+            datetime=dt + timedelta(minutes=i),
+            interval=Interval.MINUTE,
+            open_price=price,
+            high_price=price + 2,
+            low_price=price - 2,
+            close_price=price + 1,
+            volume=100,
+            open_interest=1000,
+            gateway_name="BENCHMARK"
+        )
+        bars.append(bar)
+
+    return bars
+
+
+def generate_ticks(count: int) -> list:
+    """"""
+    ticks = []
+    dt = datetime(2020, 1, 1, tzinfo=DB_TZ)
+
+    for i in range(count):
+        price = 3000 + i % 100
+        tick = TickData(
+            symbol=SYMBOL,
+            exchange=Exchange.CFFEX,
+            datetime=dt + timedelta(milliseconds=500 * i),
+            name=SYMBOL,
+            volume=i,
+            open_interest=1000,
+            last_price=price,
+            last_volume=1,
+            limit_up=price * 1.1,
+            limit_down=price * 0.9,
+            open_price=3000,
+            high_price=3100,
+            low_price=2900,
+            pre_close=3000,
+            bid_price_1=price - 1,
+            ask_price_1=price + 1,
+            bid_volume_1=10,
+            ask_volume_1=10,
+            gateway_name="BENCHMARK"
+        )
+        ticks.append(tick)
+
+    return ticks
+
+
+def run_backend(database_manager: BaseDatabaseManager, bars: list, ticks: list) -> None:
+    """"""
+    database_manager.clean(SYMBOL)
+
+    # First round inserts new rows, second round updates existing rows
+    for name in ["insert", "update"]:
+        start = perf_counter()
+        database_manager.save_bar_data(bars)
+        bar_cost = perf_counter() - start
+
+        start = perf_counter()
+        database_manager.save_tick_data(ticks)
+        tick_cost = perf_counter() - start
+
+        print(
+            f"  {name}\t"
+            f"bar: {len(bars) / bar_cost:,.0f} rows/s\t"
+            f"tick: {len(ticks) / tick_cost:,.0f} rows/s"
+        )
+
+    database_manager.clean(SYMBOL)
+
+
+def main():
+    """"""
+    bars = generate_bars(100_000)
+    ticks = generate_ticks(100_000)
+
+    for name, settings in BACKENDS.items():
+        print(f"backend: {name}")
+
+        try:
+            database_manager = init(settings)
+            run_backend(database_manager, bars, ticks)
+        except Exception as e:
+            print(f"  skipped: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Measure event engine throughput under a synthetic tick flood.
+"""
+
+from threading import Event as Signal, Thread
+from time import perf_counter
+
+from vnpy.event import Event, EventEngine
+from vnpy.trader.event import EVENT_TICK
+
+
+TOTAL = 500_000
+PRODUCERS = 4
+
+
+def run_flood(batch_size: int, batch_handler: bool) -> float:
+    """
+    Put TOTAL tick events from several producer threads and wait
+    until all of them are processed.
+    """
+    event_engine = EventEngine(batch_size=batch_size)
+    finished = Signal()
+    received = [0]
+
+    def process_tick_event(event: Event) -> None:
+        received[0] += 1
+        if received[0] == TOTAL:
+            finished.set()
+
+    def process_tick_batch(events: list) -> None:
+        received[0] += len(events)
+        if received[0] == TOTAL:
+            finished.set()
+
+    if batch_handler:
+        event_engine.register_batch(EVENT_TICK, process_tick_batch)
+    else:
+        event_engine.register(EVENT_TICK, process_tick_event)
+
+    def produce() -> None:
+        for i in range(TOTAL // PRODUCERS):
+            event_engine.put(Event(EVENT_TICK, i))
+
+    event_engine.start()
+
+    start = perf_counter()
+    producers = [Thread(target=produce) for _ in range(PRODUCERS)]
+    for producer in producers:
+        producer.start()
+    finished.wait()
+    end = perf_counter()
+
+    for producer in producers:
+        producer.join()
+    event_engine.stop()
+
+    return end - start
+
+
+def main():
+    """"""
+    for batch_size, batch_handler in [
+        (1, False),
+        (100, False),
+        (1000, False),
+        (100, True),
+        (1000, True),
+    ]:
+        cost = run_flood(batch_size, batch_handler)
+        print(
+            f"batch_size {batch_size:>5}  batch_handler {batch_handler!s:>5}  "
+            f"{TOTAL / cost:,.0f} events/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
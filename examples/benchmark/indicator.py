@@ -0,0 +1,157 @@
+"""
+Check streaming indicators against talib results, and compare the cost
+of calculating latest indicator values in both modes.
+
+The parity check fails with AssertionError if any streaming result is
+different from talib.
+"""
+
+from datetime import datetime
+from math import inf, isnan
+from random import gauss, seed
+from time import perf_counter
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+from vnpy.trader.utility import ArrayManager
+
+
+INDICATORS = {
+    "sma": lambda am: am.sma(20),
+    "ema": lambda am: am.ema(20),
+    "wma": lambda am: am.wma(20),
+    "std": lambda am: am.std(20),
+    "atr": lambda am: am.atr(14),
+    "natr": lambda am: am.natr(14),
+    "trange": lambda am: am.trange(),
+    "rsi": lambda am: am.rsi(14),
+    "cmo": lambda am: am.cmo(14),
+    "macd": lambda am: am.macd(12, 26, 9),
+    "boll": lambda am: am.boll(20, 2),
+    "keltner": lambda am: am.keltner(20, 2),
+    "donchian": lambda am: am.donchian(20),
+    "willr": lambda am: am.willr(14),
+    "mom": lambda am: am.mom(10),
+    "roc": lambda am: am.roc(10),
+    "rocp": lambda am: am.rocp(10),
+    "rocr": lambda am: am.rocr(10),
+    "rocr_100": lambda am: am.rocr_100(10),
+    "bop": lambda am: am.bop(),
+}
+
+# Max relative difference allowed, for rounding error of sums in talib
+TOLERANCE = 1e-9
+
+
+def generate_bars(count: int) -> list:
+    """
+    Generate bars of random walk price.
+    """
+    seed(0)
+
+    bars = []
+    dt = datetime.now()
+    price = 3000
+
+    for i in range(count):
+        open_price = price
+        close_price = open_price + gauss(0, 5)
+        high_price = max(open_price, close_price) + abs(gauss(0, 2))
+        low_price = min(open_price, close_price) - abs(gauss(0, 2))
+        price = close_price
+
+        bar = BarData(
+            symbol="IF888",
+            exchange=Exchange.CFFEX,
+            datetime=dt,
+            interval=Interval.MINUTE,
+            open_price=open_price,
+            high_price=high_price,
+            low_price=low_price,
+            close_price=close_price,
+            volume=100,
+            gateway_name="BENCHMARK"
+        )
+        bars.append(bar)
+
+    return bars
+
+
+def to_tuple(value) -> tuple:
+    """"""
+    if isinstance(value, tuple):
+        return value
+    return (value,)
+
+
+def check_parity(bars: list, size: int) -> None:
+    """
+    Check max relative difference between talib and streaming results.
+    """
+    talib_am = ArrayManager(size)
+    stream_am = ArrayManager(size, stream=True)
+
+    max_diffs = {name: 0 for name in INDICATORS.keys()}
+
+    for bar in bars:
+        talib_am.update_bar(bar)
+        stream_am.update_bar(bar)
+
+        if not talib_am.inited:
+            continue
+
+        for name, func in INDICATORS.items():
+            talib_values = to_tuple(func(talib_am))
+            stream_values = to_tuple(func(stream_am))
+
+            for talib_value, stream_value in zip(talib_values, stream_values):
+                if isnan(talib_value) or isnan(stream_value):
+                    diff = 0 if isnan(talib_value) == isnan(stream_value) else inf
+                else:
+                    diff = abs(talib_value - stream_value) / max(abs(talib_value), 1)
+                max_diffs[name] = max(max_diffs[name], diff)
+
+    for name, diff in max_diffs.items():
+        print(f"{name:>10}  max relative diff {diff:.2e}")
+
+    failed = [name for name, diff in max_diffs.items() if not diff <= TOLERANCE]
+    assert not failed, f"streaming result different from talib: {failed}"
+
+
+def run_indicators(bars: list, size: int, stream: bool) -> float:
+    """"""
+    am = ArrayManager(size, ring=True, stream=stream)
+
+    start = perf_counter()
+    for bar in bars:
+        am.update_bar(bar)
+        for func in INDICATORS.values():
+            func(am)
+    end = perf_counter()
+
+    return end - start
+
+
+def main():
+    """"""
+    bars = generate_bars(20_000)
+
+    # Smoothed indicators depend on start of window, small windows check
+    # that seed of window is followed exactly.
+    for size in [40, 100, 500]:
+        print(f"parity check with size {size}")
+        check_parity(bars[:5000], size)
+
+    print("benchmark")
+    for size in [100, 1000, 5000]:
+        talib_cost = run_indicators(bars, size, False)
+        stream_cost = run_indicators(bars, size, True)
+
+        print(
+            f"size {size:>6}  talib {talib_cost:.3f}s  "
+            f"stream {stream_cost:.3f}s  speedup {talib_cost / stream_cost:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Measure time of recalculating impv and greeks of a whole option chain
+on each underlying tick, with per option scalar pricing model and with
+vectorized numpy pricing model.
+"""
+
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from vnpy.app.option_master.base import PortfolioData
+from vnpy.app.option_master.pricing import (
+    black_76, black_76_numpy,
+    black_scholes, black_scholes_numpy,
+    binomial_tree, binomial_tree_numpy
+)
+from vnpy.trader.constant import Exchange, OptionType, Product
+from vnpy.trader.object import ContractData, TickData
+
+
+STRIKE_COUNT = 200
+UNDERLYING_PRICE = 3.0
+TICK_COUNT = 5
+
+
+def create_portfolio(strike_count: int) -> PortfolioData:
+    """
+    Create portfolio with one chain of calls and puts, and feed ticks
+    with prices from a volatility smile.
+    """
+    portfolio = PortfolioData("510050_O.SSE")
+
+    underlying = ContractData(
+        symbol="510050",
+        exchange=Exchange.SSE,
+        name="50ETF",
+        product=Product.ETF,
+        size=1,
+        pricetick=0.001,
+        gateway_name="BENCHMARK"
+    )
+
+    expiry = datetime.now() + timedelta(days=60)
+    contracts = []
+
+    for i in range(strike_count):
+        strike = round(UNDERLYING_PRICE * (0.6 + 0.8 * i / strike_count), 3)
+
+        for option_type in [OptionType.CALL, OptionType.PUT]:
+            contract = ContractData(
+                symbol=f"{option_type.name[0]}{i}",
+                exchange=Exchange.SSE,
+                name=f"{option_type.name} {strike}",
+                product=Product.OPTION,
+                size=10000,
+                pricetick=0.0001,
+                option_strike=strike,
+                option_underlying="510050_O",
+                option_type=option_type,
+                option_expiry=expiry,
+                option_index=str(strike),
+                gateway_name="BENCHMARK"
+            )
+            portfolio.add_option(contract)
+            contracts.append(contract)
+
+    portfolio.set_chain_underlying("510050_O.SSE", underlying)
+    portfolio.set_interest_rate(0.03)
+
+    # Option prices generated with black scholes model
+    for contract in contracts:
+        option = portfolio.options[contract.vt_symbol]
+        volatility = get_smile_volatility(option.strike_price)
+
+        price = black_scholes.calculate_price(
+            UNDERLYING_PRICE,
+            option.strike_price,
+            0.03,
+            option.time_to_expiry,
+            volatility,
+            option.option_type
+        )
+        option.update_tick(create_tick(contract.symbol, round(price, 4)))
+
+    return portfolio
+
+
+def create_tick(symbol: str, price: float) -> TickData:
+    """"""
+    return TickData(
+        symbol=symbol,
+        exchange=Exchange.SSE,
+        datetime=datetime.now(),
+        last_price=price,
+        bid_price_1=max(price - 0.0002, 0.0001),
+        ask_price_1=price + 0.0002,
+        gateway_name="BENCHMARK"
+    )
+
+
+def run_underlying_ticks(portfolio: PortfolioData) -> float:
+    """
+    Return average cost of processing one underlying tick.
+    """
+    start = perf_counter()
+    for i in range(TICK_COUNT):
+        price = UNDERLYING_PRICE + (i % 2) * 0.001
+        tick = create_tick("510050", price)
+        tick.bid_price_1 = tick.ask_price_1 = price
+        portfolio.update_tick(tick)
+        portfolio.update_volatility()
+    return (perf_counter() - start) / TICK_COUNT
+
+
+def get_smile_volatility(strike: float) -> float:
+    """"""
+    moneyness = strike / UNDERLYING_PRICE - 1
+    return 0.2 + moneyness ** 2
+
+
+def count_solved(portfolio: PortfolioData) -> int:
+    """"""
+    return len([option for option in portfolio.options.values() if option.mid_impv])
+
+
+def main():
+    """"""
+    for name, pricing_model, vector_model in [
+        ("black_76", black_76, black_76_numpy),
+        ("black_scholes", black_scholes, black_scholes_numpy),
+        ("binomial_tree", binomial_tree, binomial_tree_numpy),
+    ]:
+        for model in [None, vector_model]:
+            portfolio = create_portfolio(STRIKE_COUNT)
+            portfolio.set_pricing_model(pricing_model, model)
+
+            for underlying in portfolio.underlyings.values():
+                underlying.mid_price = UNDERLYING_PRICE
+            portfolio.calculate_atm_price()
+
+            if model:
+                mode = "vector"
+            else:
+                mode = "scalar"
+
+            try:
+                cost = run_underlying_ticks(portfolio)
+            except (ArithmeticError, ValueError) as e:
+                print(f"{name:<14}{mode}  failed: {e!r}")
+                continue
+
+            print(
+                f"{name:<14}{mode}  options {len(portfolio.options)}  "
+                f"{cost * 1000:>9,.1f} ms/tick  "
+                f"impv solved: {count_solved(portfolio)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
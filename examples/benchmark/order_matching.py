@@ -0,0 +1,107 @@
+"""
+Measure bar replay speed of CTA backtesting with many resting limit orders.
+
+Grid orders are far away from market price so that they are never crossed,
+matching cost of each bar should not grow with number of resting orders.
+"""
+
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from vnpy.app.cta_strategy import CtaTemplate
+from vnpy.app.cta_strategy.backtesting import BacktestingEngine
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+
+
+BAR_COUNT = 20_000
+
+
+class GridStrategy(CtaTemplate):
+    """
+    Rest buy orders below and sell orders above market price at start.
+    """
+
+    order_count = 0
+
+    parameters = ["order_count"]
+
+    def on_bar(self, bar: BarData):
+        """"""
+        if self.order_count and not self.pos and not self.cta_engine.active_limit_orders:
+            for i in range(self.order_count // 2):
+                self.buy(1000 - i * 0.2, 1)
+                self.short(5000 + i * 0.2, 1)
+
+
+def generate_bars(count: int) -> list:
+    """"""
+    bars = []
+    dt = datetime(2020, 1, 1)
+
+    for i in range(count):
+        price = 3000 + i % 100
+        bar = BarData(
+            symbol="IF888",
+            exchange=Exchange.CFFEX,
+            datetime=dt + timedelta(minutes=i),
+            interval=Interval.MINUTE,
+            open_price=price,
+            high_price=price + 2,
+            low_price=price - 2,
+            close_price=price + 1,
+            volume=100,
+            open_interest=1000,
+            gateway_name="BENCHMARK"
+        )
+        bars.append(bar)
+
+    return bars
+
+
+def run_replay(order_count: int, bars: list) -> float:
+    """"""
+    engine = BacktestingEngine()
+    engine.output = lambda msg: None
+    engine.set_parameters(
+        vt_symbol="IF888.CFFEX",
+        interval=Interval.MINUTE,
+        start=bars[0].datetime,
+        end=bars[-1].datetime,
+        rate=0,
+        slippage=0,
+        size=300,
+        pricetick=0.2,
+        capital=1_000_000
+    )
+    engine.add_strategy(GridStrategy, {"order_count": order_count})
+
+    engine.strategy.inited = True
+    engine.strategy.trading = True
+
+    # First bar sends all grid orders
+    engine.new_bar(bars[0])
+
+    start = perf_counter()
+    for bar in bars[1:]:
+        engine.new_bar(bar)
+    cost = perf_counter() - start
+
+    assert len(engine.active_limit_orders) == order_count
+    return cost
+
+
+def main():
+    """"""
+    bars = generate_bars(BAR_COUNT)
+
+    for order_count in [0, 100, 10_000]:
+        cost = run_replay(order_count, bars)
+        print(
+            f"resting orders: {order_count}\t"
+            f"bars/s: {len(bars) / cost:,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
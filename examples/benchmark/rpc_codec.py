@@ -0,0 +1,117 @@
+"""
+Measure encode/decode throughput and message size of RPC codecs.
+"""
+
+from datetime import datetime
+from time import perf_counter
+
+import pytz
+
+from vnpy.event import Event
+from vnpy.rpc import BaseCodec, BinaryCodec, PickleCodec
+from vnpy.trader.constant import Direction, Exchange, Offset, Product, Status
+from vnpy.trader.event import EVENT_TICK
+from vnpy.trader.object import ContractData, OrderData, TickData
+
+
+COUNT = 20_000
+
+CHINA_TZ = pytz.timezone("Asia/Shanghai")
+
+
+def generate_messages() -> dict:
+    """"""
+    dt = CHINA_TZ.localize(datetime(2020, 5, 6, 9, 30, 0, 500000))
+
+    tick = TickData(
+        symbol="IF2006",
+        exchange=Exchange.CFFEX,
+        datetime=dt,
+        name="IF2006",
+        volume=35_812,
+        open_interest=102_331,
+        last_price=3905.2,
+        limit_up=4290.0,
+        limit_down=3510.0,
+        open_price=3890.0,
+        high_price=3910.4,
+        low_price=3885.6,
+        pre_close=3899.8,
+        bid_price_1=3905.0,
+        ask_price_1=3905.4,
+        bid_volume_1=3,
+        ask_volume_1=5,
+        gateway_name="CTP"
+    )
+
+    order = OrderData(
+        symbol="IF2006",
+        exchange=Exchange.CFFEX,
+        orderid="1_-123456_1",
+        direction=Direction.LONG,
+        offset=Offset.OPEN,
+        price=3905.4,
+        volume=1,
+        status=Status.NOTTRADED,
+        datetime=dt,
+        gateway_name="CTP"
+    )
+
+    contracts = [
+        ContractData(
+            symbol=f"IF20{i:02d}",
+            exchange=Exchange.CFFEX,
+            name=f"IF20{i:02d}",
+            product=Product.FUTURES,
+            size=300,
+            pricetick=0.2,
+            gateway_name="CTP"
+        )
+        for i in range(100)
+    ]
+
+    return {
+        "tick event": ["", Event(EVENT_TICK, tick)],
+        "order event": ["", Event(EVENT_TICK, order)],
+        "contract list": [True, contracts],
+    }
+
+
+def run_codec(codec: BaseCodec, message: object, count: int) -> tuple:
+    """
+    Return encode/s, decode/s and size of message.
+    """
+    start = perf_counter()
+    for _ in range(count):
+        data = codec.encode(message)
+    encode_cost = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(count):
+        codec.decode(data)
+    decode_cost = perf_counter() - start
+
+    return count / encode_cost, count / decode_cost, len(data)
+
+
+def main():
+    """"""
+    messages = generate_messages()
+
+    for name, message in messages.items():
+        count = COUNT
+        if isinstance(message[1], list):
+            count //= 100
+
+        for codec in [PickleCodec(), BinaryCodec()]:
+            encode_speed, decode_speed, size = run_codec(codec, message, count)
+            print(
+                f"{name:<14}{type(codec).__name__:<14}"
+                f"encode/s {encode_speed:>10,.0f}  "
+                f"decode/s {decode_speed:>10,.0f}  "
+                f"size {size:>6,} bytes"
+            )
+
+
+if __name__ == "__main__":
+    main()
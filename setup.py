@@ -337,6 +337,7 @@ setup(
     package_data={"": [
         "*.ico",
         "*.ini",
+        "*.json",
         "*.dll",
         "*.so",
         "*.pyd",
@@ -13,6 +13,7 @@ from vnpy.trader.utility import extract_vt_symbol
 from vnpy.trader.object import HistoryRequest
 from vnpy.trader.rqdata import rqdata_client
 from vnpy.trader.database import database_manager
+from vnpy.trader.history_cache import history_cache
 from vnpy.app.cta_strategy import CtaTemplate
 from vnpy.app.cta_strategy.backtesting import BacktestingEngine, OptimizationSetting
 
@@ -21,6 +22,7 @@ APP_NAME = "CtaBacktester"
 EVENT_BACKTESTER_LOG = "eBacktesterLog"
 EVENT_BACKTESTER_BACKTESTING_FINISHED = "eBacktesterBacktestingFinished"
 EVENT_BACKTESTER_OPTIMIZATION_FINISHED = "eBacktesterOptimizationFinished"
+EVENT_BACKTESTER_OPTIMIZATION_PROGRESS = "eBacktesterOptimizationProgress"
 
 
 class BacktesterEngine(BaseEngine):
@@ -291,16 +293,25 @@ class BacktesterEngine(BaseEngine):
             {}
         )
 
-        if use_ga:
-            self.result_values = engine.run_ga_optimization(
-                optimization_setting,
-                output=False
-            )
-        else:
-            self.result_values = engine.run_optimization(
-                optimization_setting,
-                output=False
-            )
+        try:
+            if use_ga:
+                self.result_values = engine.run_ga_optimization(
+                    optimization_setting,
+                    output=False,
+                    callback=self.put_optimization_progress
+                )
+            else:
+                self.result_values = engine.run_optimization(
+                    optimization_setting,
+                    output=False,
+                    callback=self.put_optimization_progress
+                )
+        except Exception:
+            msg = f"参数优化失败，触发异常：\n{traceback.format_exc()}"
+            self.write_log(msg)
+
+            self.thread = None
+            return
 
         # Clear thread object handler.
         self.thread = None
@@ -310,6 +321,16 @@ class BacktesterEngine(BaseEngine):
         event = Event(EVENT_BACKTESTER_OPTIMIZATION_FINISHED)
         self.event_engine.put(event)
 
+    def put_optimization_progress(self, result: tuple, finished: int, total: int):
+        """
+        Put event of each optimization result finished.
+        """
+        event = Event(
+            EVENT_BACKTESTER_OPTIMIZATION_PROGRESS,
+            {"result": result, "finished": finished, "total": total}
+        )
+        self.event_engine.put(event)
+
     def start_optimization(
         self,
         class_name: str,
@@ -394,6 +415,7 @@ class BacktesterEngine(BaseEngine):
 
             if data:
                 database_manager.save_bar_data(data)
+                history_cache.invalidate()
                 self.write_log(f"{vt_symbol}-{interval}历史数据下载完成")
             else:
                 self.write_log(f"数据下载失败，无法获取{vt_symbol}的历史数据")
@@ -916,15 +916,19 @@ class OptimizationSettingEditor(QtWidgets.QDialog):
             step_value = type_(d["step"].text())
             end_value = type_(d["end"].text())
 
-            if start_value == end_value:
-                self.optimization_setting.add_parameter(name, start_value)
-            else:
-                self.optimization_setting.add_parameter(
-                    name,
-                    start_value,
-                    end_value,
-                    step_value
-                )
+            try:
+                if start_value == end_value:
+                    self.optimization_setting.add_parameter(name, start_value)
+                else:
+                    self.optimization_setting.add_parameter(
+                        name,
+                        start_value,
+                        end_value,
+                        step_value
+                    )
+            except ValueError as e:
+                QtWidgets.QMessageBox.warning(self, "参数错误", str(e))
+                return
 
         self.accept()
 
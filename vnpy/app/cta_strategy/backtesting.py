@@ -1,34 +1,85 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Callable, List, Optional, Tuple
+import traceback
+
+import numpy as np
+from pandas import DataFrame
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from vnpy.trader.constant import (Direction, Offset, Exchange,
+                                  Interval, Status)
+from vnpy.trader.database import database_manager
+from vnpy.trader.database.database import BarArray, BAR_ARRAY_FIELDS
+from vnpy.trader.history_cache import cached_history
+from vnpy.trader.object import OrderData, TradeData, BarData, TickData
+from vnpy.trader.order_book import OrderBook
+from vnpy.trader.optimize import (
+    OptimizationSetting,
+    OptimizationPool,
+    OptimizationResult,
+    SharedArrays,
+    attach_arrays
+)
+from vnpy.trader.result_store import ResultStore, get_data_end, get_fingerprint
+from vnpy.trader.utility import round_to
+
+from .base import (
+    BacktestingMode,
+    EngineType,
+    STOPORDER_PREFIX,
+    StopOrder,
+    StopOrderStatus,
+)
+from .template import CtaTemplate
+
 
 class BacktestingEngine:
     """"""
 
+    engine_type = EngineType.BACKTESTING
     gateway_name = "BACKTESTING"
 
     def __init__(self):
         """"""
-        self.vt_symbols: List[str] = []
-        self.start: datetime = None
-        self.end: datetime = None
-
-        self.rates: Dict[str, float] = 0
-        self.slippages: Dict[str, float] = 0
-        self.sizes: Dict[str, float] = 1
-        self.priceticks: Dict[str, float] = 0
-
-        self.capital: float = 1_000_000
+        self.vt_symbol = ""
+        self.symbol = ""
+        self.exchange = None
+        self.start = None
+        self.end = None
+        self.rate = 0
+        self.slippage = 0
+        self.size = 1
+        self.pricetick = 0
+        self.capital = 1_000_000
+        self.mode = BacktestingMode.BAR
+        self.inverse = False
+
+        self.strategy_class = None
+        self.strategy_setting = {}
+        self.strategy = None
+        self.tick: TickData = None
+        self.bar: BarData = None
+        self.datetime = None
 
-        self.strategy: StrategyTemplate = None
-        self.bars: Dict[str, BarData] = {}
-        self.datetime: datetime = None
+        self.interval = None
+        self.days = 0
+        self.callback = None
+        self.history_data = []
+        self.bar_array: BarArray = None
+        self.history_loaded: bool = False
 
-        self.interval: Interval = None
-        self.days: int = 0
-        self.history_data: Dict[Tuple, BarData] = {}
-        self.dts: Set[datetime] = set()
+        self.stop_order_count = 0
+        self.stop_orders = {}
+        self.active_stop_orders = {}
+        self.stop_order_book = OrderBook(stop=True)
 
         self.limit_order_count = 0
         self.limit_orders = {}
         self.active_limit_orders = {}
+        self.limit_order_book = OrderBook()
+        self.submitting_orders = []
 
         self.trade_count = 0
         self.trades = {}
@@ -38,17 +89,28 @@ class BacktestingEngine:
         self.daily_results = {}
         self.daily_df = None
 
-    def clear_data(self) -> None:
+        self.result_store: ResultStore = None
+        self.cached_statistics = None
+
+    def clear_data(self):
         """
         Clear all data of last backtesting.
         """
         self.strategy = None
-        self.bars = {}
+        self.tick = None
+        self.bar = None
         self.datetime = None
 
+        self.stop_order_count = 0
+        self.stop_orders.clear()
+        self.active_stop_orders.clear()
+        self.stop_order_book.clear()
+
         self.limit_order_count = 0
         self.limit_orders.clear()
         self.active_limit_orders.clear()
+        self.limit_order_book.clear()
+        self.submitting_orders.clear()
 
         self.trade_count = 0
         self.trades.clear()
@@ -57,110 +119,210 @@ class BacktestingEngine:
         self.daily_results.clear()
         self.daily_df = None
 
+        self.cached_statistics = None
+
     def set_parameters(
         self,
-        vt_symbols: List[str],
+        vt_symbol: str,
         interval: Interval,
         start: datetime,
-        rates: Dict[str, float],
-        slippages: Dict[str, float],
-        sizes: Dict[str, float],
-        priceticks: Dict[str, float],
+        rate: float,
+        slippage: float,
+        size: float,
+        pricetick: float,
         capital: int = 0,
-        end: datetime = None
-    ) -> None:
+        end: datetime = None,
+        mode: BacktestingMode = BacktestingMode.BAR,
+        inverse: bool = False
+    ):
         """"""
-        self.vt_symbols = vt_symbols
-        self.interval = interval
+        self.mode = mode
+        self.vt_symbol = vt_symbol
+        self.interval = Interval(interval)
+        self.rate = rate
+        self.slippage = slippage
+        self.size = size
+        self.pricetick = pricetick
+        self.start = start
 
-        self.rates = rates
-        self.slippages = slippages
-        self.sizes = sizes
-        self.priceticks = priceticks
+        self.symbol, exchange_str = self.vt_symbol.split(".")
+        self.exchange = Exchange(exchange_str)
 
-        self.start = start
-        self.end = end
         self.capital = capital
+        self.end = end
+        self.mode = mode
+        self.inverse = inverse
 
-    def add_strategy(self, strategy_class: type, setting: dict) -> None:
+    def add_strategy(self, strategy_class: type, setting: dict):
         """"""
+        self.strategy_class = strategy_class
+        self.strategy_setting = setting
         self.strategy = strategy_class(
-            self, strategy_class.__name__, copy(self.vt_symbols), setting
+            self, strategy_class.__name__, self.vt_symbol, setting
         )
 
-    def load_data(self) -> None:
+    def set_result_store(self, result_store: ResultStore = None):
+        """
+        Save statistics of each backtesting into result store, and skip
+        running when result of the same backtesting already exists.
+        """
+        if not result_store:
+            result_store = ResultStore()
+        self.result_store = result_store
+
+    def get_parameters(self) -> dict:
         """"""
-        self.output("Start loading historical data")
+        parameters = {
+            "vt_symbol": self.vt_symbol,
+            "interval": self.interval,
+            "start": self.start,
+            "rate": self.rate,
+            "slippage": self.slippage,
+            "size": self.size,
+            "pricetick": self.pricetick,
+            "capital": self.capital,
+            "end": self.end,
+            "mode": self.mode,
+            "inverse": self.inverse
+        }
+        return parameters
 
-        if not self.end:
-            self.end = datetime.now()
+    def get_fingerprint(self, setting: dict = None) -> str:
+        """
+        Get fingerprint of backtesting with current strategy class,
+        strategy setting (or setting given) and engine parameters.
+        """
+        if setting is None:
+            setting = self.strategy_setting
 
-        if self.start >= self.end:
-            self.output("The start date must be less than the end date")
+        return get_fingerprint(self.strategy_class, setting, self.get_parameters())
+
+    def save_statistics(self, statistics: dict, setting: dict = None):
+        """"""
+        if setting is None:
+            setting = self.strategy_setting
+
+        self.result_store.put(
+            self.get_fingerprint(setting),
+            self.strategy_class,
+            [self.vt_symbol],
+            self.start,
+            self.end,
+            setting,
+            statistics
+        )
+
+    def update_end(self):
+        """
+        Use newest data in database as default end, so that result store
+        is hit until newer data saved.
+        """
+        if self.end:
             return
 
-        # Clear previously loaded history data
-        self.history_data.clear()
-        self.dts.clear()
+        if self.mode == BacktestingMode.BAR:
+            self.end = get_data_end([self.vt_symbol], self.interval)
+        else:
+            self.end = get_data_end([self.vt_symbol])
 
-        # Load 30 days of data each time and allow for progress update
-        progress_delta = timedelta(days=30)
-        total_delta = self.end - self.start
-        interval_delta = INTERVAL_DELTA_MAP[self.interval]
+        if not self.end:
+            self.end = datetime.now()
 
-        for vt_symbol in self.vt_symbols:
-            start = self.start
-            end = self.start + progress_delta
-            progress = 0
+    def check_result_store(self) -> bool:
+        """
+        Check if the same backtesting exists in result store, so that
+        its statistics are used without loading data and running.
+        """
+        if not self.result_store or not self.strategy_class:
+            return False
 
-            data_count = 0
-            while start < self.end:
-                end = min(end, self.end)  # Make sure end time stays within set range
+        self.update_end()
+        self.cached_statistics = self.result_store.get(self.get_fingerprint())
+        return bool(self.cached_statistics)
 
-                data = load_bar_data(
-                    vt_symbol,
-                    self.interval,
-                    start,
-                    end
-                )
+    def load_data(self):
+        """"""
+        self.output("Start loading historical data")
 
-                for bar in data:
-                    self.dts.add(bar.datetime)
-                    self.history_data[(bar.datetime, vt_symbol)] = bar
-                    data_count += 1
+        self.update_end()
 
-                progress += progress_delta / total_delta
-                progress = min(progress, 1)
-                progress_bar = "#" * int(progress * 10)
-                self.output(f"{vt_symbol}Loading progress: {progress_bar} [{progress:.0%}]")
+        if self.start >= self.end:
+            self.output("The start date must be less than the end date")
+            return
 
-                start = end + interval_delta
-                end += (progress_delta + interval_delta)
+        # History data is loaded when backtesting really runs
+        if self.check_result_store():
+            self.history_loaded = False
+            self.output("Backtesting result exists, skip loading historical data")
+            return
 
-            self.output(f"{vt_symbol}Historical data loading is complete, data volume: {data_count}")
+        self.load_history()
+
+    def load_history(self):
+        """
+        Load history data of backtesting range from database.
+        """
+        if self.mode == BacktestingMode.BAR:
+            self.bar_array = load_bar_array(
+                self.symbol,
+                self.exchange,
+                self.interval,
+                self.start,
+                self.end
+            )
+            # Bars are created one by one when replayed
+            self.history_data = self.bar_array
+        else:
+            self.bar_array = None
+            self.history_data = load_tick_data(
+                self.symbol,
+                self.exchange,
+                self.start,
+                self.end
+            )
 
-        self.output("All historical data loaded")
+        self.history_loaded = True
+        self.output(f"Historical data loading is complete, data volume: {len(self.history_data)}")
 
-    def run_backtesting(self) -> None:
+    def run_backtesting(self):
         """"""
-        self.strategy.on_init()
+        # Skip running if the same backtesting is in result store
+        if self.check_result_store():
+            self.output("Backtesting result exists, use statistics in result store")
+            return
+
+        # History data is not loaded if result existed when load_data called
+        if not self.history_loaded:
+            self.load_history()
 
-        # Generate sorted datetime list
-        dts = list(self.dts)
-        dts.sort()
+        if self.mode == BacktestingMode.BAR:
+            func = self.new_bar
+        else:
+            func = self.new_tick
+
+        self.strategy.on_init()
 
         # Use the first [days] of history data for initializing strategy
         day_count = 0
+
+        # History data is accessed by index, so that bar array only
+        # creates BarData of the bar being replayed
+        history_data = self.history_data
+        count = len(history_data)
         ix = 0
 
-        for ix, dt in enumerate(dts):
-            if self.datetime and dt.day != self.datetime.day:
+        for ix in range(count):
+            data = history_data[ix]
+
+            if self.datetime and data.datetime.day != self.datetime.day:
                 day_count += 1
                 if day_count >= self.days:
                     break
 
+            self.datetime = data.datetime
+
             try:
-                self.new_bars(dt)
+                self.callback(data)
             except Exception:
                 self.output("Exception caught; backtest terminated")
                 self.output(traceback.format_exc())
@@ -174,9 +336,11 @@ class BacktestingEngine:
         self.output("Start playback of historical data")
 
         # Use the rest of history data for running backtesting
-        for dt in dts[ix:]:
+        for ix in range(ix, count):
+            data = history_data[ix]
+
             try:
-                self.new_bars(dt)
+                func(data)
             except Exception:
                 self.output("Exception caught; backtest terminated")
                 self.output(traceback.format_exc())
@@ -184,10 +348,14 @@ class BacktestingEngine:
 
         self.output("End of historical data playback")
 
-    def calculate_result(self) -> None:
+    def calculate_result(self):
         """"""
         self.output("Start calculating mark-to-market profit and loss")
 
+        if self.cached_statistics:
+            self.output("Backtesting result exists, no need to calculate")
+            return
+
         if not self.trades:
             self.output("The transaction record is empty and cannot be calculated")
             return
@@ -199,32 +367,27 @@ class BacktestingEngine:
             daily_result.add_trade(trade)
 
         # Calculate daily result by iteration.
-        pre_closes = {}
-        start_poses = {}
+        pre_close = 0
+        start_pos = 0
 
         for daily_result in self.daily_results.values():
             daily_result.calculate_pnl(
-                pre_closes,
-                start_poses,
-                self.sizes,
-                self.rates,
-                self.slippages,
+                pre_close,
+                start_pos,
+                self.size,
+                self.rate,
+                self.slippage,
+                self.inverse
             )
 
-            pre_closes = daily_result.close_prices
-            start_poses = daily_result.end_poses
+            pre_close = daily_result.close_price
+            start_pos = daily_result.end_pos
 
         # Generate dataframe
         results = defaultdict(list)
 
         for daily_result in self.daily_results.values():
-            fields = [
-                "date", "trade_count", "turnover",
-                "commission", "slippage", "trading_pnl",
-                "holding_pnl", "total_pnl", "net_pnl"
-            ]
-            for key in fields:
-                value = getattr(daily_result, key)
+            for key, value in daily_result.__dict__.items():
                 results[key].append(value)
 
         self.daily_df = DataFrame.from_dict(results).set_index("date")
@@ -232,13 +395,20 @@ class BacktestingEngine:
         self.output("Mark-to-market profit and loss calculation completed")
         return self.daily_df
 
-    def calculate_statistics(self, df: DataFrame = None, output=True) -> None:
+    def calculate_statistics(self, df: DataFrame = None, output=True):
         """"""
         self.output("Start calculating strategy statistics")
 
         # Check DataFrame input exterior
         if df is None:
+            # Use statistics in result store if backtesting skipped
+            if self.cached_statistics:
+                return self.cached_statistics
+
             df = self.daily_df
+            store = bool(self.result_store)
+        else:
+            store = False
 
         # Check for init DataFrame
         if df is None:
@@ -318,15 +488,15 @@ class BacktestingEngine:
             daily_return = df["return"].mean() * 100
             return_std = df["return"].std() * 100
 
-            pnl_std = df["net_pnl"].std()
-
             if return_std:
-                # sharpe_ratio = daily_return / return_std * np.sqrt(240)
-                sharpe_ratio = daily_net_pnl / pnl_std * np.sqrt(240)
+                sharpe_ratio = daily_return / return_std * np.sqrt(240)
             else:
                 sharpe_ratio = 0
 
-            return_drawdown_ratio = -total_net_pnl / max_drawdown
+            if max_ddpercent:
+                return_drawdown_ratio = -total_return / max_ddpercent
+            else:
+                return_drawdown_ratio = 0
 
         # Output
         if output:
@@ -399,10 +569,13 @@ class BacktestingEngine:
                 value = 0
             statistics[key] = np.nan_to_num(value)
 
+        if store:
+            self.save_statistics(statistics)
+
         self.output("Completion of calculation of strategy statistics indicators")
         return statistics
 
-    def show_chart(self, df: DataFrame = None) -> None:
+    def show_chart(self, df: DataFrame = None):
         """"""
         # Check DataFrame input exterior
         if df is None:
@@ -410,6 +583,8 @@ class BacktestingEngine:
 
         # Check for init DataFrame
         if df is None:
+            if self.cached_statistics:
+                self.output("Backtesting result is from result store, no daily result for chart")
             return
 
         fig = make_subplots(
@@ -444,69 +619,209 @@ class BacktestingEngine:
         fig.update_layout(height=1000, width=1000)
         fig.show()
 
-    def update_daily_close(self, bars: Dict[str, BarData], dt: datetime) -> None:
+    def run_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        output: bool = True,
+        max_workers: int = None,
+        callback: Callable[[OptimizationResult, int, int], None] = None
+    ) -> List[OptimizationResult]:
+        """
+        Run grid (or random) search optimization with all CPU cores.
+        """
+        if not self.check_optimization_setting(optimization_setting):
+            return []
+
+        with self.create_optimization_pool(optimization_setting, max_workers, callback) as pool:
+            result_values = pool.run_bf_optimization(optimization_setting)
+
+        if output:
+            for value in result_values:
+                self.output(f"Parameter: {value[0]}, target: {value[1]}")
+
+        return result_values
+
+    def run_ga_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        population_size: int = 100,
+        ngen_size: int = 30,
+        output: bool = True,
+        max_workers: int = None,
+        callback: Callable[[OptimizationResult, int, int], None] = None
+    ) -> List[OptimizationResult]:
+        """
+        Run genetic algorithm optimization with all CPU cores.
+        """
+        if not self.check_optimization_setting(optimization_setting):
+            return []
+
+        with self.create_optimization_pool(optimization_setting, max_workers, callback) as pool:
+            result_values = pool.run_ga_optimization(
+                optimization_setting,
+                population_size,
+                ngen_size
+            )
+
+        if output:
+            for value in result_values:
+                self.output(f"Parameter: {value[0]}, target: {value[1]}")
+
+        return result_values
+
+    def check_optimization_setting(self, optimization_setting: OptimizationSetting) -> bool:
         """"""
-        d = dt.date()
+        if not optimization_setting.params:
+            self.output("The optimization parameter combination is empty, please check")
+            return False
 
-        close_prices = {}
-        for bar in bars.values():
-            close_prices[bar.vt_symbol] = bar.close_price
+        if not optimization_setting.target_name:
+            self.output("The optimization target is not set, please check")
+            return False
 
-        daily_result = self.daily_results.get(d, None)
+        return True
+
+    def create_optimization_pool(
+        self,
+        optimization_setting: OptimizationSetting,
+        max_workers: int = None,
+        callback: Callable[[OptimizationResult, int, int], None] = None
+    ) -> "CtaOptimizationPool":
+        """
+        Create pool of workers which run backtesting on the same data.
+
+        History data is only loaded when the pool starts workers for
+        settings not found in result store.
+        """
+        # End is needed by fingerprint of settings in result store
+        self.update_end()
+
+        target_name = optimization_setting.target_name
+
+        def process_result(result: OptimizationResult, finished: int, total: int) -> None:
+            """"""
+            # Output progress every 1% to avoid flooding log
+            step = max(total // 100, 1)
+            if not finished % step or finished == total:
+                self.output(f"Optimization progress: {finished}/{total} [{finished / total:.0%}]")
+
+            if callback:
+                callback(result, finished, total)
+
+        # Results in result store are reused by optimization
+        if self.result_store:
+            def load_result(setting: dict) -> Optional[OptimizationResult]:
+                """"""
+                statistics = self.result_store.get(self.get_fingerprint(setting))
+                if statistics:
+                    return (setting, statistics[target_name], statistics)
+                return None
+
+            def save_result(result: OptimizationResult) -> None:
+                """"""
+                self.save_statistics(result[2], result[0])
+        else:
+            load_result = None
+            save_result = None
+
+        return CtaOptimizationPool(
+            engine=self,
+            target_name=target_name,
+            max_workers=max_workers,
+            output=self.output,
+            callback=process_result,
+            load_result=load_result,
+            save_result=save_result
+        )
+
+    def share_history_data(self) -> Tuple[object, Optional[SharedArrays]]:
+        """
+        Load history data for optimization workers. Bar data is put into
+        shared memory, tick data is sent to each worker once when it starts.
+        """
+        self.load_history()
+
+        if self.mode == BacktestingMode.BAR:
+            arrays = {"datetime": self.bar_array.datetime}
+            for field in BAR_ARRAY_FIELDS:
+                arrays[field] = getattr(self.bar_array, field)
+
+            shared_arrays = SharedArrays(arrays)
+            return shared_arrays.specs, shared_arrays
+        else:
+            return self.history_data, None
+
+    def update_daily_close(self, price: float):
+        """"""
+        d = self.datetime.date()
 
+        daily_result = self.daily_results.get(d, None)
         if daily_result:
-            daily_result.update_close_prices(close_prices)
+            daily_result.close_price = price
         else:
-            self.daily_results[d] = PortfolioDailyResult(d, close_prices)
+            self.daily_results[d] = DailyResult(d, price)
 
-    def new_bars(self, dt: datetime) -> None:
+    def new_bar(self, bar: BarData):
         """"""
-        self.datetime = dt
-
-        # self.bars.clear()
-        for vt_symbol in self.vt_symbols:
-            bar = self.history_data.get((dt, vt_symbol), None)
-
-            # If bar data of vt_symbol at dt exists
-            if bar:
-                self.bars[vt_symbol] = bar
-            # Otherwise, use previous data to backfill
-            elif vt_symbol in self.bars:
-                old_bar = self.bars[vt_symbol]
-
-                bar = BarData(
-                    symbol=old_bar.symbol,
-                    exchange=old_bar.exchange,
-                    datetime=dt,
-                    open_price=old_bar.close_price,
-                    high_price=old_bar.close_price,
-                    low_price=old_bar.close_price,
-                    close_price=old_bar.close_price,
-                    gateway_name=old_bar.gateway_name
-                )
-                self.bars[vt_symbol] = bar
+        self.bar = bar
+        self.datetime = bar.datetime
 
         self.cross_limit_order()
-        self.strategy.on_bars(self.bars)
+        self.cross_stop_order()
+        self.strategy.on_bar(bar)
 
-        self.update_daily_close(self.bars, dt)
+        self.update_daily_close(bar.close_price)
 
-    def cross_limit_order(self) -> None:
+    def new_tick(self, tick: TickData):
+        """"""
+        self.tick = tick
+        self.datetime = tick.datetime
+
+        self.cross_limit_order()
+        self.cross_stop_order()
+        self.strategy.on_tick(tick)
+
+        self.update_daily_close(tick.last_price)
+
+    def cross_limit_order(self):
         """
         Cross limit order with last bar/tick data.
         """
-        for order in list(self.active_limit_orders.values()):
-            bar = self.bars[order.vt_symbol]
+        if self.mode == BacktestingMode.BAR:
+            long_cross_price = self.bar.low_price
+            short_cross_price = self.bar.high_price
+            long_best_price = self.bar.open_price
+            short_best_price = self.bar.open_price
+        else:
+            long_cross_price = self.tick.ask_price_1
+            short_cross_price = self.tick.bid_price_1
+            long_best_price = long_cross_price
+            short_best_price = short_cross_price
+
+        # Only check orders crossed by price in order book, and orders
+        # submitted since last check (which are newer than all others).
+        crossed_orderids = self.limit_order_book.get_crossed({
+            self.vt_symbol: (
+                long_cross_price if long_cross_price > 0 else None,
+                short_cross_price if short_cross_price > 0 else None
+            )
+        })
 
-            long_cross_price = bar.low_price
-            short_cross_price = bar.high_price
-            long_best_price = bar.open_price
-            short_best_price = bar.open_price
+        orders = [
+            self.active_limit_orders[vt_orderid] for vt_orderid in crossed_orderids
+            if self.active_limit_orders[vt_orderid].status != Status.SUBMITTING
+        ]
+        orders.extend(self.submitting_orders)
+        self.submitting_orders = []
+
+        for order in orders:
+            if order.vt_orderid not in self.active_limit_orders:
+                continue
 
             # Push order update with status "not traded" (pending).
             if order.status == Status.SUBMITTING:
                 order.status = Status.NOTTRADED
-                self.strategy.update_order(order)
+                self.strategy.on_order(order)
 
             # Check whether limit orders can be filled.
             long_cross = (
@@ -524,20 +839,105 @@ class BacktestingEngine:
             if not long_cross and not short_cross:
                 continue
 
-            # Push order update with status "all traded" (filled).
+            # Push order udpate with status "all traded" (filled).
             order.traded = order.volume
             order.status = Status.ALLTRADED
-            self.strategy.update_order(order)
+            self.strategy.on_order(order)
 
             self.active_limit_orders.pop(order.vt_orderid)
+            self.limit_order_book.remove(order.vt_orderid)
 
             # Push trade update
             self.trade_count += 1
 
             if long_cross:
                 trade_price = min(order.price, long_best_price)
+                pos_change = order.volume
             else:
                 trade_price = max(order.price, short_best_price)
+                pos_change = -order.volume
+
+            trade = TradeData(
+                symbol=order.symbol,
+                exchange=order.exchange,
+                orderid=order.orderid,
+                tradeid=str(self.trade_count),
+                direction=order.direction,
+                offset=order.offset,
+                price=trade_price,
+                volume=order.volume,
+                datetime=self.datetime,
+                gateway_name=self.gateway_name,
+            )
+
+            self.strategy.pos += pos_change
+            self.strategy.on_trade(trade)
+
+            self.trades[trade.vt_tradeid] = trade
+
+    def cross_stop_order(self):
+        """
+        Cross stop order with last bar/tick data.
+        """
+        if self.mode == BacktestingMode.BAR:
+            long_cross_price = self.bar.high_price
+            short_cross_price = self.bar.low_price
+            long_best_price = self.bar.open_price
+            short_best_price = self.bar.open_price
+        else:
+            long_cross_price = self.tick.last_price
+            short_cross_price = self.tick.last_price
+            long_best_price = long_cross_price
+            short_best_price = short_cross_price
+
+        stop_orderids = self.stop_order_book.get_crossed({
+            self.vt_symbol: (long_cross_price, short_cross_price)
+        })
+        stop_orders = [self.active_stop_orders[stop_orderid] for stop_orderid in stop_orderids]
+
+        for stop_order in stop_orders:
+            # Check whether stop order can be triggered.
+            long_cross = (
+                stop_order.direction == Direction.LONG
+                and stop_order.price <= long_cross_price
+            )
+
+            short_cross = (
+                stop_order.direction == Direction.SHORT
+                and stop_order.price >= short_cross_price
+            )
+
+            if not long_cross and not short_cross:
+                continue
+
+            # Create order data.
+            self.limit_order_count += 1
+
+            order = OrderData(
+                symbol=self.symbol,
+                exchange=self.exchange,
+                orderid=str(self.limit_order_count),
+                direction=stop_order.direction,
+                offset=stop_order.offset,
+                price=stop_order.price,
+                volume=stop_order.volume,
+                traded=stop_order.volume,
+                status=Status.ALLTRADED,
+                datetime=self.datetime,
+                gateway_name=self.gateway_name,
+            )
+
+            self.limit_orders[order.vt_orderid] = order
+
+            # Create trade data.
+            if long_cross:
+                trade_price = max(stop_order.price, long_best_price)
+                pos_change = order.volume
+            else:
+                trade_price = min(stop_order.price, short_best_price)
+                pos_change = -order.volume
+
+            self.trade_count += 1
 
             trade = TradeData(
                 symbol=order.symbol,
@@ -552,37 +952,97 @@ class BacktestingEngine:
                 gateway_name=self.gateway_name,
             )
 
-            self.strategy.update_trade(trade)
             self.trades[trade.vt_tradeid] = trade
 
-    def load_bars(
+            # Update stop order.
+            stop_order.vt_orderids.append(order.vt_orderid)
+            stop_order.status = StopOrderStatus.TRIGGERED
+
+            if stop_order.stop_orderid in self.active_stop_orders:
+                self.active_stop_orders.pop(stop_order.stop_orderid)
+                self.stop_order_book.remove(stop_order.stop_orderid)
+
+            # Push update to strategy.
+            self.strategy.on_stop_order(stop_order)
+            self.strategy.on_order(order)
+
+            self.strategy.pos += pos_change
+            self.strategy.on_trade(trade)
+
+    def load_bar(
         self,
-        strategy: StrategyTemplate,
+        vt_symbol: str,
         days: int,
-        interval: Interval
-    ) -> None:
+        interval: Interval,
+        callback: Callable,
+        use_database: bool
+    ):
+        """"""
+        self.days = days
+        self.callback = callback
+
+    def load_tick(self, vt_symbol: str, days: int, callback: Callable):
         """"""
         self.days = days
+        self.callback = callback
 
     def send_order(
         self,
-        strategy: StrategyTemplate,
-        vt_symbol: str,
+        strategy: CtaTemplate,
         direction: Direction,
         offset: Offset,
         price: float,
         volume: float,
+        stop: bool,
         lock: bool
-    ) -> List[str]:
+    ):
         """"""
-        price = round_to(price, self.priceticks[vt_symbol])
-        symbol, exchange = extract_vt_symbol(vt_symbol)
+        price = round_to(price, self.pricetick)
+        if stop:
+            vt_orderid = self.send_stop_order(direction, offset, price, volume)
+        else:
+            vt_orderid = self.send_limit_order(direction, offset, price, volume)
+        return [vt_orderid]
+
+    def send_stop_order(
+        self,
+        direction: Direction,
+        offset: Offset,
+        price: float,
+        volume: float
+    ):
+        """"""
+        self.stop_order_count += 1
+
+        stop_order = StopOrder(
+            vt_symbol=self.vt_symbol,
+            direction=direction,
+            offset=offset,
+            price=price,
+            volume=volume,
+            stop_orderid=f"{STOPORDER_PREFIX}.{self.stop_order_count}",
+            strategy_name=self.strategy.strategy_name,
+        )
+
+        self.active_stop_orders[stop_order.stop_orderid] = stop_order
+        self.stop_orders[stop_order.stop_orderid] = stop_order
+        self.stop_order_book.add(stop_order.stop_orderid, self.vt_symbol, direction, price)
 
+        return stop_order.stop_orderid
+
+    def send_limit_order(
+        self,
+        direction: Direction,
+        offset: Offset,
+        price: float,
+        volume: float
+    ):
+        """"""
         self.limit_order_count += 1
 
         order = OrderData(
-            symbol=symbol,
-            exchange=exchange,
+            symbol=self.symbol,
+            exchange=self.exchange,
             orderid=str(self.limit_order_count),
             direction=direction,
             offset=offset,
@@ -595,66 +1055,329 @@ class BacktestingEngine:
 
         self.active_limit_orders[order.vt_orderid] = order
         self.limit_orders[order.vt_orderid] = order
+        self.limit_order_book.add(order.vt_orderid, self.vt_symbol, direction, price)
+        self.submitting_orders.append(order)
 
-        return [order.vt_orderid]
+        return order.vt_orderid
 
-    def cancel_order(self, strategy: StrategyTemplate, vt_orderid: str) -> None:
+    def cancel_order(self, strategy: CtaTemplate, vt_orderid: str):
         """
         Cancel order by vt_orderid.
         """
+        if vt_orderid.startswith(STOPORDER_PREFIX):
+            self.cancel_stop_order(strategy, vt_orderid)
+        else:
+            self.cancel_limit_order(strategy, vt_orderid)
+
+    def cancel_stop_order(self, strategy: CtaTemplate, vt_orderid: str):
+        """"""
+        if vt_orderid not in self.active_stop_orders:
+            return
+        stop_order = self.active_stop_orders.pop(vt_orderid)
+        self.stop_order_book.remove(vt_orderid)
+
+        stop_order.status = StopOrderStatus.CANCELLED
+        self.strategy.on_stop_order(stop_order)
+
+    def cancel_limit_order(self, strategy: CtaTemplate, vt_orderid: str):
+        """"""
         if vt_orderid not in self.active_limit_orders:
             return
         order = self.active_limit_orders.pop(vt_orderid)
+        self.limit_order_book.remove(vt_orderid)
 
         order.status = Status.CANCELLED
-        self.strategy.update_order(order)
+        self.strategy.on_order(order)
+
+    def cancel_all(self, strategy: CtaTemplate):
+        """
+        Cancel all orders, both limit and stop.
+        """
+        vt_orderids = list(self.active_limit_orders.keys())
+        for vt_orderid in vt_orderids:
+            self.cancel_limit_order(strategy, vt_orderid)
+
+        stop_orderids = list(self.active_stop_orders.keys())
+        for vt_orderid in stop_orderids:
+            self.cancel_stop_order(strategy, vt_orderid)
 
-    def write_log(self, msg: str, strategy: StrategyTemplate = None) -> None:
+    def write_log(self, msg: str, strategy: CtaTemplate = None):
         """
         Write log message.
         """
         msg = f"{self.datetime}\t{msg}"
         self.logs.append(msg)
 
-    def send_email(self, msg: str, strategy: StrategyTemplate = None) -> None:
+    def send_email(self, msg: str, strategy: CtaTemplate = None):
         """
         Send email to default receiver.
         """
         pass
 
-    def sync_strategy_data(self, strategy: StrategyTemplate) -> None:
+    def sync_strategy_data(self, strategy: CtaTemplate):
         """
         Sync strategy data into json file.
         """
         pass
 
-    def put_strategy_event(self, strategy: StrategyTemplate) -> None:
+    def get_engine_type(self):
+        """
+        Return engine type.
+        """
+        return self.engine_type
+
+    def get_pricetick(self, strategy: CtaTemplate):
+        """
+        Return contract pricetick data.
+        """
+        return self.pricetick
+
+    def put_strategy_event(self, strategy: CtaTemplate):
         """
         Put an event to update strategy status.
         """
         pass
 
-    def output(self, msg) -> None:
+    def output(self, msg):
         """
         Output message of backtesting engine.
         """
         print(f"{datetime.now()}\t{msg}")
 
-    def get_all_trades(self) -> List[TradeData]:
+    def get_all_trades(self):
         """
         Return all trade data of current backtesting result.
         """
         return list(self.trades.values())
 
-    def get_all_orders(self) -> List[OrderData]:
+    def get_all_orders(self):
         """
         Return all limit order data of current backtesting result.
         """
         return list(self.limit_orders.values())
 
-    def get_all_daily_results(self) -> List["PortfolioDailyResult"]:
+    def get_all_daily_results(self):
         """
         Return all daily result data.
         """
         return list(self.daily_results.values())
 
+
+class DailyResult:
+    """"""
+
+    def __init__(self, date: date, close_price: float):
+        """"""
+        self.date = date
+        self.close_price = close_price
+        self.pre_close = 0
+
+        self.trades = []
+        self.trade_count = 0
+
+        self.start_pos = 0
+        self.end_pos = 0
+
+        self.turnover = 0
+        self.commission = 0
+        self.slippage = 0
+
+        self.trading_pnl = 0
+        self.holding_pnl = 0
+        self.total_pnl = 0
+        self.net_pnl = 0
+
+    def add_trade(self, trade: TradeData):
+        """"""
+        self.trades.append(trade)
+
+    def calculate_pnl(
+        self,
+        pre_close: float,
+        start_pos: float,
+        size: int,
+        rate: float,
+        slippage: float,
+        inverse: bool
+    ):
+        """"""
+        # If no pre_close provided on the first day,
+        # use value 1 to avoid zero division error
+        if pre_close:
+            self.pre_close = pre_close
+        else:
+            self.pre_close = 1
+
+        # Holding pnl is the pnl from holding position at day start
+        self.start_pos = start_pos
+        self.end_pos = start_pos
+
+        if not inverse:     # For normal contract
+            self.holding_pnl = self.start_pos * \
+                (self.close_price - self.pre_close) * size
+        else:               # For crypto currency inverse contract
+            self.holding_pnl = self.start_pos * \
+                (1 / self.pre_close - 1 / self.close_price) * size
+
+        # Trading pnl is the pnl from new trade during the day
+        self.trade_count = len(self.trades)
+
+        for trade in self.trades:
+            if trade.direction == Direction.LONG:
+                pos_change = trade.volume
+            else:
+                pos_change = -trade.volume
+
+            self.end_pos += pos_change
+
+            # For normal contract
+            if not inverse:
+                turnover = trade.volume * size * trade.price
+                self.trading_pnl += pos_change * \
+                    (self.close_price - trade.price) * size
+                self.slippage += trade.volume * size * slippage
+            # For crypto currency inverse contract
+            else:
+                turnover = trade.volume * size / trade.price
+                self.trading_pnl += pos_change * \
+                    (1 / trade.price - 1 / self.close_price) * size
+                self.slippage += trade.volume * size * slippage / (trade.price ** 2)
+
+            self.turnover += turnover
+            self.commission += turnover * rate
+
+        # Net pnl takes account of commission and slippage cost
+        self.total_pnl = self.trading_pnl + self.holding_pnl
+        self.net_pnl = self.total_pnl - self.commission - self.slippage
+
+
+class CtaOptimizationPool(OptimizationPool):
+    """
+    Optimization pool which loads and shares history data when workers
+    start, and releases shared history data when closed.
+    """
+
+    def __init__(self, engine: BacktestingEngine, target_name: str, **kwargs):
+        """"""
+        super().__init__(
+            evaluate_func=evaluate_setting,
+            initializer=init_optimization_worker,
+            **kwargs
+        )
+
+        self.engine: BacktestingEngine = engine
+        self.target_name: str = target_name
+        self.shared_arrays: SharedArrays = None
+
+    def start(self) -> None:
+        """"""
+        engine = self.engine
+        history_data, self.shared_arrays = engine.share_history_data()
+
+        self.initargs = (
+            engine.get_parameters(),
+            engine.strategy_class,
+            history_data,
+            self.target_name
+        )
+        super().start()
+
+    def close(self) -> None:
+        """"""
+        super().close()
+
+        if self.shared_arrays:
+            self.shared_arrays.close()
+            self.shared_arrays = None
+
+
+# Backtesting engine and target of optimization worker process
+worker_engine: BacktestingEngine = None
+worker_target: str = ""
+# Shared memory blocks of bar data, attached until worker process exits
+worker_blocks: list = []
+
+
+def init_optimization_worker(
+    parameters: dict,
+    strategy_class: type,
+    history_data: object,
+    target_name: str
+) -> None:
+    """
+    Create backtesting engine in worker process with history data
+    in shared memory (bar mode) or sent with the arguments (tick mode).
+    """
+    global worker_engine, worker_target, worker_blocks
+
+    engine = BacktestingEngine()
+    engine.output = lambda msg: None
+    engine.set_parameters(**parameters)
+    engine.strategy_class = strategy_class
+
+    if engine.mode == BacktestingMode.BAR:
+        arrays, blocks = attach_arrays(history_data)
+
+        bar_array = BarArray(
+            engine.symbol,
+            engine.exchange,
+            engine.interval,
+            arrays["datetime"],
+            *[arrays[field] for field in BAR_ARRAY_FIELDS]
+        )
+
+        # Arrays are views of shared memory which must stay attached
+        # while bars are replayed by index
+        engine.bar_array = bar_array
+        engine.history_data = bar_array
+        worker_blocks = blocks
+    else:
+        engine.history_data = history_data
+
+    engine.history_loaded = True
+
+    worker_engine = engine
+    worker_target = target_name
+
+
+def evaluate_setting(setting: dict) -> Tuple[dict, float, dict]:
+    """
+    Run backtesting of setting in worker process.
+    """
+    engine = worker_engine
+
+    engine.clear_data()
+    engine.add_strategy(engine.strategy_class, setting)
+    engine.run_backtesting()
+    engine.calculate_result()
+    statistics = engine.calculate_statistics(output=False)
+
+    target_value = statistics[worker_target]
+    return (setting, target_value, statistics)
+
+
+@cached_history
+def load_bar_array(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    start: datetime,
+    end: datetime
+) -> BarArray:
+    """"""
+    return database_manager.load_bar_array(
+        symbol, exchange, interval, start, end
+    )
+
+
+@cached_history
+def load_tick_data(
+    symbol: str,
+    exchange: Exchange,
+    start: datetime,
+    end: datetime
+):
+    """"""
+    return database_manager.load_tick_data(
+        symbol, exchange, start, end
+    )
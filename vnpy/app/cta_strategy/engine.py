@@ -7,11 +7,13 @@ from collections import defaultdict
 from pathlib import Path
 from typing import Any, Callable
 from datetime import datetime, timedelta
+from threading import Lock, RLock
 from concurrent.futures import ThreadPoolExecutor
 from copy import copy
+from functools import partial
 from tzlocal import get_localzone
 
-from vnpy.event import Event, EventEngine
+from vnpy.event import Event, EventEngine, ShardedEventEngine
 from vnpy.trader.engine import BaseEngine, MainEngine
 from vnpy.trader.object import (
     OrderRequest,
@@ -92,6 +94,12 @@ class CtaEngine(BaseEngine):
         self.stop_order_count = 0   # for generating stop_orderid
         self.stop_orders = {}       # stop_orderid: stop_order
 
+        # Strategies may run on different threads with ShardedEventEngine
+        self.lock = Lock()
+        # Order placement, cancellation and offset converter are not
+        # thread safe, reentrant since strategy callbacks may send orders
+        self.order_lock = RLock()
+
         self.init_executor = ThreadPoolExecutor(max_workers=1)
 
         self.rq_client = None
@@ -116,11 +124,24 @@ class CtaEngine(BaseEngine):
         self.stop_all_strategies()
 
     def register_event(self):
-        """"""
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
-        self.event_engine.register(EVENT_ORDER, self.process_order_event)
-        self.event_engine.register(EVENT_TRADE, self.process_trade_event)
-        self.event_engine.register(EVENT_POSITION, self.process_position_event)
+        """
+        With ShardedEventEngine, handlers are registered as parallel so
+        that strategies of different symbols run on different shards.
+
+        Callbacks of strategies on different symbols are then called
+        concurrently from different threads. Sending and cancelling orders
+        are serialized by order_lock, but state shared between strategies
+        must be protected by the strategies themselves.
+        """
+        if isinstance(self.event_engine, ShardedEventEngine):
+            register = partial(self.event_engine.register, parallel=True)
+        else:
+            register = self.event_engine.register
+
+        register(EVENT_TICK, self.process_tick_event)
+        register(EVENT_ORDER, self.process_order_event)
+        register(EVENT_TRADE, self.process_trade_event)
+        register(EVENT_POSITION, self.process_position_event)
 
     def init_rqdata(self):
         """
@@ -154,7 +175,8 @@ class CtaEngine(BaseEngine):
         if not strategies:
             return
 
-        self.check_stop_order(tick)
+        with self.order_lock:
+            self.check_stop_order(tick)
 
         for strategy in strategies:
             if strategy.inited:
@@ -164,7 +186,8 @@ class CtaEngine(BaseEngine):
         """"""
         order = event.data
 
-        self.offset_converter.update_order(order)
+        with self.order_lock:
+            self.offset_converter.update_order(order)
 
         strategy = self.orderid_strategy_map.get(order.vt_orderid, None)
         if not strategy:
@@ -202,7 +225,8 @@ class CtaEngine(BaseEngine):
             return
         self.vt_tradeids.add(trade.vt_tradeid)
 
-        self.offset_converter.update_trade(trade)
+        with self.order_lock:
+            self.offset_converter.update_trade(trade)
 
         strategy = self.orderid_strategy_map.get(trade.vt_orderid, None)
         if not strategy:
@@ -226,7 +250,8 @@ class CtaEngine(BaseEngine):
         """"""
         position = event.data
 
-        self.offset_converter.update_position(position)
+        with self.order_lock:
+            self.offset_converter.update_position(position)
 
     def check_stop_order(self, tick: TickData):
         """"""
@@ -402,8 +427,9 @@ class CtaEngine(BaseEngine):
         """
         Create a new local stop order.
         """
-        self.stop_order_count += 1
-        stop_orderid = f"{STOPORDER_PREFIX}.{self.stop_order_count}"
+        with self.lock:
+            self.stop_order_count += 1
+            stop_orderid = f"{STOPORDER_PREFIX}.{self.stop_order_count}"
 
         stop_order = StopOrder(
             vt_symbol=strategy.vt_symbol,
@@ -481,32 +507,36 @@ class CtaEngine(BaseEngine):
         price = round_to(price, contract.pricetick)
         volume = round_to(volume, contract.min_volume)
 
-        if stop:
-            if contract.stop_supported:
-                return self.send_server_stop_order(strategy, contract, direction, offset, price, volume, lock)
+        # Gateways assume orders are sent from one thread
+        with self.order_lock:
+            if stop:
+                if contract.stop_supported:
+                    return self.send_server_stop_order(strategy, contract, direction, offset, price, volume, lock)
+                else:
+                    return self.send_local_stop_order(strategy, direction, offset, price, volume, lock)
             else:
-                return self.send_local_stop_order(strategy, direction, offset, price, volume, lock)
-        else:
-            return self.send_limit_order(strategy, contract, direction, offset, price, volume, lock)
+                return self.send_limit_order(strategy, contract, direction, offset, price, volume, lock)
 
     def cancel_order(self, strategy: CtaTemplate, vt_orderid: str):
         """
         """
-        if vt_orderid.startswith(STOPORDER_PREFIX):
-            self.cancel_local_stop_order(strategy, vt_orderid)
-        else:
-            self.cancel_server_order(strategy, vt_orderid)
+        with self.order_lock:
+            if vt_orderid.startswith(STOPORDER_PREFIX):
+                self.cancel_local_stop_order(strategy, vt_orderid)
+            else:
+                self.cancel_server_order(strategy, vt_orderid)
 
     def cancel_all(self, strategy: CtaTemplate):
         """
         Cancel all active orders of a strategy.
         """
-        vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
-        if not vt_orderids:
-            return
+        with self.order_lock:
+            vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
+            if not vt_orderids:
+                return
 
-        for vt_orderid in copy(vt_orderids):
-            self.cancel_order(strategy, vt_orderid)
+            for vt_orderid in copy(vt_orderids):
+                self.cancel_order(strategy, vt_orderid)
 
     def get_engine_type(self):
         """"""
@@ -808,8 +838,9 @@ class CtaEngine(BaseEngine):
         data.pop("inited")      # Strategy status (inited, trading) should not be synced.
         data.pop("trading")
 
-        self.strategy_data[strategy.strategy_name] = data
-        save_json(self.data_filename, self.strategy_data)
+        with self.lock:
+            self.strategy_data[strategy.strategy_name] = data
+            save_json(self.data_filename, self.strategy_data)
 
     def get_all_strategy_class_names(self):
         """
@@ -6,6 +6,7 @@ from vnpy.trader.engine import BaseEngine, MainEngine, EventEngine
 from vnpy.trader.constant import Interval, Exchange
 from vnpy.trader.object import BarData, HistoryRequest
 from vnpy.trader.database import database_manager
+from vnpy.trader.history_cache import history_cache
 from vnpy.trader.rqdata import rqdata_client
 
 
@@ -79,6 +80,7 @@ class ManagerEngine(BaseEngine):
 
         # insert into database
         database_manager.save_bar_data(bars)
+        history_cache.invalidate()
 
         end = bar.datetime
         return start, end, count
@@ -178,6 +180,7 @@ class ManagerEngine(BaseEngine):
             exchange,
             interval
         )
+        history_cache.invalidate()
 
         return count
 
@@ -216,6 +219,7 @@ class ManagerEngine(BaseEngine):
 
         if data:
             database_manager.save_bar_data(data)
+            history_cache.invalidate()
             return(len(data))
 
         return 0
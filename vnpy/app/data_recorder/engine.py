@@ -2,8 +2,9 @@
 
 import sys
 from threading import Thread
-from queue import Queue, Empty
+from queue import Queue, Empty, Full
 from copy import copy
+from time import time
 
 from vnpy.event import Event, EventEngine
 from vnpy.trader.engine import BaseEngine, MainEngine
@@ -25,6 +26,13 @@ APP_NAME = "DataRecorder"
 EVENT_RECORDER_LOG = "eRecorderLog"
 EVENT_RECORDER_UPDATE = "eRecorderUpdate"
 EVENT_RECORDER_EXCEPTION = "eRecorderException"
+EVENT_RECORDER_STATUS = "eRecorderStatus"
+
+BATCH_INTERVAL = 1          # max seconds to wait before writing a batch
+BATCH_SIZE = 1000           # max number of data written in a batch
+QUEUE_SIZE = 100_000        # data dropped when queue is full
+PENDING_SIZE = 500_000      # max data kept for writing, new data dropped when full
+RETRY_INTERVAL = 5          # seconds to wait before retrying failed write
 
 
 class RecorderEngine(BaseEngine):
@@ -35,10 +43,24 @@ class RecorderEngine(BaseEngine):
         """"""
         super().__init__(main_engine, event_engine, APP_NAME)
 
-        self.queue = Queue()
+        self.queue = Queue(maxsize=QUEUE_SIZE)
         self.thread = Thread(target=self.run)
         self.active = False
 
+        # Data waiting to be written, in batches of BATCH_SIZE,
+        # with time of each data put into queue
+        self.ticks = []
+        self.bars = []
+        self.tick_times = []
+        self.bar_times = []
+        self.last_flush = 0
+        self.retry_time = 0
+        self.fail_count = 0
+
+        # Data dropped when queue full (event thread) or pending full
+        self.queue_drop_count = 0
+        self.pending_drop_count = 0
+
         self.tick_recordings = {}
         self.bar_recordings = {}
         self.bar_generators = {}
@@ -63,32 +85,135 @@ class RecorderEngine(BaseEngine):
         save_json(self.setting_filename, setting)
 
     def run(self):
-        """"""
+        """
+        Collect data from queue into pending list, and write a batch when
+        enough data is pending or it has waited long enough. Queue is
+        kept drained while waiting to retry a failed write.
+        """
+        self.last_flush = time()
+
         while self.active:
+            flush_time = max(self.last_flush + BATCH_INTERVAL, self.retry_time)
+            timeout = max(flush_time - time(), 0)
+
             try:
-                task = self.queue.get(timeout=1)
-                task_type, data = task
+                task = self.queue.get(timeout=timeout)
+                self.add_task(task)
+            except Empty:
+                pass
+
+            now = time()
+            if now < self.retry_time:
+                continue
 
-                if task_type == "tick":
-                    database_manager.save_tick_data([data])
-                elif task_type == "bar":
-                    database_manager.save_bar_data([data])
+            count = len(self.ticks) + len(self.bars)
+            if count >= BATCH_SIZE or now >= self.last_flush + BATCH_INTERVAL:
+                self.flush()
 
+        # Write all data left in queue before exit, without waiting to retry
+        while True:
+            try:
+                task = self.queue.get_nowait()
+                self.add_task(task)
             except Empty:
-                continue
+                break
+
+        while True:
+            if not self.flush():
+                self.write_log("数据记录停止，剩余数据写入失败")
+                break
+
+            if not self.ticks and not self.bars:
+                break
+
+    def add_task(self, task: tuple):
+        """"""
+        task_type, data, put_time = task
+
+        if len(self.ticks) + len(self.bars) >= PENDING_SIZE:
+            if not self.pending_drop_count:
+                self.write_log(f"待写入数据超过{PENDING_SIZE}条，新数据将被丢弃")
+            self.pending_drop_count += 1
+            return
+
+        if task_type == "tick":
+            self.ticks.append(data)
+            self.tick_times.append(put_time)
+        elif task_type == "bar":
+            self.bars.append(data)
+            self.bar_times.append(put_time)
+
+    def flush(self) -> bool:
+        """
+        Write one batch of pending data into database. If failed, data is
+        kept and retried after RETRY_INTERVAL, so that recording never stops.
+        """
+        self.last_flush = time()
+
+        ticks = self.ticks[:BATCH_SIZE]
+        bars = self.bars[:BATCH_SIZE]
+        count = len(ticks) + len(bars)
+
+        # Oldest data of this batch, pending data is in put order
+        first_times = self.tick_times[:1] + self.bar_times[:1]
+        first_time = min(first_times) if first_times else 0
+
+        if count:
+            try:
+                if ticks:
+                    database_manager.save_tick_data(ticks)
+                    del self.ticks[:len(ticks)]
+                    del self.tick_times[:len(ticks)]
+
+                if bars:
+                    database_manager.save_bar_data(bars)
+                    del self.bars[:len(bars)]
+                    del self.bar_times[:len(bars)]
 
             except Exception:
-                self.active = False
+                self.fail_count += 1
+                self.retry_time = time() + RETRY_INTERVAL
+
+                # Only report exception once for continuous failures
+                if self.fail_count == 1:
+                    info = sys.exc_info()
+                    event = Event(EVENT_RECORDER_EXCEPTION, info)
+                    self.event_engine.put(event)
+
+                self.write_log(f"数据写入失败，{RETRY_INTERVAL}秒后重试")
+                self.put_status(count, 0)
+                return False
+
+            if self.fail_count:
+                self.write_log("数据写入恢复")
+                self.fail_count = 0
+                self.retry_time = 0
+
+        lag = time() - first_time if count else 0
+        self.put_status(count, lag)
+        return True
+
+    def put_status(self, count: int, lag: float):
+        """
+        Put status of data writing, including queue depth and write lag
+        (seconds from the oldest data in batch recorded to written).
+        """
+        data = {
+            "queue_size": self.queue.qsize(),
+            "batch_size": count,
+            "write_lag": lag,
+            "fail_count": self.fail_count,
+            "drop_count": self.queue_drop_count + self.pending_drop_count
+        }
 
-                info = sys.exc_info()
-                event = Event(EVENT_RECORDER_EXCEPTION, info)
-                self.event_engine.put(event)
+        event = Event(EVENT_RECORDER_STATUS, data)
+        self.event_engine.put(event)
 
     def close(self):
         """"""
         self.active = False
 
-        if self.thread.isAlive():
+        if self.thread.is_alive():
             self.thread.join()
 
     def start(self):
@@ -243,13 +368,22 @@ class RecorderEngine(BaseEngine):
 
     def record_tick(self, tick: TickData):
         """"""
-        task = ("tick", copy(tick))
-        self.queue.put(task)
+        task = ("tick", copy(tick), time())
+        self.put_task(task)
 
     def record_bar(self, bar: BarData):
         """"""
-        task = ("bar", copy(bar))
-        self.queue.put(task)
+        task = ("bar", copy(bar), time())
+        self.put_task(task)
+
+    def put_task(self, task: tuple):
+        """
+        Put task without blocking event thread, count it if queue is full.
+        """
+        try:
+            self.queue.put_nowait(task)
+        except Full:
+            self.queue_drop_count += 1
 
     def get_bar_generator(self, vt_symbol: str):
         """"""
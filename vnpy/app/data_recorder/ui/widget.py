@@ -10,7 +10,8 @@ from ..engine import (
     APP_NAME,
     EVENT_RECORDER_LOG,
     EVENT_RECORDER_UPDATE,
-    EVENT_RECORDER_EXCEPTION
+    EVENT_RECORDER_EXCEPTION,
+    EVENT_RECORDER_STATUS
 )
 
 
@@ -21,6 +22,7 @@ class RecorderManager(QtWidgets.QWidget):
     signal_update = QtCore.pyqtSignal(Event)
     signal_contract = QtCore.pyqtSignal(Event)
     signal_exception = QtCore.pyqtSignal(Event)
+    signal_status = QtCore.pyqtSignal(Event)
 
     def __init__(self, main_engine: MainEngine, event_engine: EventEngine):
         super().__init__()
@@ -73,6 +75,8 @@ class RecorderManager(QtWidgets.QWidget):
         self.log_edit = QtWidgets.QTextEdit()
         self.log_edit.setReadOnly(True)
 
+        self.status_label = QtWidgets.QLabel()
+
         # Set layout
         grid = QtWidgets.QGridLayout()
         grid.addWidget(QtWidgets.QLabel("K线记录"), 0, 0)
@@ -99,6 +103,7 @@ class RecorderManager(QtWidgets.QWidget):
         vbox = QtWidgets.QVBoxLayout()
         vbox.addLayout(hbox)
         vbox.addLayout(grid2)
+        vbox.addWidget(self.status_label)
         self.setLayout(vbox)
 
     def register_event(self):
@@ -107,6 +112,7 @@ class RecorderManager(QtWidgets.QWidget):
         self.signal_contract.connect(self.process_contract_event)
         self.signal_update.connect(self.process_update_event)
         self.signal_exception.connect(self.process_exception_event)
+        self.signal_status.connect(self.process_status_event)
 
         self.event_engine.register(EVENT_CONTRACT, self.signal_contract.emit)
         self.event_engine.register(
@@ -114,6 +120,7 @@ class RecorderManager(QtWidgets.QWidget):
         self.event_engine.register(
             EVENT_RECORDER_UPDATE, self.signal_update.emit)
         self.event_engine.register(EVENT_RECORDER_EXCEPTION, self.signal_exception.emit)
+        self.event_engine.register(EVENT_RECORDER_STATUS, self.signal_status.emit)
 
     def process_log_event(self, event: Event):
         """"""
@@ -146,6 +153,19 @@ class RecorderManager(QtWidgets.QWidget):
         exc_info = event.data
         raise exc_info[1].with_traceback(exc_info[2])
 
+    def process_status_event(self, event: Event):
+        """"""
+        data = event.data
+
+        text = (
+            f"队列长度：{data['queue_size']}    "
+            f"批次数量：{data['batch_size']}    "
+            f"写入延迟：{data['write_lag']:.3f}秒    "
+            f"失败次数：{data['fail_count']}    "
+            f"丢弃数量：{data['drop_count']}"
+        )
+        self.status_label.setText(text)
+
     def add_bar_recording(self):
         """"""
         vt_symbol = self.symbol_line.text()
@@ -132,6 +132,9 @@ class ElectronicEyeAlgo:
     def on_underlying_tick(self, tick: TickData) -> None:
         """"""
         if self.pricing_active:
+            # Greeks of dirty options are recalculated lazily, through
+            # portfolio so that its pos greeks are updated as well
+            self.option.portfolio.update_volatility()
             self.calculate_price()
 
         if self.trading_active:
@@ -260,9 +263,14 @@ class ElectronicEyeAlgo:
         """"""
         option = self.option
 
-        # Get ref price
+        # Get ref price, with smoothed market impv if pricing impv not set
         self.pricing_impv = option.pricing_impv
-        ref_price = option.calculate_ref_price()
+
+        curve = option.chain.curve
+        if not self.pricing_impv and curve:
+            self.pricing_impv = curve.get_impv(option.strike_price)
+
+        ref_price = option.calculate_ref_price(self.pricing_impv)
         self.ref_price = round_to(ref_price, self.pricetick)
 
         # Calculate spread
@@ -1,12 +1,14 @@
-from datetime import datetime, timedelta
-from typing import Dict, List, Callable
+from datetime import datetime
+from typing import Dict, List, Set, Callable
 from types import ModuleType
 
+import numpy as np
+
 from vnpy.trader.object import ContractData, TickData, TradeData
 from vnpy.trader.constant import Exchange, OptionType, Direction, Offset
 from vnpy.trader.converter import PositionHolding
 
-from .time import calculate_days_to_expiry, ANNUAL_DAYS
+from .time import TradingCalendar, get_calendar
 
 
 APP_NAME = "OptionMaster"
@@ -16,6 +18,7 @@ EVENT_OPTION_ALGO_PRICING = "eOptionAlgoPricing"
 EVENT_OPTION_ALGO_TRADING = "eOptionAlgoTrading"
 EVENT_OPTION_ALGO_STATUS = "eOptionAlgoStatus"
 EVENT_OPTION_ALGO_LOG = "eOptionAlgoLog"
+EVENT_OPTION_SCENARIO = "eOptionScenario"
 
 
 CHAIN_UNDERLYING_MAP = {
@@ -122,10 +125,10 @@ class OptionData(InstrumentData):
             self.option_type = -1
 
         self.option_expiry: datetime = contract.option_expiry
-        self.days_to_expiry: int = calculate_days_to_expiry(
-            contract.option_expiry
-        )
-        self.time_to_expiry: float = self.days_to_expiry / ANNUAL_DAYS
+        self.calendar: TradingCalendar = get_calendar(contract.exchange)
+        self.days_to_expiry: int = 0
+        self.time_to_expiry: float = 0
+        self.update_time_to_expiry()
 
         self.interest_rate: float = 0
         self.inverse: bool = False
@@ -237,8 +240,11 @@ class OptionData(InstrumentData):
         self.pos_theta = self.cash_theta * self.net_pos
         self.pos_vega = self.cash_vega * self.net_pos
 
-    def calculate_ref_price(self) -> float:
-        """"""
+    def calculate_ref_price(self, pricing_impv: float = 0) -> float:
+        """
+        Calculate reference price with pricing impv, or with the given
+        impv if not zero.
+        """
         underlying_price = self.underlying.mid_price
         underlying_price += self.underlying_adjustment
 
@@ -247,7 +253,7 @@ class OptionData(InstrumentData):
             self.strike_price,
             self.interest_rate,
             self.time_to_expiry,
-            self.pricing_impv,
+            pricing_impv or self.pricing_impv,
             self.option_type
         )
 
@@ -257,16 +263,24 @@ class OptionData(InstrumentData):
 
         return ref_price
 
+    def update_time_to_expiry(self) -> None:
+        """"""
+        current_dt = datetime.now()
+
+        self.days_to_expiry = self.calendar.calculate_days_to_expiry(
+            self.option_expiry, current_dt
+        )
+        self.time_to_expiry = self.calendar.calculate_time_to_expiry(
+            self.option_expiry, current_dt
+        )
+
     def update_tick(self, tick: TickData) -> None:
         """"""
         super().update_tick(tick)
 
-        if self.inverse:
-            current_dt = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            self.days_to_expiry = self.option_expiry - current_dt
-            self.time_to_expiry = self.days_to_expiry / timedelta(365)
-
-        self.calculate_option_impv()
+        # Impv solved later together with other dirty options of chain
+        if not self.chain or not self.chain.vector_model:
+            self.calculate_option_impv()
 
     def update_trade(self, trade: TradeData) -> None:
         """"""
@@ -372,6 +386,13 @@ class ChainData:
         self.days_to_expiry: int = 0
         self.inverse: bool = False
 
+        # Pricing model working on arrays for whole chain
+        self.vector_model: ModuleType = None
+
+        # Options with new tick data since last volatility update
+        self.dirty: Set[str] = set()
+        self.curve: VolatilityCurve = None
+
     def add_option(self, option: OptionData) -> None:
         """"""
         self.options[option.vt_symbol] = option
@@ -425,15 +446,178 @@ class ChainData:
         option = self.options[tick.vt_symbol]
         option.update_tick(tick)
 
+        self.dirty.add(option.vt_symbol)
+
     def update_underlying_tick(self) -> None:
         """"""
         self.calculate_underlying_adjustment()
 
+        self.dirty.update(self.options)
+
+        # Greeks recalculated lazily by update_volatility
+        if self.vector_model:
+            return
+
         for option in self.options.values():
             option.update_underlying_tick(self.underlying_adjustment)
 
         self.calculate_pos_greeks()
 
+    def update_volatility(self) -> bool:
+        """
+        Recalculate options marked dirty since last update and refresh
+        volatility curve of chain. Return False if nothing changed.
+        """
+        if not self.dirty:
+            return False
+
+        dirty = self.dirty
+        self.dirty = set()
+
+        if self.vector_model:
+            options = [
+                option for vt_symbol, option in self.options.items()
+                if vt_symbol in dirty
+            ]
+            self.calculate_chain_greeks(options)
+
+        self.update_curve()
+        return True
+
+    def update_curve(self) -> None:
+        """"""
+        strikes = []
+        call_impvs = []
+        put_impvs = []
+
+        for index in self.indexes:
+            call = self.calls.get(index, None)
+            put = self.puts.get(index, None)
+
+            strikes.append((call or put).strike_price)
+            call_impvs.append(call.mid_impv if call else 0)
+            put_impvs.append(put.mid_impv if put else 0)
+
+        option = next(iter(self.options.values()))
+
+        self.curve = VolatilityCurve(
+            self.chain_symbol,
+            option.time_to_expiry,
+            strikes,
+            call_impvs,
+            put_impvs,
+            self.atm_price
+        )
+
+    def calculate_chain_greeks(self, options: List[OptionData]) -> None:
+        """
+        Calculate impv and greeks of options with vector pricing model,
+        then update option data and pos greeks of chain from the arrays.
+        Last impv of each option is used as initial guess of solver.
+        """
+        for option in options:
+            option.underlying_adjustment = self.underlying_adjustment
+
+        underlying_price = self.underlying.mid_price
+        if not options or not underlying_price:
+            for option in options:
+                option.calculate_pos_greeks()
+            self.calculate_pos_greeks()
+            return
+        underlying_price += self.underlying_adjustment
+
+        strike = np.array([option.strike_price for option in options])
+        option_type = np.array([option.option_type for option in options])
+        size = np.array([option.size for option in options])
+        interest_rate = np.array([option.interest_rate for option in options])
+        time_to_expiry = np.array([option.time_to_expiry for option in options])
+
+        # Implied volatility of ask and bid price solved together
+        tick_ix = [i for i, option in enumerate(options) if option.tick]
+
+        if tick_ix:
+            ask_price = np.array([options[i].tick.ask_price_1 for i in tick_ix])
+            bid_price = np.array([options[i].tick.bid_price_1 for i in tick_ix])
+
+            # Adjustment for crypto inverse option contract
+            if self.inverse:
+                ask_price *= underlying_price
+                bid_price *= underlying_price
+
+            ask_guess = [options[i].ask_impv for i in tick_ix]
+            bid_guess = [options[i].bid_impv for i in tick_ix]
+
+            ix = np.tile(tick_ix, 2)
+            impv = self.vector_model.calculate_impv(
+                np.concatenate([ask_price, bid_price]),
+                underlying_price,
+                strike[ix],
+                interest_rate[ix],
+                time_to_expiry[ix],
+                option_type[ix],
+                v=np.array(ask_guess + bid_guess)
+            )
+
+            count = len(tick_ix)
+            ask_impv = impv[:count]
+            bid_impv = impv[count:]
+            mid_impv = (ask_impv + bid_impv) / 2
+
+            for i, ask, bid, mid in zip(
+                tick_ix,
+                ask_impv.tolist(),
+                bid_impv.tolist(),
+                mid_impv.tolist()
+            ):
+                option = options[i]
+                option.ask_impv = ask
+                option.bid_impv = bid
+                option.mid_impv = mid
+
+        # Greeks of options with impv
+        greeks_ix = [i for i, option in enumerate(options) if option.mid_impv]
+
+        if greeks_ix:
+            price, delta, gamma, theta, vega = self.vector_model.calculate_greeks(
+                underlying_price,
+                strike[greeks_ix],
+                interest_rate[greeks_ix],
+                time_to_expiry[greeks_ix],
+                np.array([options[i].mid_impv for i in greeks_ix]),
+                option_type[greeks_ix]
+            )
+
+            cash_greeks = np.array([delta, gamma, theta, vega]) * size[greeks_ix]
+
+            # Adjustment for crypto inverse option contract
+            if self.inverse:
+                cash_greeks /= underlying_price
+
+            for i, (cash_delta, cash_gamma, cash_theta, cash_vega) in zip(
+                greeks_ix,
+                cash_greeks.T.tolist()
+            ):
+                option = options[i]
+                option.cash_delta = cash_delta
+                option.cash_gamma = cash_gamma
+                option.cash_theta = cash_theta
+                option.cash_vega = cash_vega
+
+        # Pos greeks of options and chain
+        for option in options:
+            option.calculate_pos_greeks()
+
+        self.calculate_pos_greeks()
+
+    def update_time_to_expiry(self) -> None:
+        """
+        Update time to expiry of options, which decays during trading
+        sessions. Options are recalculated with next tick.
+        """
+        for option in self.options.values():
+            option.update_time_to_expiry()
+            self.days_to_expiry = option.days_to_expiry
+
     def update_trade(self, trade: TradeData) -> None:
         """"""
         option = self.options[trade.vt_symbol]
@@ -474,8 +658,14 @@ class ChainData:
         for option in self.options.values():
             option.set_interest_rate(interest_rate)
 
-    def set_pricing_model(self, pricing_model: ModuleType) -> None:
+    def set_pricing_model(
+        self,
+        pricing_model: ModuleType,
+        vector_model: ModuleType = None
+    ) -> None:
         """"""
+        self.vector_model = vector_model
+
         for option in self.options.values():
             option.set_pricing_model(pricing_model)
 
@@ -530,6 +720,84 @@ class ChainData:
         self.underlying_adjustment = synthetic_price - self.underlying.mid_price
 
 
+class VolatilityCurve:
+    """
+    Snapshot of chain implied volatility by strike price. A new object
+    is created on every update, so it can be read from other threads.
+    """
+
+    def __init__(
+        self,
+        chain_symbol: str,
+        time_to_expiry: float,
+        strikes: List[float],
+        call_impvs: List[float],
+        put_impvs: List[float],
+        atm_price: float
+    ):
+        """"""
+        self.chain_symbol: str = chain_symbol
+        self.time_to_expiry: float = time_to_expiry
+
+        self.strikes: np.ndarray = np.array(strikes, dtype=float)
+        self.call_impvs: np.ndarray = np.array(call_impvs, dtype=float)
+        self.put_impvs: np.ndarray = np.array(put_impvs, dtype=float)
+
+        # Use out of money side, and the other side if not solved
+        otm_call = self.strikes >= atm_price
+        otm_impvs = np.where(otm_call, self.call_impvs, self.put_impvs)
+        itm_impvs = np.where(otm_call, self.put_impvs, self.call_impvs)
+        self.otm_impvs: np.ndarray = np.where(otm_impvs > 0, otm_impvs, itm_impvs)
+
+        self.smooth_impvs: np.ndarray = smooth_impv(self.strikes, self.otm_impvs)
+
+    def get_impv(self, strike: float) -> float:
+        """
+        Get smoothed impv of strike price, interpolated between strikes.
+        """
+        if not self.smooth_impvs.any():
+            return 0
+
+        return float(np.interp(strike, self.strikes, self.smooth_impvs))
+
+
+class VolatilitySurface:
+    """
+    Smoothed impv of all chains in portfolio, on a grid of strike price
+    and expiry. Points outside strike range of a chain are nan.
+    """
+
+    def __init__(self, curves: List[VolatilityCurve]):
+        """"""
+        curves = sorted(curves, key=lambda curve: curve.time_to_expiry)
+
+        self.curves: Dict[str, VolatilityCurve] = {
+            curve.chain_symbol: curve for curve in curves
+        }
+        self.chain_symbols: List[str] = list(self.curves)
+        self.time_to_expiry: np.ndarray = np.array(
+            [curve.time_to_expiry for curve in curves]
+        )
+
+        if curves:
+            self.strikes: np.ndarray = np.unique(
+                np.concatenate([curve.strikes for curve in curves])
+            )
+        else:
+            self.strikes: np.ndarray = np.array([])
+
+        self.impvs: np.ndarray = np.full((len(curves), len(self.strikes)), np.nan)
+        for i, curve in enumerate(curves):
+            if curve.smooth_impvs.any():
+                self.impvs[i] = np.interp(
+                    self.strikes,
+                    curve.strikes,
+                    curve.smooth_impvs,
+                    left=np.nan,
+                    right=np.nan
+                )
+
+
 class PortfolioData:
 
     def __init__(self, name: str):
@@ -607,15 +875,43 @@ class PortfolioData:
             underlying.update_trade(trade)
             self.calculate_pos_greeks()
 
+    def update_volatility(self) -> None:
+        """
+        Recalculate dirty options of all chains, coalescing ticks
+        received since last call.
+        """
+        changed = False
+
+        for chain in self.chains.values():
+            if chain.update_volatility():
+                changed = True
+
+        if changed:
+            self.calculate_pos_greeks()
+
+    def update_time_to_expiry(self) -> None:
+        """"""
+        for chain in self.chains.values():
+            chain.update_time_to_expiry()
+
+    def get_volatility_surface(self) -> VolatilitySurface:
+        """"""
+        curves = [chain.curve for chain in self.chains.values() if chain.curve]
+        return VolatilitySurface(curves)
+
     def set_interest_rate(self, interest_rate: float) -> None:
         """"""
         for chain in self.chains.values():
             chain.set_interest_rate(interest_rate)
 
-    def set_pricing_model(self, pricing_model: ModuleType) -> None:
+    def set_pricing_model(
+        self,
+        pricing_model: ModuleType,
+        vector_model: ModuleType = None
+    ) -> None:
         """"""
         for chain in self.chains.values():
-            chain.set_pricing_model(pricing_model)
+            chain.set_pricing_model(pricing_model, vector_model)
 
     def set_inverse(self, inverse: bool) -> None:
         """"""
@@ -670,3 +966,22 @@ class PortfolioData:
         """"""
         for chain in self.chains.values():
             chain.calculate_atm_price()
+
+
+def smooth_impv(strikes: np.ndarray, impvs: np.ndarray, window: int = 3) -> np.ndarray:
+    """
+    Smooth solved impv (not zero) with moving average of window size,
+    and fill strikes not solved by linear interpolation.
+    """
+    valid = impvs > 0
+    if not valid.any():
+        return np.zeros(len(strikes))
+
+    x = strikes[valid]
+    y = impvs[valid]
+
+    if len(y) >= window:
+        padded = np.pad(y, window // 2, mode="edge")
+        y = np.convolve(padded, np.ones(window) / window, mode="valid")
+
+    return np.interp(strikes, x, y)
@@ -3,6 +3,8 @@
 from typing import Dict, List, Set
 from copy import copy
 from collections import defaultdict
+from threading import Thread
+import traceback
 
 from vnpy.trader.object import (
     LogData, ContractData, TickData,
@@ -26,8 +28,10 @@ from .base import (
     EVENT_OPTION_NEW_PORTFOLIO,
     EVENT_OPTION_ALGO_PRICING, EVENT_OPTION_ALGO_TRADING,
     EVENT_OPTION_ALGO_STATUS, EVENT_OPTION_ALGO_LOG,
+    EVENT_OPTION_SCENARIO,
     InstrumentData, PortfolioData
 )
+from .scenario import calculate_scenario
 try:
     from .pricing import black_76_cython as black_76
     from .pricing import binomial_tree_cython as binomial_tree
@@ -37,6 +41,9 @@ except ImportError:
         black_76, binomial_tree, black_scholes
     )
     print("Faile to import cython option pricing model, please rebuild with cython in cmd.")
+from .pricing import (
+    black_76_numpy, binomial_tree_numpy, black_scholes_numpy
+)
 from .algo import ElectronicEyeAlgo
 
 
@@ -46,6 +53,13 @@ PRICING_MODELS = {
     "二叉树 美式期货期权": binomial_tree
 }
 
+# Models for calculating whole option chain with numpy arrays
+VECTOR_PRICING_MODELS = {
+    "Black-76 欧式期货期权": black_76_numpy,
+    "Black-Scholes 欧式股票期权": black_scholes_numpy,
+    "二叉树 美式期货期权": binomial_tree_numpy
+}
+
 
 class OptionEngine(BaseEngine):
     """"""
@@ -64,6 +78,8 @@ class OptionEngine(BaseEngine):
         self.timer_count: int = 0
         self.timer_trigger: int = 60
 
+        self.scenario_thread: Thread = None
+
         self.offset_converter: OffsetConverter = OffsetConverter(main_engine)
         self.get_position_holding = self.offset_converter.get_position_holding
 
@@ -158,6 +174,11 @@ class OptionEngine(BaseEngine):
         self.event_engine.register(EVENT_POSITION, self.process_position_event)
         self.event_engine.register(EVENT_TIMER, self.process_timer_event)
 
+        # Volatility recalculated once for each burst of ticks, or only
+        # on timer if event engine does not support batch handler
+        if hasattr(self.event_engine, "register_batch"):
+            self.event_engine.register_batch(EVENT_TICK, self.process_tick_batch)
+
     def process_tick_event(self, event: Event) -> None:
         """"""
         tick: TickData = event.data
@@ -172,6 +193,19 @@ class OptionEngine(BaseEngine):
 
         portfolio.update_tick(tick)
 
+    def process_tick_batch(self, events: List[Event]) -> None:
+        """"""
+        portfolios: Dict[str, PortfolioData] = {}
+
+        for event in events:
+            instrument = self.instruments.get(event.data.vt_symbol, None)
+            if instrument and instrument.portfolio:
+                portfolio = instrument.portfolio
+                portfolios[portfolio.name] = portfolio
+
+        for portfolio in portfolios.values():
+            portfolio.update_volatility()
+
     def process_order_event(self, event: Event) -> None:
         """"""
         order: OrderData = event.data
@@ -212,6 +246,9 @@ class OptionEngine(BaseEngine):
 
     def process_timer_event(self, event: Event) -> None:
         """"""
+        for portfolio in self.active_portfolios.values():
+            portfolio.update_volatility()
+
         self.timer_count += 1
         if self.timer_count < self.timer_trigger:
             return
@@ -219,6 +256,7 @@ class OptionEngine(BaseEngine):
 
         for portfolio in self.active_portfolios.values():
             portfolio.calculate_atm_price()
+            portfolio.update_time_to_expiry()
 
     def get_portfolio(self, portfolio_name: str) -> PortfolioData:
         """"""
@@ -257,7 +295,8 @@ class OptionEngine(BaseEngine):
         portfolio.set_interest_rate(interest_rate)
 
         pricing_model = PRICING_MODELS[model_name]
-        portfolio.set_pricing_model(pricing_model)
+        vector_model = VECTOR_PRICING_MODELS[model_name]
+        portfolio.set_pricing_model(pricing_model, vector_model)
         portfolio.set_inverse(inverse)
         portfolio.set_precision(precision)
 
@@ -342,6 +381,64 @@ class OptionEngine(BaseEngine):
         """"""
         self.timer_trigger = timer_trigger
 
+    def start_scenario_analysis(
+        self,
+        portfolio_name: str,
+        price_changes: List[float],
+        impv_changes: List[float],
+        time_changes: List[float]
+    ) -> bool:
+        """
+        Start scenario analysis in background thread, ScenarioResult is
+        put with EVENT_OPTION_SCENARIO when finished.
+        """
+        if self.scenario_thread:
+            return False
+
+        portfolio = self.get_portfolio(portfolio_name)
+
+        self.scenario_thread = Thread(
+            target=self.run_scenario_analysis,
+            args=(portfolio, price_changes, impv_changes, time_changes),
+            daemon=True
+        )
+        self.scenario_thread.start()
+
+        return True
+
+    def run_scenario_analysis(
+        self,
+        portfolio: PortfolioData,
+        price_changes: List[float],
+        impv_changes: List[float],
+        time_changes: List[float]
+    ) -> None:
+        """"""
+        try:
+            result = calculate_scenario(
+                portfolio,
+                price_changes,
+                impv_changes,
+                time_changes
+            )
+        except Exception:
+            msg = f"情景分析失败，触发异常：\n{traceback.format_exc()}"
+            self.main_engine.write_log(msg, APP_NAME)
+
+            self.scenario_thread = None
+            return
+
+        # Clear thread object handler.
+        self.scenario_thread = None
+
+        if result.skipped_symbols:
+            symbols = "，".join(result.skipped_symbols)
+            msg = f"情景分析忽略了隐含波动率未计算的期权：{symbols}"
+            self.main_engine.write_log(msg, APP_NAME)
+
+        event = Event(EVENT_OPTION_SCENARIO, result)
+        self.event_engine.put(event)
+
 
 class OptionHedgeEngine:
     """"""
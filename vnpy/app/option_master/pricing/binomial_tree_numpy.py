@@ -0,0 +1,240 @@
+"""
+Binomial tree model working on numpy arrays, for pricing a whole option
+chain. Backward induction runs on all options together, keeping only
+one 1-D array of node values per option at each step.
+
+All functions take arrays (or scalars broadcast to arrays) with the same
+meaning as binomial_tree module.
+"""
+
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+from numpy import ndarray
+
+from .solver import solve_impv
+
+
+DEFAULT_STEP = 15
+
+
+@lru_cache(maxsize=64)
+def get_lattice(n: int, dt: float) -> ndarray:
+    """
+    Get log move of underlying price in unit of volatility at expiry
+    nodes, node j is sqrt(dt) * (n - 2j). Lattice geometry only depends
+    on step count and time slice, so it is cached for options of same
+    expiry.
+    """
+    lattice = np.sqrt(dt) * np.arange(n, -n - 1, -2, dtype=float)
+    lattice.setflags(write=False)
+    return lattice
+
+
+def induce_tree(
+    f: ndarray,
+    k: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray,
+    n: int
+) -> Tuple[ndarray, ndarray, ndarray, ndarray, ndarray]:
+    """
+    Run backward induction of American option binomial trees. Return
+    option price, and option and underlying values of nodes at step 1
+    and step 2 which are needed for greeks.
+    """
+    f, k, t, v, cp = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(value, dtype=float)) for value in (f, k, t, v, cp)]
+    )
+
+    dt = t / n
+
+    # Lattice geometry shared by all options if time slice is the same
+    if dt.size and (dt == dt[0]).all():
+        lattice = get_lattice(n, float(dt[0]))[None, :]
+    else:
+        lattice = np.sqrt(dt)[:, None] * np.arange(n, -n - 1, -2)[None, :]
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        u = np.exp(v * np.sqrt(dt))
+        d = 1 / u
+        a = 1
+
+        # Calculate risk neutral probability
+        p = (a - d) / (u - d)
+        p1 = (p / a)[:, None]
+        p2 = ((1 - p) / a)[:, None]
+
+        d = d[:, None]
+        k = k[:, None]
+        cp = cp[:, None]
+
+        # Option value at expiry
+        underlying = f[:, None] * np.exp(v[:, None] * lattice)
+        option = np.maximum(0, cp * (underlying - k))
+
+        # Node j of previous step is node j of current step moving down
+        option_1 = underlying_1 = option_2 = underlying_2 = None
+
+        for i in range(n - 1, -1, -1):
+            underlying = underlying[:, :-1] * d
+            option = np.maximum(
+                p1 * option[:, :-1] + p2 * option[:, 1:],
+                cp * (underlying - k)
+            )
+
+            if i == 2:
+                option_2, underlying_2 = option, underlying
+            elif i == 1:
+                option_1, underlying_1 = option, underlying
+
+    return option[:, 0], option_1, underlying_1, option_2, underlying_2
+
+
+def induce_bumped_tree(
+    f: ndarray,
+    k: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray,
+    n: int
+) -> Tuple[Tuple[ndarray, ...], ndarray]:
+    """
+    Induce trees of original and bumped volatility together in one
+    batch. Return result of original trees and price of bumped trees.
+    """
+    f, k, t, v, cp = np.broadcast_arrays(
+        *[np.atleast_1d(np.asarray(value, dtype=float)) for value in (f, k, t, v, cp)]
+    )
+    size = len(v)
+
+    result = induce_tree(
+        np.tile(f, 2),
+        np.tile(k, 2),
+        np.tile(t, 2),
+        np.concatenate([v, v * 1.001]),
+        np.tile(cp, 2),
+        n
+    )
+
+    original = tuple(data[:size] for data in result)
+    return original, result[0][size:]
+
+
+def calculate_price(
+    f: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray,
+    n: int = DEFAULT_STEP
+) -> ndarray:
+    """Calculate option price"""
+    return induce_tree(f, k, t, v, cp, n)[0]
+
+
+def calculate_price_vega(
+    f: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray,
+    n: int = DEFAULT_STEP
+) -> Tuple[ndarray, ndarray]:
+    """Calculate option price and original vega"""
+    original, price_bump = induce_bumped_tree(f, k, t, v, cp, n)
+    price = original[0]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vega = (price_bump - price) / (np.asarray(v) * 0.001)
+
+    return price, vega
+
+
+def calculate_original_vega(
+    f: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray,
+    n: int = DEFAULT_STEP
+) -> ndarray:
+    """Calculate option vega"""
+    return calculate_price_vega(f, k, r, t, v, cp, n)[1]
+
+
+def calculate_greeks(
+    f: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray,
+    n: int = DEFAULT_STEP,
+    annual_days: int = 240
+) -> Tuple[ndarray, ndarray, ndarray, ndarray, ndarray]:
+    """
+    Calculate option price and greeks. Delta, gamma and theta are read
+    from nodes of the same tree, only vega needs the bumped tree.
+    """
+    original, price_bump = induce_bumped_tree(f, k, t, v, cp, n)
+    price, option_1, underlying_1, option_2, underlying_2 = original
+
+    f = np.asarray(f, dtype=float)
+    v = np.asarray(v, dtype=float)
+    dt = np.asarray(t, dtype=float) / n
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Delta
+        option_price_change = option_1[:, 0] - option_1[:, 1]
+        underlying_price_change = underlying_1[:, 0] - underlying_1[:, 1]
+        _delta = option_price_change / underlying_price_change
+        delta = _delta * f * 0.01
+
+        # Gamma
+        gamma_delta_1 = (option_2[:, 0] - option_2[:, 1]) / \
+            (underlying_2[:, 0] - underlying_2[:, 1])
+        gamma_delta_2 = (option_2[:, 1] - option_2[:, 2]) / \
+            (underlying_2[:, 1] - underlying_2[:, 2])
+        _gamma = (gamma_delta_1 - gamma_delta_2) / \
+            (0.5 * (underlying_2[:, 0] - underlying_2[:, 2]))
+        gamma = _gamma * f ** 2 * 0.0001
+
+        # Theta
+        theta = (option_2[:, 1] - price) / (2 * dt * annual_days)
+
+        # Vega
+        vega = (price_bump - price) / (0.001 * v * 100)
+
+    return price, delta, gamma, theta, vega
+
+
+def calculate_impv(
+    price: ndarray,
+    f: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    cp: ndarray,
+    n: int = DEFAULT_STEP,
+    v: ndarray = None
+) -> ndarray:
+    """
+    Calculate option implied volatility, with v as initial guess if given.
+    """
+    price, f, k, r, t, cp = np.broadcast_arrays(
+        *[np.asarray(value, dtype=float) for value in (price, f, k, r, t, cp)]
+    )
+
+    # Option price must be positive and meet minimum value (exercise value)
+    valid = (price > 0) & np.where(cp == 1, price > (f - k), price > (k - f))
+
+    def evaluate(v_ix: ndarray, ix: ndarray) -> Tuple[ndarray, ndarray]:
+        return calculate_price_vega(f[ix], k[ix], r[ix], t[ix], v_ix, cp[ix], n)
+
+    return solve_impv(price, valid, evaluate, v)
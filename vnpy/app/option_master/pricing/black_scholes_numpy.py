@@ -0,0 +1,142 @@
+"""
+Black-Scholes model working on numpy arrays, for pricing a whole option chain.
+
+All functions take arrays (or scalars broadcast to arrays) with the same
+meaning as black_scholes module.
+"""
+
+from typing import Tuple
+
+import numpy as np
+from numpy import ndarray
+from scipy.special import ndtr
+
+from .solver import solve_impv
+
+cdf = ndtr
+SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def pdf(x: ndarray) -> ndarray:
+    """Standard normal probability density"""
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+
+def calculate_d1(
+    s: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray
+) -> ndarray:
+    """Calculate option D1 value"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        d1: ndarray = (np.log(s / k) + (r + 0.5 * v ** 2) * t) / (v * np.sqrt(t))
+    return d1
+
+
+def calculate_price(
+    s: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray,
+    d1: ndarray = None
+) -> ndarray:
+    """Calculate option price"""
+    if d1 is None:
+        d1 = calculate_d1(s, k, r, t, v)
+    d2: ndarray = d1 - v * np.sqrt(t)
+
+    price: ndarray = cp * (s * cdf(cp * d1) - k * cdf(cp * d2) * np.exp(-r * t))
+
+    # Return option space value if volatility not positive
+    return np.where(v > 0, price, np.maximum(0, cp * (s - k)))
+
+
+def calculate_original_vega(
+    s: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray,
+    d1: ndarray = None
+) -> ndarray:
+    """Calculate option vega"""
+    if d1 is None:
+        d1 = calculate_d1(s, k, r, t, v)
+
+    vega: ndarray = s * pdf(d1) * np.sqrt(t)
+    return np.where(v > 0, vega, 0)
+
+
+def calculate_greeks(
+    s: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    v: ndarray,
+    cp: ndarray,
+    annual_days: int = 240
+) -> Tuple[ndarray, ndarray, ndarray, ndarray, ndarray]:
+    """Calculate option price and greeks"""
+    d1: ndarray = calculate_d1(s, k, r, t, v)
+    d2: ndarray = d1 - v * np.sqrt(t)
+    discount: ndarray = np.exp(-r * t)
+    valid: ndarray = v > 0
+
+    price: ndarray = calculate_price(s, k, r, t, v, cp, d1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        _delta: ndarray = cp * cdf(cp * d1)
+        delta: ndarray = _delta * s * 0.01
+
+        _gamma: ndarray = pdf(d1) / (s * v * np.sqrt(t))
+        gamma: ndarray = _gamma * s ** 2 * 0.0001
+
+        _theta: ndarray = -s * pdf(d1) * v / (2 * np.sqrt(t)) \
+            - cp * r * k * discount * cdf(cp * d2)
+        theta: ndarray = _theta / annual_days
+
+    vega: ndarray = calculate_original_vega(s, k, r, t, v, d1) / 100
+
+    delta = np.where(valid, delta, 0)
+    gamma = np.where(valid, gamma, 0)
+    theta = np.where(valid, theta, 0)
+
+    return price, delta, gamma, theta, vega
+
+
+def calculate_impv(
+    price: ndarray,
+    s: ndarray,
+    k: ndarray,
+    r: ndarray,
+    t: ndarray,
+    cp: ndarray,
+    v: ndarray = None
+) -> ndarray:
+    """
+    Calculate option implied volatility, with v as initial guess if given.
+    """
+    price, s, k, r, t, cp = np.broadcast_arrays(
+        *[np.asarray(value, dtype=float) for value in (price, s, k, r, t, cp)]
+    )
+
+    # Option price must be positive and meet minimum value (exercise value)
+    with np.errstate(invalid="ignore"):
+        discount = np.exp(-r * t)
+        valid = (price > 0) & np.where(
+            cp == 1,
+            price > (s - k) * discount,
+            price > k * discount - s
+        )
+
+    def evaluate(v_ix: ndarray, ix: ndarray) -> Tuple[ndarray, ndarray]:
+        d1 = calculate_d1(s[ix], k[ix], r[ix], t[ix], v_ix)
+        p = calculate_price(s[ix], k[ix], r[ix], t[ix], v_ix, cp[ix], d1)
+        vega = calculate_original_vega(s[ix], k[ix], r[ix], t[ix], v_ix, d1)
+        return p, vega
+
+    return solve_impv(price, valid, evaluate, v)
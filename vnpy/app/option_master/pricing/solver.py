@@ -0,0 +1,90 @@
+"""
+Vectorized implied volatility solver shared by numpy pricing models.
+"""
+
+from typing import Callable, Tuple
+
+import numpy as np
+from numpy import ndarray
+
+
+MIN_VOLATILITY = 0.0
+MAX_VOLATILITY = 10.0
+DEFAULT_TOLERANCE = 0.00001
+DEFAULT_MAX_ITERATION = 100
+
+
+def solve_impv(
+    price: ndarray,
+    valid: ndarray,
+    evaluate: Callable[[ndarray, ndarray], Tuple[ndarray, ndarray]],
+    v: ndarray = None,
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_iteration: int = DEFAULT_MAX_ITERATION
+) -> ndarray:
+    """
+    Solve implied volatility of all valid options at once.
+
+    Evaluate function receives volatility and index of options to be
+    solved, and returns their option price and original vega.
+
+    Newton step is taken when it stays inside the bracket of volatility
+    known to contain the solution, otherwise bisection is used, so that
+    deep out of money options with tiny vega still converge. Options not
+    valid or not converged get 0.
+    """
+    size = len(price)
+
+    if v is None:
+        v = np.full(size, 0.01)
+    else:
+        v = np.array(v, dtype=float)
+        v[(v <= MIN_VOLATILITY) | (v >= MAX_VOLATILITY) | ~np.isfinite(v)] = 0.01
+
+    lower = np.full(size, MIN_VOLATILITY)
+    upper = np.full(size, MAX_VOLATILITY)
+    converged = np.zeros(size, dtype=bool)
+
+    ix = np.flatnonzero(valid)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(max_iteration):
+            if not len(ix):
+                break
+
+            v_ix = v[ix]
+            lower_ix = lower[ix]
+            upper_ix = upper[ix]
+
+            p, vega = evaluate(v_ix, ix)
+            diff = p - price[ix]
+
+            # Option price increases with volatility
+            higher = diff > 0
+            upper_ix = np.where(higher, v_ix, upper_ix)
+            lower_ix = np.where(higher, lower_ix, v_ix)
+
+            new_v = v_ix - diff / vega
+
+            bisect = (
+                ~np.isfinite(new_v)
+                | (vega <= 0)
+                | (new_v <= lower_ix)
+                | (new_v >= upper_ix)
+            )
+            new_v = np.where(bisect, (lower_ix + upper_ix) / 2, new_v)
+
+            done = np.abs(new_v - v_ix) < tolerance
+
+            v[ix] = new_v
+            lower[ix] = lower_ix
+            upper[ix] = upper_ix
+            converged[ix[done]] = True
+
+            ix = ix[~done]
+
+    # Solution at bound of bracket means no volatility matches the price
+    converged &= (v > MIN_VOLATILITY + tolerance) & (v < MAX_VOLATILITY - tolerance)
+
+    impv = np.where(converged, v, 0)
+    return np.round(impv, 4)
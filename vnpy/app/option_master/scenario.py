@@ -0,0 +1,158 @@
+"""
+Scenario analysis of option portfolio over a grid of underlying price,
+implied volatility and time changes. Greeks of all positions on the
+whole grid are calculated with broadcasting arrays.
+"""
+
+from typing import Callable, Dict, List
+
+import numpy as np
+from numpy import ndarray
+
+from .base import PortfolioData, OptionData
+from .time import MIN_DAYS_TO_EXPIRY
+
+
+class ScenarioResult:
+    """
+    Cube of portfolio pnl and cash greeks, with shape of
+    (time changes, impv changes, price changes).
+    """
+
+    def __init__(
+        self,
+        portfolio_name: str,
+        price_changes: ndarray,
+        impv_changes: ndarray,
+        time_changes: ndarray
+    ):
+        """"""
+        self.portfolio_name: str = portfolio_name
+
+        self.price_changes: ndarray = price_changes
+        self.impv_changes: ndarray = impv_changes
+        self.time_changes: ndarray = time_changes
+
+        shape = (len(time_changes), len(impv_changes), len(price_changes))
+        self.pnl: ndarray = np.zeros(shape)
+        self.delta: ndarray = np.zeros(shape)
+        self.gamma: ndarray = np.zeros(shape)
+        self.theta: ndarray = np.zeros(shape)
+        self.vega: ndarray = np.zeros(shape)
+
+        # Options with position but implied volatility not calculated yet,
+        # which are not included in the result
+        self.skipped_symbols: List[str] = []
+
+    def get_data(self, name: str) -> ndarray:
+        """
+        Get cube by name: pnl, delta, gamma, theta or vega.
+        """
+        return getattr(self, name)
+
+
+def calculate_scenario(
+    portfolio: PortfolioData,
+    price_changes: ndarray,
+    impv_changes: ndarray,
+    time_changes: ndarray
+) -> ScenarioResult:
+    """
+    Calculate pnl and greeks of portfolio positions for every scenario.
+    Price and impv changes are ratios, time changes are in trading days.
+    """
+    price_changes = np.asarray(price_changes, dtype=float)
+    impv_changes = np.asarray(impv_changes, dtype=float)
+    time_changes = np.asarray(time_changes, dtype=float)
+
+    result = ScenarioResult(portfolio.name, price_changes, impv_changes, time_changes)
+
+    # Underlying pnl and delta
+    for underlying in portfolio.underlyings.values():
+        if not underlying.net_pos:
+            continue
+
+        value = underlying.mid_price * underlying.net_pos * underlying.size
+        result.pnl += value * price_changes
+        result.delta += value / 100
+
+    # Options with position, grouped by chain for its pricing model
+    chain_options: Dict[str, List[OptionData]] = {}
+    for option in portfolio.options.values():
+        if not option.net_pos or not option.tick:
+            continue
+
+        if not option.mid_impv:
+            result.skipped_symbols.append(option.vt_symbol)
+            continue
+
+        chain_options.setdefault(option.chain.chain_symbol, []).append(option)
+
+    for chain_symbol, options in chain_options.items():
+        calculate_greeks = get_greeks_function(options[0])
+
+        underlying_price = np.array([option.underlying.mid_price for option in options])
+        strike = np.array([option.strike_price for option in options])
+        interest_rate = np.array([option.interest_rate for option in options])
+        time_to_expiry = np.array([option.time_to_expiry for option in options])
+        annual_days = np.array([option.calendar.annual_days for option in options])
+        mid_impv = np.array([option.mid_impv for option in options])
+        option_type = np.array([option.option_type for option in options])
+        last_price = np.array([option.tick.last_price for option in options])
+        multiplier = np.array([option.net_pos * option.size for option in options])
+
+        # Grid of (impv changes, price changes, options) for each time change
+        new_underlying_price = underlying_price * (1 + price_changes[None, :, None])
+        new_mid_impv = mid_impv * (1 + impv_changes[:, None, None])
+        f, v, k, r, cp = np.broadcast_arrays(
+            new_underlying_price,
+            new_mid_impv,
+            strike,
+            interest_rate,
+            option_type
+        )
+        shape = f.shape
+
+        for i, time_change in enumerate(time_changes):
+            new_time_to_expiry = np.maximum(
+                time_to_expiry - time_change / annual_days,
+                MIN_DAYS_TO_EXPIRY / annual_days
+            )
+            t = np.broadcast_to(new_time_to_expiry, shape)
+
+            new_price, delta, gamma, theta, vega = [
+                np.reshape(data, shape) for data in calculate_greeks(
+                    f.ravel(),
+                    k.ravel(),
+                    r.ravel(),
+                    t.ravel(),
+                    v.ravel(),
+                    cp.ravel()
+                )
+            ]
+
+            result.pnl[i] += ((new_price - last_price) * multiplier).sum(axis=2)
+            result.delta[i] += (delta * multiplier).sum(axis=2)
+            result.gamma[i] += (gamma * multiplier).sum(axis=2)
+            result.theta[i] += (theta * multiplier).sum(axis=2)
+            result.vega[i] += (vega * multiplier).sum(axis=2)
+
+    return result
+
+
+def get_greeks_function(option: OptionData) -> Callable:
+    """
+    Get calculate_greeks working on arrays, from vector pricing model of
+    chain, or by vectorizing the scalar model of option.
+    """
+    vector_model = option.chain.vector_model
+    if vector_model:
+        return vector_model.calculate_greeks
+
+    function = np.frompyfunc(option.calculate_greeks, 6, 5)
+
+    def calculate_greeks(*args: ndarray) -> List[ndarray]:
+        """"""
+        return [data.astype(float) for data in function(*args)]
+
+    return calculate_greeks
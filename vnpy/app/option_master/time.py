@@ -1,61 +1,330 @@
-from datetime import datetime, timedelta
+import json
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange
 
 
 ANNUAL_DAYS = 240
 
-# For checking public holidays
-PUBLIC_HOLIDAYS = set([
-    datetime(2020, 1, 1),       # New Year
-
-    datetime(2020, 1, 24),      # Spring Festival
-    datetime(2020, 1, 25),
-    datetime(2020, 1, 26),
-    datetime(2020, 1, 27),
-    datetime(2020, 1, 28),
-    datetime(2020, 1, 29),
-    datetime(2020, 1, 30),
-
-    datetime(2020, 4, 4),       # Qingming Festval
-    datetime(2020, 4, 5),
-    datetime(2020, 4, 6),
-
-    datetime(2020, 5, 1),       # Labour Day
-    datetime(2020, 5, 2),
-    datetime(2020, 5, 3),
-    datetime(2020, 5, 4),
-    datetime(2020, 5, 5),
-
-    datetime(2020, 6, 25),      # Duanwu Festival
-    datetime(2020, 6, 26),
-    datetime(2020, 6, 27),
-
-    datetime(2020, 10, 1),      # National Day
-    datetime(2020, 10, 2),
-    datetime(2020, 10, 3),
-    datetime(2020, 10, 4),
-    datetime(2020, 10, 5),
-    datetime(2020, 10, 6),
-    datetime(2020, 10, 7),
-    datetime(2020, 10, 8),
-])
+# Time to expiry is floored at this many trading days, so that pricing
+# models never see zero time on expiry day or after expiry.
+MIN_DAYS_TO_EXPIRY = 0.01
 
+# Folder of calendar data files shipped with option master
+CALENDAR_FOLDER = Path(__file__).parent.joinpath("calendar")
 
-def calculate_days_to_expiry(option_expiry: datetime) -> int:
-    """"""
-    current_dt = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    days = 1
+# Dates covered by calendar index at least, extended on demand
+INDEX_START = date(2015, 1, 1)
+INDEX_YEARS = 20
+
+DAY_SECONDS = 24 * 3600
+
+
+class TradingCalendar:
+    """
+    Trading days of exchange, indexed by cumulative count of trading days
+    up to each date, so counting days between two dates is a lookup.
+
+    Night sessions start in the evening of a trading day (and may end
+    after midnight), and belong to the next trading day. There is no
+    night session before holidays, only before weekends.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        holidays: List[date],
+        weekmask: str = "1111100",
+        sessions: List[Tuple[str, str]] = None,
+        annual_days: int = ANNUAL_DAYS,
+        night_sessions: List[Tuple[str, str]] = None
+    ):
+        """"""
+        self.name: str = name
+        self.holidays: List[date] = sorted(set(holidays))
+        self.weekmask: str = weekmask
+        self.annual_days: int = annual_days
+
+        # Trading sessions of a day in seconds since midnight
+        if not sessions:
+            sessions = [("00:00", "24:00")]
+        self.sessions: List[Tuple[int, int]] = [
+            (parse_seconds(start), parse_seconds(end)) for start, end in sessions
+        ]
+        self.session_seconds: int = sum(end - start for start, end in self.sessions)
+
+        # Night sessions in seconds since midnight before the next day,
+        # so they are negative until midnight
+        self.night_sessions: List[Tuple[int, int]] = []
+        for start, end in night_sessions or []:
+            start_seconds = parse_seconds(start) - DAY_SECONDS
+            end_seconds = parse_seconds(end)
+            if end_seconds > start_seconds + DAY_SECONDS:
+                end_seconds -= DAY_SECONDS
+            self.night_sessions.append((start_seconds, end_seconds))
+
+        self.night_seconds: int = sum(
+            end - start for start, end in self.night_sessions
+        )
+        self.night_start: int = 0
+        self.night_end: int = 0
+        if self.night_sessions:
+            self.night_start = min(start for start, _ in self.night_sessions)
+            self.night_end = max(end for _, end in self.night_sessions)
+
+        self.start: date = None
+        self.end: date = None
+        self.index: np.ndarray = None
+
+        end = date(INDEX_START.year + INDEX_YEARS, 12, 31)
+        self.build_index(INDEX_START, end)
+
+    def build_index(self, start: date, end: date) -> None:
+        """
+        Build count of trading days from start to each date (inclusive).
+        """
+        dates = np.arange(start, end + timedelta(days=1), dtype="datetime64[D]")
+        trading = np.is_busday(
+            dates,
+            weekmask=self.weekmask,
+            holidays=np.array(self.holidays, dtype="datetime64[D]")
+        )
+
+        self.start = start
+        self.end = end
+        self.index = np.cumsum(trading)
+
+    def check_range(self, start: date, end: date) -> None:
+        """
+        Extend index if dates not covered.
+        """
+        if start < self.start or end > self.end:
+            self.build_index(
+                min(start, self.start) - timedelta(days=366),
+                max(end, self.end) + timedelta(days=366)
+            )
+
+    def is_trading_day(self, d: date) -> bool:
+        """"""
+        return self.count_days(d - timedelta(days=1), d) > 0
+
+    def count_days(self, start: date, end: date) -> int:
+        """
+        Count trading days after start date until end date (inclusive).
+        """
+        self.check_range(min(start, end), max(start, end))
+
+        return int(
+            self.index[(end - self.start).days]
+            - self.index[(start - self.start).days]
+        )
+
+    def get_next_trading_day(self, d: date) -> date:
+        """
+        Get first trading day after date.
+        """
+        self.check_range(d, d + timedelta(days=366))
+
+        count = self.index[(d - self.start).days]
+        n = int(np.searchsorted(self.index, count + 1))
+        return self.start + timedelta(days=n)
+
+    def get_previous_trading_day(self, d: date) -> date:
+        """
+        Get last trading day before date.
+        """
+        self.check_range(d - timedelta(days=366), d)
+
+        count = self.index[(d - self.start).days - 1]
+        n = int(np.searchsorted(self.index, count))
+        return self.start + timedelta(days=n)
+
+    def has_night_session(self, d: date) -> bool:
+        """
+        Check if night session is traded in the evening of date.
+        """
+        if not self.night_sessions or not self.is_trading_day(d):
+            return False
+
+        # No night session if any holiday before next trading day
+        next_day = self.get_next_trading_day(d)
+        holidays = np.busday_count(
+            d + timedelta(days=1), next_day, weekmask=self.weekmask
+        )
+        return not holidays
+
+    def get_trading_position(self, dt: datetime) -> Tuple[date, int]:
+        """
+        Get trading day of datetime, and seconds since midnight before
+        the trading day (or before the day after night session started).
+        """
+        d = dt.date()
+        seconds = dt.hour * 3600 + dt.minute * 60 + dt.second
+
+        if not self.night_sessions:
+            return d, seconds
+
+        if seconds - DAY_SECONDS >= self.night_start and self.has_night_session(d):
+            return self.get_next_trading_day(d), seconds - DAY_SECONDS
+
+        previous_day = self.get_previous_trading_day(d)
+        if not self.has_night_session(previous_day):
+            return d, seconds
 
-    while current_dt <= option_expiry:
-        current_dt += timedelta(days=1)
+        # Night session is only in progress on the day after it started
+        after_night = previous_day == d - timedelta(days=1)
 
-        # Ignore weekends
-        if current_dt.weekday() in [5, 6]:
-            continue
+        if self.is_trading_day(d):
+            if not after_night:
+                seconds = max(seconds, self.night_end)
+            return d, seconds
+        else:
+            if after_night:
+                seconds = min(seconds, self.night_end)
+            else:
+                seconds = self.night_end
+            return self.get_next_trading_day(d), seconds
 
-        # Ignore public holidays
-        if current_dt in PUBLIC_HOLIDAYS:
-            continue
+    def calculate_session_left(self, dt: datetime) -> float:
+        """
+        Calculate ratio of trading sessions left in the trading day of
+        datetime.
+        """
+        trading_day, seconds = self.get_trading_position(dt)
+        return self.calculate_position_left(trading_day, seconds)
 
-        days += 1
+    def calculate_position_left(self, trading_day: date, seconds: int) -> float:
+        """
+        Calculate ratio of trading sessions left in trading day after
+        seconds returned by get_trading_position.
+        """
+        if not self.is_trading_day(trading_day):
+            return 0
 
-    return days
+        sessions = self.sessions
+        total_seconds = self.session_seconds
+
+        # Night session before trading day is not traded after holidays
+        if self.night_sessions:
+            previous_day = self.get_previous_trading_day(trading_day)
+            if self.has_night_session(previous_day):
+                sessions = self.night_sessions + sessions
+                total_seconds += self.night_seconds
+
+        seconds_left = sum(
+            max(0, end - max(start, seconds)) for start, end in sessions
+        )
+        return seconds_left / total_seconds
+
+    def calculate_days_to_expiry(
+        self,
+        option_expiry: datetime,
+        current_dt: datetime = None
+    ) -> int:
+        """
+        Calculate trading days until expiry date, today included.
+        """
+        if not current_dt:
+            current_dt = datetime.now()
+
+        today, _ = self.get_trading_position(current_dt)
+        expiry_date = option_expiry.date()
+        if expiry_date < today:
+            return 0
+
+        days = self.count_days(today, expiry_date)
+        if self.is_trading_day(today):
+            days += 1
+        return days
+
+    def calculate_time_to_expiry(
+        self,
+        option_expiry: datetime,
+        current_dt: datetime = None
+    ) -> float:
+        """
+        Calculate time to expiry in year of annual trading days, with
+        trading days after today and trading sessions left of today.
+
+        Expiry without time of day means expiring after sessions of that
+        day, otherwise sessions after expiry time are not counted.
+
+        The result is never below MIN_DAYS_TO_EXPIRY trading days.
+        """
+        if not current_dt:
+            current_dt = datetime.now()
+
+        today, seconds = self.get_trading_position(current_dt)
+        expiry_date = option_expiry.date()
+        if option_expiry.time() != time():
+            expiry_date, expiry_seconds = self.get_trading_position(option_expiry)
+
+        if expiry_date < today:
+            return MIN_DAYS_TO_EXPIRY / self.annual_days
+
+        days = self.count_days(today, expiry_date)
+        days += self.calculate_position_left(today, seconds)
+
+        if option_expiry.time() != time():
+            days -= self.calculate_position_left(expiry_date, expiry_seconds)
+
+        return max(days, MIN_DAYS_TO_EXPIRY) / self.annual_days
+
+
+def parse_seconds(text: str) -> int:
+    """
+    Parse HH:MM into seconds since midnight, 24:00 allowed.
+    """
+    hour, minute = text.split(":")
+    return int(hour) * 3600 + int(minute) * 60
+
+
+def load_calendar(filepath: Path) -> TradingCalendar:
+    """
+    Load calendar from json data file, and use it for exchanges listed.
+    """
+    with open(filepath, mode="r", encoding="UTF-8") as f:
+        data = json.load(f)
+
+    calendar = TradingCalendar(
+        data["name"],
+        [datetime.strptime(d, "%Y-%m-%d").date() for d in data["holidays"]],
+        data.get("weekmask", "1111100"),
+        data.get("sessions", None),
+        data.get("annual_days", ANNUAL_DAYS),
+        data.get("night_sessions", None)
+    )
+
+    CALENDARS[calendar.name] = calendar
+    for exchange in data.get("exchanges", []):
+        EXCHANGE_CALENDARS[exchange] = calendar
+
+    return calendar
+
+
+def get_calendar(exchange: Exchange) -> TradingCalendar:
+    """
+    Get calendar of exchange, china (stock) calendar is used if not found.
+    """
+    return EXCHANGE_CALENDARS.get(exchange.value, CALENDARS["china"])
+
+
+CALENDARS: Dict[str, TradingCalendar] = {}
+EXCHANGE_CALENDARS: Dict[str, TradingCalendar] = {}
+
+for filepath in sorted(CALENDAR_FOLDER.glob("*.json")):
+    load_calendar(filepath)
+
+# For checking public holidays
+PUBLIC_HOLIDAYS = set([
+    datetime(d.year, d.month, d.day) for d in CALENDARS["china"].holidays
+])
+
+
+def calculate_days_to_expiry(option_expiry: datetime) -> int:
+    """"""
+    return CALENDARS["china"].calculate_days_to_expiry(option_expiry)
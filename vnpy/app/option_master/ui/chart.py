@@ -5,9 +5,9 @@ import pyqtgraph as pg
 from vnpy.trader.ui import QtWidgets, QtCore
 from vnpy.trader.event import EVENT_TIMER
 
-from ..base import PortfolioData
+from ..base import PortfolioData, EVENT_OPTION_SCENARIO
 from ..engine import OptionEngine, Event
-from ..time import ANNUAL_DAYS
+from ..scenario import ScenarioResult
 
 import numpy as np
 import matplotlib
@@ -42,6 +42,7 @@ class OptionVolatilityChart(QtWidgets.QWidget):
         self.put_curves: Dict[str, pg.PlotCurveItem] = {}
         self.call_curves: Dict[str, pg.PlotCurveItem] = {}
         self.pricing_curves: Dict[str, pg.PlotCurveItem] = {}
+        self.smooth_curves: Dict[str, pg.PlotCurveItem] = {}
 
         self.colors: List = [
             (255, 0, 0),
@@ -146,38 +147,41 @@ class OptionVolatilityChart(QtWidgets.QWidget):
             pen=pen,
             symbolBrush=color
         )
+        self.smooth_curves[chain_symbol] = self.impv_chart.plot(
+            name=symbol + " 平滑",
+            pen=pg.mkPen(color, width=1, style=QtCore.Qt.DashLine)
+        )
 
     def update_curve_data(self) -> None:
         """"""
         portfolio: PortfolioData = self.option_engine.get_portfolio(self.portfolio_name)
+        surface = portfolio.get_volatility_surface()
 
-        for chain in portfolio.chains.values():
-            call_impv = []
-            put_impv = []
-            pricing_impv = []
-            strike_prices = []
-
-            for index in chain.indexes:
-                call = chain.calls[index]
-                call_impv.append(call.mid_impv * 100)
-                pricing_impv.append(call.pricing_impv * 100)
-                strike_prices.append(call.strike_price)
+        for chain_symbol, curve in surface.curves.items():
+            chain = portfolio.chains[chain_symbol]
+            strike_prices = curve.strikes
 
-                put = chain.puts[index]
-                put_impv.append(put.mid_impv * 100)
+            pricing_impv = [
+                chain.calls[index].pricing_impv * 100
+                for index in chain.indexes
+            ]
 
-            self.call_curves[chain.chain_symbol].setData(
-                y=call_impv,
+            self.call_curves[chain_symbol].setData(
+                y=curve.call_impvs * 100,
                 x=strike_prices
             )
-            self.put_curves[chain.chain_symbol].setData(
-                y=put_impv,
+            self.put_curves[chain_symbol].setData(
+                y=curve.put_impvs * 100,
                 x=strike_prices
             )
-            self.pricing_curves[chain.chain_symbol].setData(
+            self.pricing_curves[chain_symbol].setData(
                 y=pricing_impv,
                 x=strike_prices
             )
+            self.smooth_curves[chain_symbol].setData(
+                y=curve.smooth_impvs * 100,
+                x=strike_prices
+            )
 
     def update_curve_visible(self) -> None:
         """"""
@@ -195,23 +199,29 @@ class OptionVolatilityChart(QtWidgets.QWidget):
                 call_curve = self.call_curves[chain_symbol]
                 put_curve = self.put_curves[chain_symbol]
                 pricing_curve = self.pricing_curves[chain_symbol]
+                smooth_curve = self.smooth_curves[chain_symbol]
 
                 self.impv_chart.addItem(call_curve)
                 self.impv_chart.addItem(put_curve)
                 self.impv_chart.addItem(pricing_curve)
+                self.impv_chart.addItem(smooth_curve)
 
 
 class ScenarioAnalysisChart(QtWidgets.QWidget):
     """"""
 
+    signal_scenario = QtCore.pyqtSignal(Event)
+
     def __init__(self, option_engine: OptionEngine, portfolio_name: str):
         """"""
         super().__init__()
 
         self.option_engine = option_engine
+        self.event_engine = option_engine.event_engine
         self.portfolio_name = portfolio_name
 
         self.init_ui()
+        self.register_event()
 
     def init_ui(self) -> None:
         """"""
@@ -277,6 +287,12 @@ class ScenarioAnalysisChart(QtWidgets.QWidget):
 
         self.setLayout(vbox)
 
+    def register_event(self) -> None:
+        """"""
+        self.signal_scenario.connect(self.process_scenario_event)
+
+        self.event_engine.register(EVENT_OPTION_SCENARIO, self.signal_scenario.emit)
+
     def run_analysis(self) -> None:
         """"""
         # Generate range
@@ -288,8 +304,7 @@ class ScenarioAnalysisChart(QtWidgets.QWidget):
         impv_change_range = self.impv_change_spin.value()
         impv_changes = np.arange(-impv_change_range, impv_change_range + 1) / 100
 
-        time_change = self.time_change_spin.value() / ANNUAL_DAYS
-        target_name = self.target_combo.currentText()
+        time_change = self.time_change_spin.value()
 
         # Check underlying price exists
         for underlying in portfolio.underlyings.values():
@@ -302,94 +317,53 @@ class ScenarioAnalysisChart(QtWidgets.QWidget):
                 )
                 return
 
-        # Run analysis calculation
-        pnls = []
-        deltas = []
-        gammas = []
-        thetas = []
-        vegas = []
-
-        for impv_change in impv_changes:
-            pnl_buf = []
-            delta_buf = []
-            gamma_buf = []
-            theta_buf = []
-            vega_buf = []
-
-            for price_change in price_changes:
-                portfolio_pnl = 0
-                portfolio_delta = 0
-                portfolio_gamma = 0
-                portfolio_theta = 0
-                portfolio_vega = 0
-
-                # Calculate underlying pnl
-                for underlying in portfolio.underlyings.values():
-                    if not underlying.net_pos:
-                        continue
-
-                    value = underlying.mid_price * underlying.net_pos * underlying.size
-                    portfolio_pnl += value * price_change
-                    portfolio_delta += value / 100
-
-                # Calculate option pnl
-                for option in portfolio.options.values():
-                    if not option.net_pos:
-                        continue
-
-                    new_underlying_price = option.underlying.mid_price * (1 + price_change)
-                    new_time_to_expiry = max(option.time_to_expiry - time_change, 0)
-                    new_mid_impv = option.mid_impv * (1 + impv_change)
-
-                    new_price, delta, gamma, theta, vega = option.calculate_greeks(
-                        new_underlying_price,
-                        option.strike_price,
-                        option.interest_rate,
-                        new_time_to_expiry,
-                        new_mid_impv,
-                        option.option_type
-                    )
-
-                    diff = new_price - option.tick.last_price
-                    multiplier = option.net_pos * option.size
-
-                    portfolio_pnl += diff * multiplier
-                    portfolio_delta += delta * multiplier
-                    portfolio_gamma += gamma * multiplier
-                    portfolio_theta += theta * multiplier
-                    portfolio_vega += vega * multiplier
-
-                pnl_buf.append(portfolio_pnl)
-                delta_buf.append(portfolio_delta)
-                gamma_buf.append(portfolio_gamma)
-                theta_buf.append(portfolio_theta)
-                vega_buf.append(portfolio_vega)
-
-            pnls.append(pnl_buf)
-            deltas.append(delta_buf)
-            gammas.append(gamma_buf)
-            thetas.append(theta_buf)
-            vegas.append(vega_buf)
-
-        # Plot chart
+        # Run analysis calculation in engine thread
+        started = self.option_engine.start_scenario_analysis(
+            self.portfolio_name,
+            price_changes,
+            impv_changes,
+            [time_change]
+        )
+
+        if not started:
+            QtWidgets.QMessageBox.warning(
+                self,
+                "无法执行情景分析",
+                "已有情景分析正在运行，请等待完成后再试",
+                QtWidgets.QMessageBox.Ok
+            )
+
+    def process_scenario_event(self, event: Event) -> None:
+        """"""
+        result: ScenarioResult = event.data
+        if result.portfolio_name != self.portfolio_name:
+            return
+
+        target_name = self.target_combo.currentText()
+
         if target_name == "盈亏":
-            target_data = pnls
+            target_data = result.pnl[0]
         elif target_name == "Delta":
-            target_data = deltas
+            target_data = result.delta[0]
         elif target_name == "Gamma":
-            target_data = gammas
+            target_data = result.gamma[0]
         elif target_name == "Theta":
-            target_data = thetas
+            target_data = result.theta[0]
         else:
-            target_data = vegas
+            target_data = result.vega[0]
 
-        self.update_chart(price_changes * 100, impv_changes * 100, target_data, target_name)
+        self.update_chart(
+            result.price_changes * 100,
+            result.impv_changes * 100,
+            target_data,
+            target_name
+        )
 
     def update_chart(
         self,
         price_changes: np.array,
         impv_changes: np.array,
-        target_data: List[List[float]],
+        target_data: np.ndarray,
         target_name: str
     ) -> None:
         """"""
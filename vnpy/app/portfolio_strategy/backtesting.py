@@ -1,18 +1,23 @@
-from collections import defaultdict
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Set, Tuple
-from functools import lru_cache
+from typing import Dict, Iterator, List, Set, Tuple
 from copy import copy
+from heapq import merge
+from itertools import chain
+from operator import itemgetter
 import traceback
 
 import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from pandas import DataFrame
+from pandas import DataFrame, Index
 
 from vnpy.trader.constant import Direction, Offset, Interval, Status
 from vnpy.trader.database import database_manager
+from vnpy.trader.database.database import BarArray
+from vnpy.trader.history_cache import cached_history
 from vnpy.trader.object import OrderData, TradeData, BarData
+from vnpy.trader.order_book import OrderBook
+from vnpy.trader.result_store import ResultStore, get_data_end, get_fingerprint
 from vnpy.trader.utility import round_to, extract_vt_symbol
 
 from .template import StrategyTemplate
@@ -24,6 +29,9 @@ INTERVAL_DELTA_MAP = {
     Interval.DAILY: timedelta(days=1),
 }
 
+# Load 30 days of data each time and allow for progress update
+LOAD_DELTA = timedelta(days=30)
+
 
 class BacktestingEngine:
     """"""
@@ -43,18 +51,26 @@ class BacktestingEngine:
 
         self.capital: float = 1_000_000
 
+        self.strategy_class: type = None
+        self.strategy_setting: dict = {}
         self.strategy: StrategyTemplate = None
         self.bars: Dict[str, BarData] = {}
         self.datetime: datetime = None
 
         self.interval: Interval = None
         self.days: int = 0
-        self.history_data: Dict[Tuple, BarData] = {}
+        self.history_data: Dict[Tuple, Tuple[BarArray, int]] = {}
         self.dts: Set[datetime] = set()
+        self.history_loaded: bool = False
+
+        # Load history data chunk by chunk during replay
+        self.streaming: bool = False
 
         self.limit_order_count = 0
         self.limit_orders = {}
         self.active_limit_orders = {}
+        self.limit_order_book = OrderBook()
+        self.submitting_orders = []
 
         self.trade_count = 0
         self.trades = {}
@@ -64,6 +80,9 @@ class BacktestingEngine:
         self.daily_results = {}
         self.daily_df = None
 
+        self.result_store: ResultStore = None
+        self.cached_statistics: dict = None
+
     def clear_data(self) -> None:
         """
         Clear all data of last backtesting.
@@ -75,6 +94,8 @@ class BacktestingEngine:
         self.limit_order_count = 0
         self.limit_orders.clear()
         self.active_limit_orders.clear()
+        self.limit_order_book.clear()
+        self.submitting_orders.clear()
 
         self.trade_count = 0
         self.trades.clear()
@@ -83,6 +104,8 @@ class BacktestingEngine:
         self.daily_results.clear()
         self.daily_df = None
 
+        self.cached_statistics = None
+
     def set_parameters(
         self,
         vt_symbols: List[str],
@@ -93,11 +116,17 @@ class BacktestingEngine:
         sizes: Dict[str, float],
         priceticks: Dict[str, float],
         capital: int = 0,
-        end: datetime = None
+        end: datetime = None,
+        streaming: bool = False
     ) -> None:
-        """"""
+        """
+        In streaming mode, history data is not loaded before running, but
+        loaded 30 days each time for each symbol and merged by datetime
+        during replay, so memory use does not grow with backtesting range.
+        """
         self.vt_symbols = vt_symbols
         self.interval = interval
+        self.streaming = streaming
 
         self.rates = rates
         self.slippages = slippages
@@ -110,76 +139,202 @@ class BacktestingEngine:
 
     def add_strategy(self, strategy_class: type, setting: dict) -> None:
         """"""
+        self.strategy_class = strategy_class
+        self.strategy_setting = setting
         self.strategy = strategy_class(
             self, strategy_class.__name__, copy(self.vt_symbols), setting
         )
 
+    def set_result_store(self, result_store: ResultStore = None) -> None:
+        """
+        Save statistics of each backtesting into result store, and skip
+        running when result of the same backtesting already exists.
+        """
+        if not result_store:
+            result_store = ResultStore()
+        self.result_store = result_store
+
+    def get_fingerprint(self) -> str:
+        """
+        Get fingerprint of backtesting with current strategy class,
+        strategy setting and engine parameters.
+        """
+        parameters = {
+            "vt_symbols": self.vt_symbols,
+            "interval": self.interval,
+            "start": self.start,
+            "end": self.end,
+            "rates": self.rates,
+            "slippages": self.slippages,
+            "sizes": self.sizes,
+            "priceticks": self.priceticks,
+            "capital": self.capital
+        }
+        return get_fingerprint(self.strategy_class, self.strategy_setting, parameters)
+
+    def update_end(self) -> None:
+        """
+        Use newest data in database as default end, so that result store
+        is hit until newer data saved.
+        """
+        if not self.end:
+            self.end = get_data_end(self.vt_symbols, self.interval) or datetime.now()
+
+    def check_result_store(self) -> bool:
+        """
+        Check if the same backtesting exists in result store, so that
+        its statistics are used without loading data and running.
+        """
+        if not self.result_store or not self.strategy_class:
+            return False
+
+        self.update_end()
+        self.cached_statistics = self.result_store.get(self.get_fingerprint())
+        return bool(self.cached_statistics)
+
     def load_data(self) -> None:
         """"""
         self.output("Start loading historical data")
 
-        if not self.end:
-            self.end = datetime.now()
+        self.update_end()
 
         if self.start >= self.end:
             self.output("The start date must be less than the end date")
             return
 
+        # History data is loaded when backtesting really runs
+        if self.check_result_store():
+            self.history_loaded = False
+            self.output("Backtesting result exists, skip loading historical data")
+            return
+
+        self.load_history()
+
+    def load_history(self) -> None:
+        """
+        Load history data of backtesting range from database.
+        """
         # Clear previously loaded history data
         self.history_data.clear()
         self.dts.clear()
 
-        # Load 30 days of data each time and allow for progress update
-        progress_delta = timedelta(days=30)
-        total_delta = self.end - self.start
-        interval_delta = INTERVAL_DELTA_MAP[self.interval]
+        self.history_loaded = True
 
-        for vt_symbol in self.vt_symbols:
-            start = self.start
-            end = self.start + progress_delta
-            progress = 0
+        if self.streaming:
+            self.output("Streaming mode, historical data will be loaded during playback")
+            return
+
+        load_ranges = self.get_load_ranges()
 
+        for vt_symbol in self.vt_symbols:
             data_count = 0
-            while start < self.end:
-                end = min(end, self.end)  # Make sure end time stays within set range
 
-                data = load_bar_data(
+            for i, (start, end) in enumerate(load_ranges):
+                bar_array = load_bar_array(
                     vt_symbol,
                     self.interval,
                     start,
                     end
                 )
 
-                for bar in data:
-                    self.dts.add(bar.datetime)
-                    self.history_data[(bar.datetime, vt_symbol)] = bar
-                    data_count += 1
+                # BarData is created only when the bar is replayed
+                for ix, dt in enumerate(bar_array.get_datetimes()):
+                    self.dts.add(dt)
+                    self.history_data[(dt, vt_symbol)] = (bar_array, ix)
+
+                data_count += len(bar_array)
 
-                progress += progress_delta / total_delta
-                progress = min(progress, 1)
+                progress = min((i + 1) * LOAD_DELTA / (self.end - self.start), 1)
                 progress_bar = "#" * int(progress * 10)
                 self.output(f"{vt_symbol} Loading progress：{progress_bar} [{progress:.0%}]")
 
-                start = end + interval_delta
-                end += (progress_delta + interval_delta)
-
             self.output(f"{vt_symbol} The historical data has been loaded, the amount of data: {data_count}")
 
         self.output("All historical data loaded")
 
+    def get_load_ranges(self) -> List[Tuple[datetime, datetime]]:
+        """
+        Split backtesting range into ranges of history data loaded each time.
+        """
+        interval_delta = INTERVAL_DELTA_MAP[self.interval]
+
+        load_ranges = []
+        start = self.start
+        end = self.start + LOAD_DELTA
+
+        while start < self.end:
+            end = min(end, self.end)  # Make sure end time stays within set range
+            load_ranges.append((start, end))
+
+            start = end + interval_delta
+            end += (LOAD_DELTA + interval_delta)
+
+        return load_ranges
+
+    def iter_symbol_data(
+        self,
+        vt_symbol: str
+    ) -> Iterator[Tuple[datetime, str, BarArray, int]]:
+        """
+        Cursor over history data of one symbol, only one range of data
+        is loaded at the same time.
+        """
+        for start, end in self.get_load_ranges():
+            bar_array = query_bar_array(vt_symbol, self.interval, start, end)
+
+            for ix, dt in enumerate(bar_array.get_datetimes()):
+                yield dt, vt_symbol, bar_array, ix
+
+    def iter_dts(self) -> Iterator[datetime]:
+        """
+        Iterate datetime of history data in time order.
+
+        In streaming mode, data of all symbols are merged by datetime, and
+        history data only keeps bars of the datetime returned.
+        """
+        if not self.streaming:
+            dts = list(self.dts)
+            dts.sort()
+            yield from dts
+            return
+
+        cursors = [self.iter_symbol_data(vt_symbol) for vt_symbol in self.vt_symbols]
+        current_dt = None
+
+        for dt, vt_symbol, bar_array, ix in merge(*cursors, key=itemgetter(0)):
+            if dt != current_dt:
+                if current_dt:
+                    yield current_dt
+
+                self.history_data.clear()
+                current_dt = dt
+
+            self.history_data[(dt, vt_symbol)] = (bar_array, ix)
+
+        if current_dt:
+            yield current_dt
+
     def run_backtesting(self) -> None:
         """"""
+        # Skip running if the same backtesting is in result store
+        if self.check_result_store():
+            self.output("Backtesting result exists, use statistics in result store")
+            return
+
+        # History data is not loaded if result existed when load_data called
+        if not self.history_loaded:
+            self.load_history()
+
         self.strategy.on_init()
 
-        # Generate sorted datetime list
-        dts = list(self.dts)
-        dts.sort()
+        # Generate datetime iterator in time order
+        dts = self.iter_dts()
 
         # Use the first [days] of history data for initializing strategy
         day_count = 0
-        ix = 0
+        dt = None
 
-        for ix, dt in enumerate(dts):
+        for dt in dts:
             if self.datetime and dt.day != self.datetime.day:
                 day_count += 1
                 if day_count >= self.days:
@@ -199,8 +354,12 @@ class BacktestingEngine:
         self.strategy.trading = True
         self.output("Start playback of historical data")
 
-        # Use the rest of history data for running backtesting
-        for dt in dts[ix:]:
+        # Use the rest of history data for running backtesting,
+        # starting from the datetime where initialization stopped
+        if dt:
+            dts = chain([dt], dts)
+
+        for dt in dts:
             try:
                 self.new_bars(dt)
             except Exception:
@@ -214,46 +373,21 @@ class BacktestingEngine:
         """"""
         self.output("Start calculating mark-to-market profit and loss")
 
+        if self.cached_statistics:
+            self.output("Backtesting result exists, no need to calculate")
+            return
+
         if not self.trades:
             self.output("The transaction record is empty and cannot be calculated")
             return
 
-        # Add trade data into daily reuslt.
-        for trade in self.trades.values():
-            d = trade.datetime.date()
-            daily_result = self.daily_results[d]
-            daily_result.add_trade(trade)
-
-        # Calculate daily result by iteration.
-        pre_closes = {}
-        start_poses = {}
-
-        for daily_result in self.daily_results.values():
-            daily_result.calculate_pnl(
-                pre_closes,
-                start_poses,
-                self.sizes,
-                self.rates,
-                self.slippages,
-            )
-
-            pre_closes = daily_result.close_prices
-            start_poses = daily_result.end_poses
-
-        # Generate dataframe
-        results = defaultdict(list)
-
-        for daily_result in self.daily_results.values():
-            fields = [
-                "date", "trade_count", "turnover",
-                "commission", "slippage", "trading_pnl",
-                "holding_pnl", "total_pnl", "net_pnl"
-            ]
-            for key in fields:
-                value = getattr(daily_result, key)
-                results[key].append(value)
-
-        self.daily_df = DataFrame.from_dict(results).set_index("date")
+        self.daily_df = calculate_daily_pnl(
+            self.daily_results,
+            list(self.trades.values()),
+            self.sizes,
+            self.rates,
+            self.slippages
+        )
 
         self.output("Mark-to-market profit and loss calculation completed")
         return self.daily_df
@@ -264,7 +398,14 @@ class BacktestingEngine:
 
         # Check DataFrame input exterior
         if df is None:
+            # Use statistics in result store if backtesting skipped
+            if self.cached_statistics:
+                return self.cached_statistics
+
             df = self.daily_df
+            store = bool(self.result_store)
+        else:
+            store = False
 
         # Check for init DataFrame
         if df is None:
@@ -298,10 +439,7 @@ class BacktestingEngine:
             # Calculate balance related time series data
             df["balance"] = df["net_pnl"].cumsum() + self.capital
             df["return"] = np.log(df["balance"] / df["balance"].shift(1)).fillna(0)
-            df["highlevel"] = (
-                df["balance"].rolling(
-                    min_periods=1, window=len(df), center=False).max()
-            )
+            df["highlevel"] = np.maximum.accumulate(df["balance"].values)
             df["drawdown"] = df["balance"] - df["highlevel"]
             df["ddpercent"] = df["drawdown"] / df["highlevel"] * 100
 
@@ -425,6 +563,17 @@ class BacktestingEngine:
                 value = 0
             statistics[key] = np.nan_to_num(value)
 
+        if store:
+            self.result_store.put(
+                self.get_fingerprint(),
+                self.strategy_class,
+                self.vt_symbols,
+                self.start,
+                self.end,
+                self.strategy_setting,
+                statistics
+            )
+
         self.output("Completion of calculation of strategy statistics indicators")
         return statistics
 
@@ -436,6 +585,8 @@ class BacktestingEngine:
 
         # Check for init DataFrame
         if df is None:
+            if self.cached_statistics:
+                self.output("Backtesting result is from result store, no daily result for chart")
             return
 
         fig = make_subplots(
@@ -491,11 +642,12 @@ class BacktestingEngine:
 
         # self.bars.clear()
         for vt_symbol in self.vt_symbols:
-            bar = self.history_data.get((dt, vt_symbol), None)
+            data = self.history_data.get((dt, vt_symbol), None)
 
             # If bar data of vt_symbol at dt exists
-            if bar:
-                self.bars[vt_symbol] = bar
+            if data:
+                bar_array, ix = data
+                self.bars[vt_symbol] = bar_array.get_bar(ix)
             # Otherwise, use previous data to backfill
             elif vt_symbol in self.bars:
                 old_bar = self.bars[vt_symbol]
@@ -521,7 +673,27 @@ class BacktestingEngine:
         """
         Cross limit order with last bar/tick data.
         """
-        for order in list(self.active_limit_orders.values()):
+        # Only check orders crossed by price in order book, and orders
+        # submitted since last check (which are newer than all others).
+        prices = {}
+        for vt_symbol, bar in self.bars.items():
+            prices[vt_symbol] = (
+                bar.low_price if bar.low_price > 0 else None,
+                bar.high_price if bar.high_price > 0 else None
+            )
+        crossed_orderids = self.limit_order_book.get_crossed(prices)
+
+        orders = [
+            self.active_limit_orders[vt_orderid] for vt_orderid in crossed_orderids
+            if self.active_limit_orders[vt_orderid].status != Status.SUBMITTING
+        ]
+        orders.extend(self.submitting_orders)
+        self.submitting_orders = []
+
+        for order in orders:
+            if order.vt_orderid not in self.active_limit_orders:
+                continue
+
             bar = self.bars[order.vt_symbol]
 
             long_cross_price = bar.low_price
@@ -556,6 +728,7 @@ class BacktestingEngine:
             self.strategy.update_order(order)
 
             self.active_limit_orders.pop(order.vt_orderid)
+            self.limit_order_book.remove(order.vt_orderid)
 
             # Push trade update
             self.trade_count += 1
@@ -621,6 +794,8 @@ class BacktestingEngine:
 
         self.active_limit_orders[order.vt_orderid] = order
         self.limit_orders[order.vt_orderid] = order
+        self.limit_order_book.add(order.vt_orderid, vt_symbol, direction, price)
+        self.submitting_orders.append(order)
 
         return [order.vt_orderid]
 
@@ -631,6 +806,7 @@ class BacktestingEngine:
         if vt_orderid not in self.active_limit_orders:
             return
         order = self.active_limit_orders.pop(vt_orderid)
+        self.limit_order_book.remove(vt_orderid)
 
         order.status = Status.CANCELLED
         self.strategy.update_order(order)
@@ -833,16 +1009,182 @@ class PortfolioDailyResult:
                 contract_result.update_close_price(close_price)
 
 
-@lru_cache(maxsize=999)
-def load_bar_data(
+DAILY_FIELDS = [
+    "trade_count", "turnover", "commission", "slippage",
+    "trading_pnl", "holding_pnl", "total_pnl", "net_pnl"
+]
+
+CONTRACT_FIELDS = [
+    "pre_close", "start_pos", "end_pos", "trade_count", "turnover",
+    "commission", "slippage", "trading_pnl", "holding_pnl", "total_pnl",
+    "net_pnl"
+]
+
+
+def calculate_daily_pnl(
+    daily_results: Dict[date, PortfolioDailyResult],
+    trades: List[TradeData],
+    sizes: Dict[str, float],
+    rates: Dict[str, float],
+    slippages: Dict[str, float]
+) -> DataFrame:
+    """
+    Calculate daily pnl of portfolio with arrays of (symbol, day) instead of
+    iterating daily results, same as PortfolioDailyResult.calculate_pnl.
+
+    Values of symbol in each day are added in the same order as iteration
+    (np.add.at and reduce along axis 0 are not pairwise summation), so
+    that the result is identical to that of iteration.
+
+    Trades, pnl and positions of each contract, and pre closes of each day
+    are written back into daily results as well.
+    """
+    dates = list(daily_results.keys())
+    date_ixs = {d: ix for ix, d in enumerate(dates)}
+
+    # Symbols in order of first appearance, same as contract results
+    symbol_ixs: Dict[str, int] = {}
+    for daily_result in daily_results.values():
+        for vt_symbol in daily_result.contract_results.keys():
+            symbol_ixs.setdefault(vt_symbol, len(symbol_ixs))
+
+    # Close price and whether symbol is in contract results of each day
+    shape = (len(symbol_ixs), len(dates))
+    close_prices = np.zeros(shape)
+    actives = np.zeros(shape, dtype=bool)
+
+    for j, daily_result in enumerate(daily_results.values()):
+        for vt_symbol, close_price in daily_result.close_prices.items():
+            i = symbol_ixs.get(vt_symbol, None)
+            if i is not None:
+                close_prices[i, j] = close_price
+        for vt_symbol in daily_result.contract_results.keys():
+            actives[symbol_ixs[vt_symbol], j] = True
+
+    symbols = list(symbol_ixs.keys())
+    symbol_sizes = np.array([sizes[vt_symbol] for vt_symbol in symbols])[:, None]
+    symbol_rates = np.array([rates[vt_symbol] for vt_symbol in symbols])
+    symbol_slippages = np.array([slippages[vt_symbol] for vt_symbol in symbols])
+
+    # Pre close of first day (or missing) is 1 to avoid zero division
+    pre_closes = np.zeros(shape)
+    pre_closes[:, 1:] = close_prices[:, :-1]
+    pre_closes[pre_closes == 0] = 1
+
+    # Trade data in arrays, trades are sorted by time already
+    trade_symbols = np.array([symbol_ixs[t.vt_symbol] for t in trades], dtype=np.int64)
+    trade_dates = np.array([date_ixs[t.datetime.date()] for t in trades], dtype=np.int64)
+    prices = np.array([t.price for t in trades], dtype=float)
+    volumes = np.array([t.volume for t in trades], dtype=float)
+    longs = np.array([t.direction == Direction.LONG for t in trades], dtype=bool)
+    pos_changes = np.where(longs, volumes, -volumes)
+
+    cells = trade_symbols * len(dates) + trade_dates
+
+    def sum_trades(values: np.ndarray) -> np.ndarray:
+        """"""
+        result = np.zeros(shape[0] * shape[1])
+        np.add.at(result, cells, values)
+        return result.reshape(shape)
+
+    # Start position is end position of last day, and restarts from 0 if
+    # symbol is not in contract results of last day
+    day_changes = sum_trades(pos_changes)
+    pre_changes = np.cumsum(day_changes, axis=1) - day_changes
+
+    restarts = np.ones(shape, dtype=bool)
+    restarts[:, 1:] = ~actives[:, :-1]
+    restart_ixs = np.where(restarts, np.arange(len(dates)), 0)
+    restart_ixs = np.maximum.accumulate(restart_ixs, axis=1)
+
+    start_poses = pre_changes - np.take_along_axis(pre_changes, restart_ixs, axis=1)
+    end_poses = start_poses + day_changes
+
+    # Holding pnl is the pnl from holding position at day start
+    holding_pnl = start_poses * (close_prices - pre_closes) * symbol_sizes
+
+    # Trading pnl is the pnl from new trade during the day
+    trade_sizes = symbol_sizes[trade_symbols, 0]
+    trade_turnovers = volumes * trade_sizes * prices
+    trade_pnls = pos_changes * (close_prices[trade_symbols, trade_dates] - prices) * trade_sizes
+    trade_slippages = volumes * trade_sizes * symbol_slippages[trade_symbols]
+    trade_commissions = trade_turnovers * symbol_rates[trade_symbols]
+
+    trade_count = np.bincount(cells, minlength=shape[0] * shape[1]).reshape(shape)
+    turnover = sum_trades(trade_turnovers)
+    commission = sum_trades(trade_commissions)
+    slippage = sum_trades(trade_slippages)
+    trading_pnl = sum_trades(trade_pnls)
+
+    # Net pnl takes account of commission and slippage cost
+    total_pnl = trading_pnl + holding_pnl
+    net_pnl = total_pnl - commission - slippage
+
+    # Sum up symbols in contract results of each day
+    results = {}
+    for name, values in zip(DAILY_FIELDS, [
+        trade_count, turnover, commission, slippage,
+        trading_pnl, holding_pnl, total_pnl, net_pnl
+    ]):
+        results[name] = np.where(actives, values, 0).sum(axis=0)
+
+    # Update portfolio level result into daily results
+    for j, daily_result in enumerate(daily_results.values()):
+        for name in DAILY_FIELDS:
+            setattr(daily_result, name, results[name][j].item())
+
+    # Update contract level result and positions into daily results
+    contract_values = {
+        name: values.tolist() for name, values in zip(CONTRACT_FIELDS, [
+            pre_closes, start_poses, end_poses, trade_count, turnover,
+            commission, slippage, trading_pnl, holding_pnl, total_pnl, net_pnl
+        ])
+    }
+
+    pre_close_prices = {}
+    for j, daily_result in enumerate(daily_results.values()):
+        daily_result.pre_closes = pre_close_prices
+        daily_result.start_poses = {}
+        daily_result.end_poses = {}
+
+        for vt_symbol, contract_result in daily_result.contract_results.items():
+            i = symbol_ixs[vt_symbol]
+            for name, values in contract_values.items():
+                setattr(contract_result, name, values[i][j])
+            contract_result.trades = []
+
+            daily_result.start_poses[vt_symbol] = contract_result.start_pos
+            daily_result.end_poses[vt_symbol] = contract_result.end_pos
+
+        pre_close_prices = daily_result.close_prices
+
+    for trade, j in zip(trades, trade_dates.tolist()):
+        daily_result = daily_results[dates[j]]
+        daily_result.contract_results[trade.vt_symbol].trades.append(trade)
+
+    return DataFrame(results, index=Index(dates, dtype=object, name="date"))
+
+
+def query_bar_array(
     vt_symbol: str,
     interval: Interval,
     start: datetime,
     end: datetime
-):
+) -> BarArray:
     """"""
     symbol, exchange = extract_vt_symbol(vt_symbol)
 
-    return database_manager.load_bar_data(
+    return database_manager.load_bar_array(
         symbol, exchange, interval, start, end
     )
+
+
+@cached_history
+def load_bar_array(
+    vt_symbol: str,
+    interval: Interval,
+    start: datetime,
+    end: datetime
+) -> BarArray:
+    """"""
+    return query_bar_array(vt_symbol, interval, start, end)
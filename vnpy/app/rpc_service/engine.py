@@ -3,7 +3,7 @@
 import traceback
 from typing import Optional
 
-from vnpy.event import Event, EventEngine
+from vnpy.event import Event, EventEngine, get_remote_topic
 from vnpy.rpc import RpcServer
 from vnpy.trader.engine import BaseEngine, MainEngine
 from vnpy.trader.utility import load_json, save_json
@@ -112,7 +112,7 @@ class RpcEngine(BaseEngine):
     def process_event(self, event: Event):
         """"""
         if self.server.is_active():
-            self.server.publish("", event)
+            self.server.publish(get_remote_topic(event.type), event)
 
     def write_log(self, msg: str) -> None:
         """"""
@@ -1,5 +1,6 @@
 from collections import defaultdict
 from datetime import date, datetime
+from itertools import chain
 from typing import Callable, Type
 
 import numpy as np
@@ -10,9 +11,10 @@ from plotly.subplots import make_subplots
 from vnpy.trader.constant import (Direction, Offset, Exchange,
                                   Interval, Status)
 from vnpy.trader.object import TradeData, BarData, TickData
+from vnpy.trader.result_store import ResultStore, get_data_end, get_fingerprint
 
 from .template import SpreadStrategyTemplate, SpreadAlgoTemplate
-from .base import SpreadData, BacktestingMode, load_bar_data, load_tick_data
+from .base import SpreadData, BacktestingMode, load_bar_data, iter_spread_tick_data
 
 
 class BacktestingEngine:
@@ -32,8 +34,10 @@ class BacktestingEngine:
         self.pricetick = 0
         self.capital = 1_000_000
         self.mode = BacktestingMode.BAR
+        self.persist = False
 
         self.strategy_class: Type[SpreadStrategyTemplate] = None
+        self.strategy_setting: dict = {}
         self.strategy: SpreadStrategyTemplate = None
         self.tick: TickData = None
         self.bar: BarData = None
@@ -43,6 +47,7 @@ class BacktestingEngine:
         self.days = 0
         self.callback = None
         self.history_data = []
+        self.history_loaded: bool = False
 
         self.algo_count = 0
         self.algos = {}
@@ -56,6 +61,9 @@ class BacktestingEngine:
         self.daily_results = {}
         self.daily_df = None
 
+        self.result_store: ResultStore = None
+        self.cached_statistics: dict = None
+
     def output(self, msg):
         """
         Output message of backtesting engine.
@@ -81,6 +89,8 @@ class BacktestingEngine:
         self.logs.clear()
         self.daily_results.clear()
 
+        self.cached_statistics = None
+
     def set_parameters(
         self,
         spread: SpreadData,
@@ -92,9 +102,13 @@ class BacktestingEngine:
         pricetick: float,
         capital: int = 0,
         end: datetime = None,
-        mode: BacktestingMode = BacktestingMode.BAR
+        mode: BacktestingMode = BacktestingMode.BAR,
+        persist: bool = False
     ):
-        """"""
+        """
+        Synthesized spread bar data is saved in local cache and reused by
+        later backtesting if persist is True.
+        """
         self.spread = spread
         self.interval = Interval(interval)
         self.rate = rate
@@ -105,10 +119,12 @@ class BacktestingEngine:
         self.capital = capital
         self.end = end
         self.mode = mode
+        self.persist = persist
 
     def add_strategy(self, strategy_class: type, setting: dict):
         """"""
         self.strategy_class = strategy_class
+        self.strategy_setting = setting
 
         self.strategy = strategy_class(
             self,
@@ -117,48 +133,148 @@ class BacktestingEngine:
             setting
         )
 
+    def set_result_store(self, result_store: ResultStore = None):
+        """
+        Save statistics of each backtesting into result store, and skip
+        running when result of the same backtesting already exists.
+        """
+        if not result_store:
+            result_store = ResultStore()
+        self.result_store = result_store
+
+    def get_fingerprint(self) -> str:
+        """
+        Get fingerprint of backtesting with current strategy class,
+        strategy setting, spread definition and engine parameters.
+        """
+        spread = self.spread
+
+        parameters = {
+            "spread": {
+                "name": spread.name,
+                "legs": list(spread.legs.keys()),
+                "active_symbol": spread.active_leg.vt_symbol,
+                "price_multipliers": spread.price_multipliers,
+                "trading_multipliers": spread.trading_multipliers,
+                "inverse_contracts": spread.inverse_contracts,
+                "price_formula": spread.price_formula
+            },
+            "interval": self.interval,
+            "start": self.start,
+            "end": self.end,
+            "rate": self.rate,
+            "slippage": self.slippage,
+            "size": self.size,
+            "pricetick": self.pricetick,
+            "capital": self.capital,
+            "mode": self.mode
+        }
+        return get_fingerprint(self.strategy_class, self.strategy_setting, parameters)
+
+    def update_end(self):
+        """
+        Use newest data of legs in database as default end, so that result
+        store is hit until newer data saved.
+        """
+        if self.end:
+            return
+
+        vt_symbols = list(self.spread.legs.keys())
+
+        if self.mode == BacktestingMode.BAR:
+            self.end = get_data_end(vt_symbols, self.interval)
+        else:
+            self.end = get_data_end(vt_symbols)
+
+        if not self.end:
+            self.end = datetime.now()
+
+    def check_result_store(self) -> bool:
+        """
+        Check if the same backtesting exists in result store, so that
+        its statistics are used without loading data and running.
+        """
+        if not self.result_store or not self.strategy_class:
+            return False
+
+        self.update_end()
+        self.cached_statistics = self.result_store.get(self.get_fingerprint())
+        return bool(self.cached_statistics)
+
     def load_data(self):
         """"""
         self.output("Start loading historical data")
 
-        if not self.end:
-            self.end = datetime.now()
+        self.update_end()
 
         if self.start >= self.end:
             self.output("The start date must be less than the end date")
             return
 
+        # History data is loaded when backtesting really runs
+        if self.check_result_store():
+            self.history_loaded = False
+            self.output("Backtesting result exists, skip loading historical data")
+            return
+
+        self.load_history()
+
+    def load_history(self):
+        """
+        Load history data of backtesting range from database.
+        """
+        self.history_loaded = True
+
         if self.mode == BacktestingMode.BAR:
             self.history_data = load_bar_data(
                 self.spread,
                 self.interval,
                 self.start,
                 self.end,
-                self.pricetick
+                self.pricetick,
+                self.persist
             )
         else:
-            self.history_datas = load_tick_data(
-                self.spread,
-                self.start,
-                self.end
-            )
+            # Tick data of legs is loaded during replay
+            self.history_data = []
+            self.output("Tick模式，回放时从数据库读取各条腿的Tick数据")
+            return
 
         self.output(f"历史数据加载完成，数据量：{len(self.history_data)}")
 
     def run_backtesting(self):
         """"""
+        # Skip running if the same backtesting is in result store
+        if self.check_result_store():
+            self.output("Backtesting result exists, use statistics in result store")
+            return
+
+        # History data is not loaded if result existed when load_data called
+        if not self.history_loaded:
+            self.load_history()
+
         if self.mode == BacktestingMode.BAR:
             func = self.new_bar
+            history_data = iter(self.history_data)
         else:
             func = self.new_tick
 
+            # Spread price is rounded to pricetick of backtesting if spread
+            # has no pricetick from legs
+            history_data = iter_spread_tick_data(
+                self.spread,
+                self.start,
+                self.end,
+                pricetick=self.spread.pricetick or self.pricetick
+            )
+
         self.strategy.on_init()
 
         # Use the first [days] of history data for initializing strategy
         day_count = 0
-        ix = 0
+        data = None
 
-        for ix, data in enumerate(self.history_data):
+        for data in history_data:
             if self.datetime and data.datetime.day != self.datetime.day:
                 day_count += 1
                 if day_count >= self.days:
@@ -174,8 +290,12 @@ class BacktestingEngine:
         self.strategy.trading = True
         self.output("开始回放历史数据")
 
-        # Use the rest of history data for running backtesting
-        for data in self.history_data[ix:]:
+        # Use the rest of history data for running backtesting,
+        # starting from the data where initialization stopped
+        if data:
+            history_data = chain([data], history_data)
+
+        for data in history_data:
             func(data)
 
         self.output("历史数据回放结束")
@@ -184,6 +304,10 @@ class BacktestingEngine:
         """"""
         self.output("Start calculating mark-to-market profit and loss")
 
+        if self.cached_statistics:
+            self.output("Backtesting result exists, no need to calculate")
+            return
+
         if not self.trades:
             self.output("The transaction record is empty and cannot be calculated")
             return
@@ -228,7 +352,14 @@ class BacktestingEngine:
 
         # Check DataFrame input exterior
         if df is None:
+            # Use statistics in result store if backtesting skipped
+            if self.cached_statistics:
+                return self.cached_statistics
+
             df = self.daily_df
+            store = bool(self.result_store)
+        else:
+            store = False
 
         # Check for init DataFrame
         if df is None:
@@ -376,6 +507,17 @@ class BacktestingEngine:
             "return_drawdown_ratio": return_drawdown_ratio,
         }
 
+        if store:
+            self.result_store.put(
+                self.get_fingerprint(),
+                self.strategy_class,
+                list(self.spread.legs.keys()),
+                self.start,
+                self.end,
+                self.strategy_setting,
+                statistics
+            )
+
         return statistics
 
     def show_chart(self, df: DataFrame = None):
@@ -386,6 +528,8 @@ class BacktestingEngine:
 
         # Check for init DataFrame
         if df is None:
+            if self.cached_statistics:
+                self.output("Backtesting result is from result store, no daily result for chart")
             return
 
         fig = make_subplots(
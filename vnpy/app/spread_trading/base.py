@@ -1,14 +1,24 @@
-from typing import Dict, List
-from datetime import datetime
+import hashlib
+from typing import Dict, Iterator, List
+from datetime import datetime, timedelta
 from enum import Enum
-from functools import lru_cache
+from functools import reduce
+from heapq import merge
+from operator import attrgetter
+
+import numpy as np
 
 from vnpy.trader.object import (
     TickData, PositionData, TradeData, ContractData, BarData
 )
 from vnpy.trader.constant import Direction, Offset, Exchange, Interval
-from vnpy.trader.utility import floor_to, ceil_to, round_to, extract_vt_symbol
+from vnpy.trader.utility import (
+    floor_to, ceil_to, round_to, round_to_array, extract_vt_symbol, get_folder_path
+)
 from vnpy.trader.database import database_manager
+from vnpy.trader.database.database import BarArray, DB_TZ
+from vnpy.trader.database.database_cache import BarCache, to_db_datetime
+from vnpy.trader.history_cache import cached_history
 
 
 EVENT_SPREAD_DATA = "eSpreadData"
@@ -194,8 +204,14 @@ class SpreadData:
         self.net_pos: float = 0
         self.datetime: datetime = None
 
-    def calculate_price(self):
-        """"""
+    def calculate_price(self, pricetick: float = 0):
+        """
+        Calculate spread price and volume from legs. Price is rounded to
+        pricetick given, or pricetick of spread by default.
+        """
+        if not pricetick:
+            pricetick = self.pricetick
+
         self.clear_price()
 
         # Go through all legs to calculate price
@@ -215,8 +231,8 @@ class SpreadData:
                 self.ask_price += leg.bid_price * price_multiplier
 
             # Round price to pricetick
-            self.bid_price = round_to(self.bid_price, self.pricetick)
-            self.ask_price = round_to(self.ask_price, self.pricetick)
+            self.bid_price = round_to(self.bid_price, pricetick)
+            self.ask_price = round_to(self.ask_price, pricetick)
 
             # Calculate volume
             trading_multiplier = self.trading_multipliers[leg.vt_symbol]
@@ -371,68 +387,189 @@ class BacktestingMode(Enum):
     TICK = 2
 
 
-@lru_cache(maxsize=999)
-def load_bar_data(
+SPREAD_BAR_DTYPE = np.dtype([
+    ("datetime", "datetime64[us]"),
+    ("open_price", "float64"),
+    ("high_price", "float64"),
+    ("low_price", "float64"),
+    ("close_price", "float64"),
+    ("value", "float64")
+])
+
+SPREAD_CACHE_FOLDER = "spread_cache"
+
+
+def calculate_spread_bar_array(
     spread: SpreadData,
     interval: Interval,
     start: datetime,
     end: datetime,
     pricetick: float = 0
-):
-    """"""
-    # Load bar data of each spread leg
-    leg_bars: Dict[str, Dict] = {}
+) -> np.ndarray:
+    """
+    Synthesize spread bar data from bar data of legs aligned on datetime.
+
+    Open/close price is calculated with open/close price of legs. High/low
+    price is the bound of spread price within the bar: high (low) price of
+    legs with positive (negative) multiplier for high price, and opposite
+    for low price.
+    """
+    leg_arrays: List[BarArray] = []
 
     for vt_symbol in spread.legs.keys():
         symbol, exchange = extract_vt_symbol(vt_symbol)
 
-        bar_data: List[BarData] = database_manager.load_bar_data(
+        bar_array = database_manager.load_bar_array(
             symbol, exchange, interval, start, end
         )
+        leg_arrays.append(bar_array)
 
-        bars: Dict[datetime, BarData] = {bar.datetime: bar for bar in bar_data}
-        leg_bars[vt_symbol] = bars
+    # Only datetime with bar data of all legs
+    dts = reduce(np.intersect1d, [bar_array.datetime for bar_array in leg_arrays])
 
-    # Calculate spread bar data
-    spread_bars: List[BarData] = []
+    data = np.zeros(len(dts), dtype=SPREAD_BAR_DTYPE)
+    data["datetime"] = dts
+
+    for vt_symbol, bar_array in zip(spread.legs.keys(), leg_arrays):
+        ix = np.searchsorted(bar_array.datetime, dts)
+        price_multiplier = spread.price_multipliers[vt_symbol]
 
-    for dt in bars.keys():
-        spread_price = 0
-        spread_value = 0
-        spread_available = True
+        if price_multiplier > 0:
+            high_price = bar_array.high_price[ix]
+            low_price = bar_array.low_price[ix]
+        else:
+            high_price = bar_array.low_price[ix]
+            low_price = bar_array.high_price[ix]
 
-        for leg in spread.legs.values():
-            leg_bar = leg_bars[leg.vt_symbol].get(dt, None)
+        data["open_price"] += price_multiplier * bar_array.open_price[ix]
+        data["high_price"] += price_multiplier * high_price
+        data["low_price"] += price_multiplier * low_price
+        data["close_price"] += price_multiplier * bar_array.close_price[ix]
+        data["value"] += abs(price_multiplier) * bar_array.close_price[ix]
 
-            if leg_bar:
-                price_multiplier = spread.price_multipliers[leg.vt_symbol]
-                spread_price += price_multiplier * leg_bar.close_price
-                spread_value += abs(price_multiplier) * leg_bar.close_price
-            else:
-                spread_available = False
-
-        if spread_available:
-            if pricetick:
-                spread_price = round_to(spread_price, pricetick)
-
-            spread_bar = BarData(
-                symbol=spread.name,
-                exchange=exchange.LOCAL,
-                datetime=dt,
-                interval=interval,
-                open_price=spread_price,
-                high_price=spread_price,
-                low_price=spread_price,
-                close_price=spread_price,
-                gateway_name="SPREAD",
-            )
-            spread_bar.value = spread_value
-            spread_bars.append(spread_bar)
+    if pricetick:
+        for field in ["open_price", "high_price", "low_price", "close_price"]:
+            data[field] = round_to_array(data[field], pricetick)
+
+    return data
+
+
+def get_legs_range(spread: SpreadData, interval: Interval) -> str:
+    """
+    Get datetime range of bar data of each leg in database, which changes
+    when leg bar data of earlier or later days are saved.
+    """
+    ranges = []
+
+    for vt_symbol in spread.legs.keys():
+        symbol, exchange = extract_vt_symbol(vt_symbol)
+
+        oldest_bar = database_manager.get_oldest_bar_data(symbol, exchange, interval)
+        newest_bar = database_manager.get_newest_bar_data(symbol, exchange, interval)
+
+        if oldest_bar and newest_bar:
+            ranges.append(f"{vt_symbol}:{oldest_bar.datetime}-{newest_bar.datetime}")
+        else:
+            ranges.append(f"{vt_symbol}:")
+
+    return ",".join(ranges)
+
+
+def get_spread_key(spread: SpreadData, interval: Interval, pricetick: float) -> str:
+    """
+    Get key of spread bar data in cache, changed with spread formula and
+    data range of legs, so that spread bars are synthesized again after
+    new leg bar data saved.
+    """
+    text = f"{spread.price_formula}|{pricetick}|{get_legs_range(spread, interval)}"
+    return f"{spread.name}.{hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]}"
+
+
+def load_spread_bar_array(
+    spread: SpreadData,
+    interval: Interval,
+    start: datetime,
+    end: datetime,
+    pricetick: float = 0
+) -> np.ndarray:
+    """
+    Load spread bar data persisted in local cache. Only bar data of days
+    not in cache are synthesized and saved.
+    """
+    folder = get_folder_path(SPREAD_CACHE_FOLDER)
+    cache = BarCache(folder)
+    key = get_spread_key(spread, interval, pricetick)
+
+    # Remove data of the spread cached with outdated key
+    for path in folder.glob(f"{spread.name}.*"):
+        if path.name != key and len(path.name) == len(key):
+            cache.invalidate(path.name, interval)
+
+            if not any(path.iterdir()):
+                path.rmdir()
+
+    def calculate_data(start: datetime, end: datetime) -> np.ndarray:
+        """"""
+        return calculate_spread_bar_array(spread, interval, start, end, pricetick)
+
+    return cache.load(
+        key,
+        interval,
+        to_db_datetime(start),
+        to_db_datetime(end),
+        calculate_data,
+        SPREAD_BAR_DTYPE
+    )
+
+
+@cached_history
+def load_bar_data(
+    spread: SpreadData,
+    interval: Interval,
+    start: datetime,
+    end: datetime,
+    pricetick: float = 0,
+    persist: bool = False
+) -> List[BarData]:
+    """
+    Load spread bar data, synthesized bar data is saved in local cache
+    and reused next time if persist is True.
+    """
+    if persist:
+        data = load_spread_bar_array(spread, interval, start, end, pricetick)
+    else:
+        data = calculate_spread_bar_array(spread, interval, start, end, pricetick)
+
+    spread_bars: List[BarData] = []
+
+    dts = data["datetime"].astype("datetime64[us]").tolist()
+
+    for dt, open_price, high_price, low_price, close_price, value in zip(
+        dts,
+        data["open_price"].tolist(),
+        data["high_price"].tolist(),
+        data["low_price"].tolist(),
+        data["close_price"].tolist(),
+        data["value"].tolist()
+    ):
+        spread_bar = BarData(
+            symbol=spread.name,
+            exchange=Exchange.LOCAL,
+            datetime=dt.replace(tzinfo=DB_TZ),
+            interval=interval,
+            open_price=open_price,
+            high_price=high_price,
+            low_price=low_price,
+            close_price=close_price,
+            gateway_name="SPREAD",
+        )
+        spread_bar.value = value
+        spread_bars.append(spread_bar)
 
     return spread_bars
 
 
-@lru_cache(maxsize=999)
+@cached_history
 def load_tick_data(
     spread: SpreadData,
     start: datetime,
@@ -442,3 +579,60 @@ def load_tick_data(
     return database_manager.load_tick_data(
         spread.name, Exchange.LOCAL, start, end
     )
+
+
+def iter_leg_tick_data(
+    vt_symbol: str,
+    start: datetime,
+    end: datetime,
+    load_delta: timedelta = timedelta(days=1)
+) -> Iterator[TickData]:
+    """
+    Cursor over tick data of one leg, loaded from database one range
+    after another.
+    """
+    symbol, exchange = extract_vt_symbol(vt_symbol)
+    range_start = start
+
+    while range_start <= end:
+        range_end = min(range_start + load_delta - timedelta(microseconds=1), end)
+
+        ticks = database_manager.load_tick_data(
+            symbol, exchange, range_start, range_end
+        )
+        yield from ticks
+
+        range_start += load_delta
+
+
+def iter_spread_tick_data(
+    spread: SpreadData,
+    start: datetime,
+    end: datetime,
+    load_delta: timedelta = timedelta(days=1),
+    pricetick: float = 0
+) -> Iterator[TickData]:
+    """
+    Replay tick data of all legs merged by datetime, and rebuild spread
+    price with each leg tick. Spread tick is generated once all legs
+    have price. Spread price is rounded to pricetick given, or pricetick
+    of spread by default.
+
+    Only one range of tick data of each leg is kept in memory.
+    """
+    cursors = [
+        iter_leg_tick_data(vt_symbol, start, end, load_delta)
+        for vt_symbol in spread.legs.keys()
+    ]
+    legs = list(spread.legs.values())
+
+    for tick in merge(*cursors, key=attrgetter("datetime")):
+        spread.legs[tick.vt_symbol].update_tick(tick)
+
+        for leg in legs:
+            if not leg.bid_volume or not leg.ask_volume:
+                break
+        else:
+            spread.calculate_price(pricetick)
+            spread.datetime = tick.datetime
+            yield spread.to_tick()
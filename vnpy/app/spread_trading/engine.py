@@ -7,7 +7,7 @@ from copy import copy
 from pathlib import Path
 from datetime import datetime, timedelta
 
-from vnpy.event import EventEngine, Event
+from vnpy.event import EventEngine, ShardedEventEngine, Event
 from vnpy.trader.engine import BaseEngine, MainEngine
 from vnpy.trader.event import (
     EVENT_TICK, EVENT_POSITION, EVENT_CONTRACT,
@@ -74,6 +74,17 @@ class SpreadEngine(BaseEngine):
         self.algo_engine.stop()
         self.strategy_engine.stop()
 
+    def register_event(self, type: str, handler: Callable) -> None:
+        """
+        Register event handler of spread trading. With ShardedEventEngine,
+        all handlers are called on the same shard since spreads share
+        leg data across symbols.
+        """
+        if isinstance(self.event_engine, ShardedEventEngine):
+            self.event_engine.register(type, handler, APP_NAME)
+        else:
+            self.event_engine.register(type, handler)
+
     def write_log(self, msg: str):
         """"""
         log = LogData(
@@ -155,10 +166,10 @@ class SpreadDataEngine:
 
     def register_event(self) -> None:
         """"""
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
-        self.event_engine.register(EVENT_TRADE, self.process_trade_event)
-        self.event_engine.register(EVENT_POSITION, self.process_position_event)
-        self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
+        self.spread_engine.register_event(EVENT_TICK, self.process_tick_event)
+        self.spread_engine.register_event(EVENT_TRADE, self.process_trade_event)
+        self.spread_engine.register_event(EVENT_POSITION, self.process_position_event)
+        self.spread_engine.register_event(EVENT_CONTRACT, self.process_contract_event)
 
     def process_tick_event(self, event: Event) -> None:
         """"""
@@ -361,12 +372,12 @@ class SpreadAlgoEngine:
 
     def register_event(self):
         """"""
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
-        self.event_engine.register(EVENT_ORDER, self.process_order_event)
-        self.event_engine.register(EVENT_TRADE, self.process_trade_event)
-        self.event_engine.register(EVENT_POSITION, self.process_position_event)
-        self.event_engine.register(EVENT_TIMER, self.process_timer_event)
-        self.event_engine.register(
+        self.spread_engine.register_event(EVENT_TICK, self.process_tick_event)
+        self.spread_engine.register_event(EVENT_ORDER, self.process_order_event)
+        self.spread_engine.register_event(EVENT_TRADE, self.process_trade_event)
+        self.spread_engine.register_event(EVENT_POSITION, self.process_position_event)
+        self.spread_engine.register_event(EVENT_TIMER, self.process_timer_event)
+        self.spread_engine.register_event(
             EVENT_SPREAD_DATA, self.process_spread_event
         )
 
@@ -697,12 +708,12 @@ class SpreadStrategyEngine:
 
     def register_event(self):
         """"""
-        ee = self.event_engine
-        ee.register(EVENT_ORDER, self.process_order_event)
-        ee.register(EVENT_TRADE, self.process_trade_event)
-        ee.register(EVENT_SPREAD_DATA, self.process_spread_data_event)
-        ee.register(EVENT_SPREAD_POS, self.process_spread_pos_event)
-        ee.register(EVENT_SPREAD_ALGO, self.process_spread_algo_event)
+        register_event = self.spread_engine.register_event
+        register_event(EVENT_ORDER, self.process_order_event)
+        register_event(EVENT_TRADE, self.process_trade_event)
+        register_event(EVENT_SPREAD_DATA, self.process_spread_data_event)
+        register_event(EVENT_SPREAD_POS, self.process_spread_pos_event)
+        register_event(EVENT_SPREAD_ALGO, self.process_spread_algo_event)
 
     def process_spread_data_event(self, event: Event):
         """"""
@@ -1 +1,3 @@
-from .engine import Event, EventEngine, EVENT_TIMER
+from .engine import (
+    Event, EventEngine, ShardedEventEngine, EVENT_TIMER, EVENT_MONITOR, get_remote_topic
+)
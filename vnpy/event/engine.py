@@ -4,11 +4,19 @@ Event-driven framework of vn.py framework.
 
 from collections import defaultdict
 from queue import Empty, Queue
-from threading import Thread
-from time import sleep
-from typing import Any, Callable, List
+from threading import Lock, Thread
+from time import sleep, perf_counter
+from zlib import crc32
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from .monitor import EventMonitor
 
 EVENT_TIMER = "eTimer"
+EVENT_MONITOR = "eMonitor"
+
+# Cached routes are cleared when more event types than this are seen, since
+# types with unique suffix (e.g. "eOrder." + vt_orderid) never repeat
+MAX_ROUTE_COUNT = 10000
 
 
 class Event:
@@ -22,11 +30,44 @@ class Event:
         """"""
         self.type: str = type
         self.data: Any = data
+        self.put_time: float = 0    # only set when monitor is enabled
 
 
 # Defines handler function to be used in event engine.
 HandlerType = Callable[[Event], None]
 
+# Defines batch handler function which receives a list of events of one type.
+BatchHandlerType = Callable[[List[Event]], None]
+
+
+def get_topics(type: str) -> List[str]:
+    """
+    Get all topics an event type belongs to, from the most generic to
+    the type itself. Topics are separated by dot, e.g. event type
+    "eTick.IF2012.CFFEX" belongs to "eTick.", "eTick.IF2012." and itself.
+    """
+    topics = []
+
+    index = type.find(".")
+    while index != -1 and index < len(type) - 1:
+        topics.append(type[:index + 1])
+        index = type.find(".", index + 1)
+
+    topics.append(type)
+    return topics
+
+
+def get_remote_topic(type: str) -> str:
+    """
+    Get topic for publishing event of type to remote subscribers, which
+    filter topics by prefix. Topic always ends with dot so that prefix of
+    a vt_symbol does not match others, e.g. "eTick.IF2012.CFE." does not
+    match "eTick.IF2012.CFETS.".
+    """
+    if type.endswith("."):
+        return type
+    return type + "."
+
 
 class EventEngine:
     """
@@ -35,20 +76,43 @@ class EventEngine:
 
     It also generates timer event by every interval seconds,
     which can be used for timing purpose.
+
+    Handlers registered to a topic ending with dot (e.g. "eTick.") also
+    receive events of its sub types (e.g. "eTick.IF2012.CFFEX"), so one
+    event put reaches both generic and specific handlers.
+
+    With batch_size larger than 1, events are drained from queue in
+    batches of up to batch_size with a single lock acquisition.
+
+    Call start_monitor to record queue wait time, handler execution time
+    and queue depth, which costs nothing when not started.
     """
 
-    def __init__(self, interval: int = 1):
+    def __init__(self, interval: int = 1, batch_size: int = 1):
         """
         Timer event is generated every 1 second by default, if
         interval not specified.
         """
         self._interval: int = interval
+        self._batch_size: int = batch_size
         self._queue: Queue = Queue()
         self._active: bool = False
         self._thread: Thread = Thread(target=self._run)
         self._timer: Thread = Thread(target=self._run_timer)
         self._handlers: defaultdict = defaultdict(list)
         self._general_handlers: List = []
+        self._batch_handlers: defaultdict = defaultdict(list)
+
+        # Cache of handlers and batch handler topics for each event type,
+        # cleared whenever any handler is registered or unregistered, or
+        # when it grows over MAX_ROUTE_COUNT.
+        # Lock makes sure a route collected before handlers changed is
+        # never stored into the cache after it is cleared.
+        self._routes: Dict[str, Tuple[List[HandlerType], List[str]]] = {}
+        self._routes_lock: Lock = Lock()
+
+        self._monitor: EventMonitor = None
+        self._monitor_interval: int = 0
 
     def _run(self) -> None:
         """
@@ -57,10 +121,70 @@ class EventEngine:
         while self._active:
             try:
                 event = self._queue.get(block=True, timeout=1)
-                self._process(event)
+
+                if self._batch_size > 1:
+                    events = self._drain(event, self._queue)
+                    self._process_batch(events)
+                else:
+                    self._process(event)
             except Empty:
                 pass
 
+    def _drain(self, item: Any, queue: Queue) -> List[Any]:
+        """
+        Take all items left in queue (up to batch size) under one lock.
+        """
+        items = [item]
+
+        with queue.mutex:
+            data = queue.queue
+            count = min(len(data), self._batch_size - 1)
+
+            for _ in range(count):
+                items.append(data.popleft())
+
+            queue.not_full.notify(count)
+
+        return items
+
+    def _process_batch(self, events: List[Event]) -> None:
+        """
+        Distribute events one by one to normal and general handlers,
+        then distribute events grouped by type to batch handlers.
+
+        Order of events with the same type is kept in each group.
+        """
+        batches = defaultdict(list)
+        monitor = self._monitor
+
+        for event in events:
+            route = self._routes.get(event.type, None)
+            if route is None:
+                route = self._route(event.type)
+            handlers, batch_topics = route
+
+            if monitor:
+                monitor.record_wait(event)
+                monitor.process(event, handlers)
+                monitor.process(event, self._general_handlers)
+            else:
+                if handlers:
+                    [handler(event) for handler in handlers]
+
+                if self._general_handlers:
+                    [handler(event) for handler in self._general_handlers]
+
+            for topic in batch_topics:
+                batches[topic].append(event)
+
+        for topic, batch in batches.items():
+            handlers = self._batch_handlers.get(topic, [])
+
+            if monitor:
+                monitor.process_batch(batch, handlers)
+            else:
+                [handler(batch) for handler in handlers]
+
     def _process(self, event: Event) -> None:
         """
         First ditribute event to those handlers registered listening
@@ -69,21 +193,80 @@ class EventEngine:
         Then distrubute event to those general handlers which listens
         to all types.
         """
-        if event.type in self._handlers:
-            [handler(event) for handler in self._handlers[event.type]]
+        route = self._routes.get(event.type, None)
+        if route is None:
+            route = self._route(event.type)
+        handlers, batch_topics = route
+
+        monitor = self._monitor
+        if monitor:
+            monitor.record_wait(event)
+            monitor.process(event, handlers)
+            monitor.process(event, self._general_handlers)
+        else:
+            if handlers:
+                [handler(event) for handler in handlers]
+
+            if self._general_handlers:
+                [handler(event) for handler in self._general_handlers]
+
+        for topic in batch_topics:
+            batch = [event]
+            handlers = self._batch_handlers.get(topic, [])
+
+            if monitor:
+                monitor.process_batch(batch, handlers)
+            else:
+                [handler(batch) for handler in handlers]
+
+    def _route(self, type: str) -> Tuple[List[HandlerType], List[str]]:
+        """
+        Collect handlers of all topics the event type belongs to,
+        and cache the result for later events of the same type.
+        """
+        with self._routes_lock:
+            handlers = []
+            batch_topics = []
+
+            for topic in get_topics(type):
+                handlers.extend(self._handlers.get(topic, []))
+
+                if topic in self._batch_handlers:
+                    batch_topics.append(topic)
 
-        if self._general_handlers:
-            [handler(event) for handler in self._general_handlers]
+            route = (handlers, batch_topics)
+
+            if len(self._routes) >= MAX_ROUTE_COUNT:
+                self._routes = {}
+            self._routes[type] = route
+
+        return route
+
+    def _clear_routes(self) -> None:
+        """
+        Clear cached routes after handlers changed.
+        """
+        with self._routes_lock:
+            self._routes = {}
 
     def _run_timer(self) -> None:
         """
         Sleep by interval second(s) and then generate a timer event.
         """
+        count = 0
+
         while self._active:
             sleep(self._interval)
             event = Event(EVENT_TIMER)
             self.put(event)
 
+            if self._monitor and self._monitor_interval:
+                count += 1
+                if count >= self._monitor_interval:
+                    count = 0
+                    event = Event(EVENT_MONITOR, self.get_monitor_snapshot())
+                    self.put(event)
+
     def start(self) -> None:
         """
         Start event engine to process events and generate timer events.
@@ -104,8 +287,41 @@ class EventEngine:
         """
         Put an event object into event queue.
         """
+        monitor = self._monitor
+        if monitor:
+            event.put_time = perf_counter()
+            monitor.update_queue_size(self._queue.qsize() + 1)
+
         self._queue.put(event)
 
+    def start_monitor(self, interval: int = 0) -> None:
+        """
+        Start recording latency statistics. If interval is given,
+        a monitor event with statistics snapshot is put every interval
+        timer events.
+        """
+        self._monitor_interval = interval
+
+        if not self._monitor:
+            self._monitor = EventMonitor()
+
+    def stop_monitor(self) -> None:
+        """
+        Stop recording latency statistics, recorded data is dropped.
+        """
+        self._monitor = None
+
+    def get_monitor_snapshot(self) -> Dict[str, Any]:
+        """
+        Get snapshot of queue wait time (by event topic), handler
+        execution time (by event topic and handler) in microseconds,
+        and queue depth.
+        """
+        monitor = self._monitor
+        if not monitor:
+            return {}
+        return monitor.get_snapshot()
+
     def register(self, type: str, handler: HandlerType) -> None:
         """
         Register a new handler function for a specific event type. Every
@@ -115,6 +331,8 @@ class EventEngine:
         if handler not in handler_list:
             handler_list.append(handler)
 
+        self._clear_routes()
+
     def unregister(self, type: str, handler: HandlerType) -> None:
         """
         Unregister an existing handler function from event engine.
@@ -127,6 +345,8 @@ class EventEngine:
         if not handler_list:
             self._handlers.pop(type)
 
+        self._clear_routes()
+
     def register_general(self, handler: HandlerType) -> None:
         """
         Register a new handler function for all event types. Every
@@ -141,3 +361,324 @@ class EventEngine:
         """
         if handler in self._general_handlers:
             self._general_handlers.remove(handler)
+
+    def register_batch(self, type: str, handler: BatchHandlerType) -> None:
+        """
+        Register a new batch handler function for a specific event type,
+        which is called with a list of events of this type.
+        """
+        handler_list = self._batch_handlers[type]
+        if handler not in handler_list:
+            handler_list.append(handler)
+
+        self._clear_routes()
+
+    def unregister_batch(self, type: str, handler: BatchHandlerType) -> None:
+        """
+        Unregister an existing batch handler function.
+        """
+        handler_list = self._batch_handlers[type]
+
+        if handler in handler_list:
+            handler_list.remove(handler)
+
+        if not handler_list:
+            self._batch_handlers.pop(type)
+
+        self._clear_routes()
+
+
+class ShardedEventEngine(EventEngine):
+    """
+    Event engine which distributes events to several worker threads
+    (shards), so that one slow handler only blocks events of its own shard.
+
+    By default all handlers of the same owner (e.g. methods of one app
+    engine, timer handler included) are called on the same shard, so an
+    app written for single threaded event engine needs no change, while
+    different apps run in parallel. Order of events within a shard is
+    guaranteed.
+
+    A handler can also declare a key when registering, then it is called
+    on the shard of that key, so that handlers of several owners sharing
+    data can run on the same shard. Or it can be registered as parallel,
+    then it is called on the shard which vt_symbol of event data is
+    hashed to (timer event on timer thread), which means it may run
+    concurrently for different symbols and must be thread safe.
+
+    Batch handlers receive events drained from its shard queue in batches
+    of up to batch_size. Queue depth recorded by monitor is the depth of
+    each shard queue.
+    """
+
+    def __init__(self, interval: int = 1, shard_count: int = 4, batch_size: int = 1):
+        """"""
+        super().__init__(interval, batch_size)
+
+        self._shard_count: int = shard_count
+        self._shard_queues: List[Queue] = [Queue() for _ in range(shard_count)]
+        self._shard_threads: List[Thread] = [
+            Thread(target=self._run_shard, args=(queue,))
+            for queue in self._shard_queues
+        ]
+
+        # (type, handler): key declared when registering
+        self._handler_keys: Dict[Tuple[str, Callable], str] = {}
+        # (type, handler) registered as parallel
+        self._parallel_handlers: Set[Tuple[str, HandlerType]] = set()
+        # key: queue of shard
+        self._key_queues: Dict[str, Queue] = {}
+        # id of handler owner: queue of shard, assigned in turn
+        self._owner_queues: Dict[int, Queue] = {}
+        # type: list of (handler, queue, batch topic), queue is None if
+        # handler is parallel, batch topic is None for normal handler
+        self._shard_routes: Dict[str, List[Tuple[Callable, Queue, str]]] = {}
+
+    def _run(self) -> None:
+        """
+        Process timer events (and parallel handlers of timer event).
+        """
+        self._run_shard(self._queue)
+
+    def _run_shard(self, queue: Queue) -> None:
+        """
+        Get event with handlers to call from shard queue and process.
+        """
+        while self._active:
+            try:
+                item = queue.get(block=True, timeout=1)
+            except Empty:
+                continue
+
+            if self._batch_size > 1:
+                items = self._drain(item, queue)
+            else:
+                items = [item]
+
+            self._process_shard(items)
+
+    def _process_shard(
+        self,
+        items: List[Tuple[Event, List[HandlerType], List[Tuple[str, BatchHandlerType]]]]
+    ) -> None:
+        """
+        Call normal handlers event by event, then call each batch handler
+        with events of its topic.
+        """
+        batches = defaultdict(list)
+        monitor = self._monitor
+
+        for event, handlers, batch_handlers in items:
+            if monitor:
+                monitor.record_wait(event)
+                monitor.process(event, handlers)
+            else:
+                [handler(event) for handler in handlers]
+
+            for topic_handler in batch_handlers:
+                batches[topic_handler].append(event)
+
+        for (topic, handler), batch in batches.items():
+            if monitor:
+                monitor.process_batch(batch, [handler])
+            else:
+                handler(batch)
+
+    def _get_queue(self, key: str) -> Queue:
+        """
+        Get queue of the shard which the key is hashed to.
+        """
+        queue = self._key_queues.get(key, None)
+
+        if queue is None:
+            ix = crc32(key.encode()) % self._shard_count
+            queue = self._key_queues.setdefault(key, self._shard_queues[ix])
+
+        return queue
+
+    def _get_owner_queue(self, handler: Callable) -> Queue:
+        """
+        Get queue of the shard assigned to owner of handler (the object
+        of bound method, or the function itself). Called with routes lock.
+        """
+        owner = getattr(handler, "__self__", handler)
+        queue = self._owner_queues.get(id(owner), None)
+
+        if queue is None:
+            ix = len(self._owner_queues) % self._shard_count
+            queue = self._shard_queues[ix]
+            self._owner_queues[id(owner)] = queue
+
+        return queue
+
+    def _get_handler_queue(self, type: str, handler: Callable) -> Queue:
+        """
+        Get queue of shard where handler is called, None if parallel.
+        """
+        if (type, handler) in self._parallel_handlers:
+            return None
+
+        key = self._handler_keys.get((type, handler), None)
+        if key is not None:
+            return self._get_queue(key)
+
+        return self._get_owner_queue(handler)
+
+    def _route_shard(self, type: str) -> List[Tuple[Callable, Queue, str]]:
+        """
+        Collect handlers of all topics the event type belongs to, with
+        the queue of shard each handler is called on.
+        """
+        with self._routes_lock:
+            route = []
+
+            for topic in get_topics(type):
+                for handler in self._handlers.get(topic, []):
+                    queue = self._get_handler_queue(topic, handler)
+                    route.append((handler, queue, None))
+
+                for handler in self._batch_handlers.get(topic, []):
+                    queue = self._get_handler_queue(topic, handler)
+                    route.append((handler, queue, topic))
+
+            for handler in self._general_handlers:
+                queue = self._get_handler_queue("", handler)
+                route.append((handler, queue, None))
+
+            if len(self._shard_routes) >= MAX_ROUTE_COUNT:
+                self._shard_routes = {}
+            self._shard_routes[type] = route
+
+        return route
+
+    def _clear_routes(self) -> None:
+        """"""
+        with self._routes_lock:
+            self._routes = {}
+            self._shard_routes = {}
+
+    def start(self) -> None:
+        """
+        Start event engine with all shard threads.
+        """
+        self._active = True
+        self._thread.start()
+        self._timer.start()
+
+        for thread in self._shard_threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop event engine and wait for all shard threads to exit.
+        """
+        super().stop()
+
+        for thread in self._shard_threads:
+            thread.join()
+
+    def put(self, event: Event) -> None:
+        """
+        Put event with its handlers into queues of shards.
+        """
+        route = self._shard_routes.get(event.type, None)
+        if route is None:
+            route = self._route_shard(event.type)
+
+        if not route:
+            return
+
+        if event.type == EVENT_TIMER:
+            event_queue = self._queue
+        else:
+            vt_symbol = getattr(event.data, "vt_symbol", "")
+            event_queue = self._get_queue(vt_symbol)
+
+        # queue: (handlers, (topic, batch handler) list)
+        queue_items = {}
+        for handler, queue, topic in route:
+            if queue is None:
+                queue = event_queue
+
+            item = queue_items.get(queue, None)
+            if item is None:
+                item = queue_items[queue] = ([], [])
+
+            if topic is None:
+                item[0].append(handler)
+            else:
+                item[1].append((topic, handler))
+
+        monitor = self._monitor
+        if monitor:
+            event.put_time = perf_counter()
+
+        for queue, (handlers, batch_handlers) in queue_items.items():
+            if monitor:
+                monitor.update_queue_size(queue.qsize() + 1)
+            queue.put((event, handlers, batch_handlers))
+
+    def _set_handler_key(
+        self,
+        type: str,
+        handler: Callable,
+        key: str = None,
+        parallel: bool = False
+    ) -> None:
+        """
+        Record how the handler is assigned to shard.
+        """
+        with self._routes_lock:
+            self._handler_keys.pop((type, handler), None)
+            self._parallel_handlers.discard((type, handler))
+
+            if key is not None:
+                self._handler_keys[(type, handler)] = key
+            elif parallel:
+                self._parallel_handlers.add((type, handler))
+
+    def register(
+        self,
+        type: str,
+        handler: HandlerType,
+        key: str = None,
+        parallel: bool = False
+    ) -> None:
+        """
+        Register a new handler function for a specific event type. If key
+        is given, the handler is always called on the shard of this key.
+        If parallel, the handler is called on the shard of event vt_symbol.
+        Otherwise it is called on the shard of its owner.
+        """
+        self._set_handler_key(type, handler, key, parallel)
+        super().register(type, handler)
+
+    def unregister(self, type: str, handler: HandlerType) -> None:
+        """"""
+        super().unregister(type, handler)
+        self._set_handler_key(type, handler)
+
+    def register_general(self, handler: HandlerType, key: str = None) -> None:
+        """"""
+        self._set_handler_key("", handler, key)
+        super().register_general(handler)
+        self._clear_routes()
+
+    def unregister_general(self, handler: HandlerType) -> None:
+        """"""
+        super().unregister_general(handler)
+        self._set_handler_key("", handler)
+        self._clear_routes()
+
+    def register_batch(self, type: str, handler: BatchHandlerType, key: str = None) -> None:
+        """
+        Register a new batch handler function for a specific event type,
+        called on the shard of key if given, or shard of its owner.
+        """
+        self._set_handler_key(type, handler, key)
+        super().register_batch(type, handler)
+
+    def unregister_batch(self, type: str, handler: BatchHandlerType) -> None:
+        """"""
+        super().unregister_batch(type, handler)
+        self._set_handler_key(type, handler)
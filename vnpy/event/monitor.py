@@ -0,0 +1,203 @@
+"""
+Latency and queue depth instrumentation of event engine.
+"""
+
+from collections import Counter, defaultdict
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple
+
+
+BUCKET_COUNT = 32
+
+
+def get_root_topic(type: str) -> str:
+    """
+    Get the most generic topic of event type, e.g. "eTick." for
+    "eTick.IF2012.CFFEX", so that statistics are not split by symbol.
+    """
+    index = type.find(".")
+    if index == -1:
+        return type
+    return type[:index + 1]
+
+
+def get_handler_name(handler: Callable, unique: bool = False) -> str:
+    """
+    Get readable name of handler function. If unique, id of the object
+    which handler is bound to is added to tell instances of the same
+    class apart.
+    """
+    name = getattr(handler, "__qualname__", repr(handler))
+
+    if unique:
+        owner = getattr(handler, "__self__", handler)
+        name = f"{name}@{id(owner):x}"
+
+    return name
+
+
+class LatencyHistogram:
+    """
+    Histogram of latency in microseconds, bucket i counts samples
+    between 2 ** (i - 1) and 2 ** i microseconds.
+    """
+
+    def __init__(self):
+        """"""
+        self.count: int = 0
+        self.total: float = 0
+        self.max: float = 0
+        self.buckets: List[int] = [0] * BUCKET_COUNT
+
+    def add(self, seconds: float) -> None:
+        """
+        Add a new latency sample.
+        """
+        us = seconds * 1_000_000
+
+        self.count += 1
+        self.total += us
+        if us > self.max:
+            self.max = us
+
+        ix = min(int(us).bit_length(), BUCKET_COUNT - 1)
+        self.buckets[ix] += 1
+
+    def percentile(self, percent: float) -> float:
+        """
+        Get upper bound (in microseconds) of the bucket where the
+        percentile falls.
+        """
+        target = self.count * percent / 100
+        accumulated = 0
+
+        for ix, n in enumerate(self.buckets):
+            accumulated += n
+            if accumulated >= target:
+                return min(2 ** ix, self.max)
+
+        return self.max
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """"""
+        if self.count:
+            mean = self.total / self.count
+        else:
+            mean = 0
+
+        return {
+            "count": self.count,
+            "mean": mean,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "buckets": list(self.buckets)
+        }
+
+
+class EventMonitor:
+    """
+    Record queue wait time of events, execution time of handlers and
+    high water mark of queue depth.
+
+    Statistics are updated under lock, since events may be processed on
+    several threads (e.g. shards of ShardedEventEngine). Handlers are
+    called outside of the lock.
+    """
+
+    def __init__(self):
+        """"""
+        self.lock: Lock = Lock()
+
+        self.wait_histograms: Dict[str, LatencyHistogram] = defaultdict(
+            LatencyHistogram
+        )
+        self.handler_histograms: Dict[Tuple[str, Callable], LatencyHistogram] = defaultdict(
+            LatencyHistogram
+        )
+        self.queue_size: int = 0
+        self.queue_high_water: int = 0
+
+    def update_queue_size(self, size: int) -> None:
+        """
+        Update queue depth when event is put.
+        """
+        with self.lock:
+            self.queue_size = size
+            if size > self.queue_high_water:
+                self.queue_high_water = size
+
+    def process(self, event: Any, handlers: List[Callable]) -> None:
+        """
+        Call handlers with event and record time cost of each handler.
+        """
+        self.call_handlers(get_root_topic(event.type), event, handlers)
+
+    def process_batch(self, events: List[Any], handlers: List[Callable]) -> None:
+        """
+        Call batch handlers with events and record time cost of each
+        handler.
+        """
+        self.call_handlers(get_root_topic(events[0].type), events, handlers)
+
+    def call_handlers(self, topic: str, data: Any, handlers: List[Callable]) -> None:
+        """
+        Call handlers with data, time cost is recorded by topic and
+        handler object so that instances of the same class are separated.
+        """
+        for handler in handlers:
+            start = perf_counter()
+            handler(data)
+            cost = perf_counter() - start
+
+            with self.lock:
+                self.handler_histograms[(topic, handler)].add(cost)
+
+    def record_wait(self, event: Any) -> None:
+        """
+        Record time cost between event put and processed.
+        """
+        if not event.put_time:
+            return
+
+        topic = get_root_topic(event.type)
+        cost = perf_counter() - event.put_time
+
+        with self.lock:
+            self.wait_histograms[topic].add(cost)
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        """
+        Get current statistics in dict.
+        """
+        with self.lock:
+            wait = {
+                topic: histogram.get_snapshot()
+                for topic, histogram in self.wait_histograms.items()
+            }
+
+            handler_histograms = {
+                key: histogram.get_snapshot()
+                for key, histogram in self.handler_histograms.items()
+            }
+
+            queue_size = self.queue_size
+            queue_high_water = self.queue_high_water
+
+        # Names made unique only if handlers share the same name
+        name_count = Counter(
+            (topic, get_handler_name(handler)) for topic, handler in handler_histograms
+        )
+
+        handler = defaultdict(dict)
+        for (topic, func), snapshot in handler_histograms.items():
+            unique = name_count[(topic, get_handler_name(func))] > 1
+            handler[topic][get_handler_name(func, unique)] = snapshot
+
+        return {
+            "queue_size": queue_size,
+            "queue_high_water": queue_high_water,
+            "wait": wait,
+            "handler": dict(handler)
+        }
@@ -1,4 +1,4 @@
-from vnpy.event import Event
+from vnpy.event import Event, get_remote_topic
 from vnpy.rpc import RpcClient
 from vnpy.trader.gateway import BaseGateway
 from vnpy.trader.object import (
@@ -7,6 +7,26 @@ from vnpy.trader.object import (
     OrderRequest
 )
 from vnpy.trader.constant import Exchange
+from vnpy.trader.event import (
+    EVENT_TICK,
+    EVENT_ORDER,
+    EVENT_TRADE,
+    EVENT_POSITION,
+    EVENT_ACCOUNT,
+    EVENT_CONTRACT,
+    EVENT_LOG
+)
+
+
+# Tick topics are only subscribed for symbols subscribed by gateway
+SUBSCRIBED_EVENTS = [
+    EVENT_ORDER,
+    EVENT_TRADE,
+    EVENT_POSITION,
+    EVENT_ACCOUNT,
+    EVENT_CONTRACT,
+    EVENT_LOG
+]
 
 
 class RpcGateway(BaseGateway):
@@ -35,7 +55,8 @@ class RpcGateway(BaseGateway):
         req_address = setting["主动请求地址"]
         pub_address = setting["推送订阅地址"]
 
-        self.client.subscribe_topic("")
+        for event_type in SUBSCRIBED_EVENTS:
+            self.client.subscribe_topic(get_remote_topic(event_type))
         self.client.start(req_address, pub_address)
 
         self.write_log("服务器连接成功，开始初始化查询")
@@ -47,6 +68,8 @@ class RpcGateway(BaseGateway):
         gateway_name = self.symbol_gateway_map.get(req.vt_symbol, "")
         self.client.subscribe(req, gateway_name)
 
+        self.client.subscribe_topic(get_remote_topic(EVENT_TICK + req.vt_symbol))
+
     def send_order(self, req: OrderRequest):
         """"""
         gateway_name = self.symbol_gateway_map.get(req.vt_symbol, "")
@@ -12,6 +12,8 @@ import zmq.auth
 from zmq.backend.cython.constants import NOBLOCK
 from zmq.auth.thread import ThreadAuthenticator
 
+from .codec import BaseCodec, BinaryCodec, PickleCodec, PICKLE_MAGIC
+
 
 # Achieve Ctrl-c interrupt recv
 signal.signal(signal.SIGINT, signal.SIG_DFL)
@@ -21,6 +23,10 @@ KEEP_ALIVE_TOPIC: str = "_keep_alive"
 KEEP_ALIVE_INTERVAL: timedelta = timedelta(seconds=1)
 KEEP_ALIVE_TOLERANCE: timedelta = timedelta(seconds=3)
 
+# Server of older version publishes pickled [topic, data] in one frame,
+# which always starts with pickle magic byte
+LEGACY_PUB_PREFIX: bytes = bytes([PICKLE_MAGIC])
+
 
 class RemoteException(Exception):
     """
@@ -41,12 +47,21 @@ class RemoteException(Exception):
 
 
 class RpcServer:
-    """"""
+    """
+    Messages are pickled by default, same as RpcServer of older version.
+    BinaryCodec is opt-in and must be passed to both RpcServer and
+    RpcClient, since client of older version can only decode pickle.
+    """
 
-    def __init__(self):
+    def __init__(self, codec: BaseCodec = None):
         """
         Constructor
         """
+        # Codec used to convert message into bytes
+        if not codec:
+            codec = PickleCodec()
+        self.codec: BaseCodec = codec
+
         # Save functions dict: key is fuction name, value is fuction object
         self.__functions: Dict[str, Any] = {}
 
@@ -149,7 +164,7 @@ class RpcServer:
                 continue
 
             # Receive request data from Reply socket
-            req = self.__socket_rep.recv_pyobj()
+            req = self.codec.decode(self.__socket_rep.recv())
 
             # Get function name and parameters
             name, args, kwargs = req
@@ -163,7 +178,7 @@ class RpcServer:
                 rep = [False, traceback.format_exc()]
 
             # send callable response by Reply socket
-            self.__socket_rep.send_pyobj(rep)
+            self.__socket_rep.send(self.codec.encode(rep))
 
         # Unbind socket address
         self.__socket_pub.unbind(self.__socket_pub.LAST_ENDPOINT)
@@ -171,10 +186,17 @@ class RpcServer:
 
     def publish(self, topic: str, data: Any) -> None:
         """
-        Publish data
+        Publish data. Topic is sent as a separate frame, so that
+        subscribers filter topics by prefix before decoding data.
+
+        Client of older version (which expects one pickled frame) cannot
+        receive data published in this format, no matter which codec is
+        used, and should be upgraded together with the server.
         """
+        msg = [topic.encode("utf-8"), self.codec.encode(data)]
+
         with self.__lock:
-            self.__socket_pub.send_pyobj([topic, data])
+            self.__socket_pub.send_multipart(msg)
 
     def register(self, func: Callable) -> None:
         """
@@ -190,10 +212,18 @@ class RpcServer:
 
 
 class RpcClient:
-    """"""
+    """
+    Codec must be the same as the one used by RpcServer. Data published
+    by RpcServer of older version (one pickled frame) is still accepted.
+    """
 
-    def __init__(self):
+    def __init__(self, codec: BaseCodec = None):
         """Constructor"""
+        # Codec used to convert message into bytes, same as RpcServer
+        if not codec:
+            codec = PickleCodec()
+        self.codec: BaseCodec = codec
+
         # zmq port related
         self.__context: zmq.Context = zmq.Context()
 
@@ -203,10 +233,21 @@ class RpcClient:
         # Subscribe socket (Publish–subscribe pattern)
         self.__socket_sub: zmq.Socket = self.__context.socket(zmq.SUB)
 
+        # Control sockets (Exclusive pair pattern), used to pass topic
+        # subscription to RpcClient thread which owns subscribe socket
+        control_address = f"inproc://rpc_client_control_{id(self)}"
+
+        self.__socket_control_recv: zmq.Socket = self.__context.socket(zmq.PAIR)
+        self.__socket_control_recv.bind(control_address)
+
+        self.__socket_control_send: zmq.Socket = self.__context.socket(zmq.PAIR)
+        self.__socket_control_send.connect(control_address)
+
         # Worker thread relate, used to process data pushed from server
         self.__active: bool = False                 # RpcClient status
         self.__thread: threading.Thread = None      # RpcClient thread
         self.__lock: threading.Lock = threading.Lock()
+        self.__control_lock: threading.Lock = threading.Lock()
 
         # Authenticator used to ensure data security
         self.__authenticator: ThreadAuthenticator = None
@@ -225,9 +266,11 @@ class RpcClient:
             req = [name, args, kwargs]
 
             # Send request and wait for response
+            msg = self.codec.encode(req)
+
             with self.__lock:
-                self.__socket_req.send_pyobj(req)
-                rep = self.__socket_req.recv_pyobj()
+                self.__socket_req.send(msg)
+                rep = self.codec.decode(self.__socket_req.recv())
 
             # Return response if successed; Trigger exception if failed
             if rep[0]:
@@ -270,6 +313,12 @@ class RpcClient:
             self.__socket_req.curve_publickey = publickey
             self.__socket_req.curve_serverkey = serverkey
 
+        # Keep alive topic is always subscribed
+        self.subscribe_topic(KEEP_ALIVE_TOPIC)
+
+        # Data of legacy server cannot be filtered by topic
+        self.__socket_sub.setsockopt(zmq.SUBSCRIBE, LEGACY_PUB_PREFIX)
+
         # Connect zmq port
         self.__socket_req.connect(req_address)
         self.__socket_sub.connect(sub_address)
@@ -277,9 +326,11 @@ class RpcClient:
         # Start RpcClient status
         self.__active = True
 
-        # Start RpcClient thread
-        self.__thread = threading.Thread(target=self.run)
-        self.__thread.start()
+        # Start RpcClient thread, topic subscription is passed to the
+        # thread after it starts
+        with self.__control_lock:
+            self.__thread = threading.Thread(target=self.run)
+            self.__thread.start()
 
         self._last_received_ping = datetime.utcnow()
 
@@ -305,13 +356,33 @@ class RpcClient:
         """
         pull_tolerance = int(KEEP_ALIVE_TOLERANCE.total_seconds() * 1000)
 
+        poller = zmq.Poller()
+        poller.register(self.__socket_sub, zmq.POLLIN)
+        poller.register(self.__socket_control_recv, zmq.POLLIN)
+
         while self.__active:
-            if not self.__socket_sub.poll(pull_tolerance):
+            events = dict(poller.poll(pull_tolerance))
+            if not events:
                 self._on_unexpected_disconnected()
                 continue
 
+            # Apply topic subscription requested by other threads
+            if self.__socket_control_recv in events:
+                self._process_control()
+
+            if self.__socket_sub not in events:
+                continue
+
             # Receive data from subscribe socket
-            topic, data = self.__socket_sub.recv_pyobj(flags=NOBLOCK)
+            frames = self.__socket_sub.recv_multipart(flags=NOBLOCK)
+
+            if len(frames) == 1:
+                # Pickled [topic, data] published by legacy server
+                topic, data = self.codec.decode(frames[0])
+            else:
+                topic, msg = frames
+                topic = topic.decode("utf-8")
+                data = self.codec.decode(msg)
 
             if topic == KEEP_ALIVE_TOPIC:
                 self._last_received_ping = data
@@ -323,6 +394,22 @@ class RpcClient:
         self.__socket_req.close()
         self.__socket_sub.close()
 
+        with self.__control_lock:
+            self.__socket_control_send.close()
+        self.__socket_control_recv.close()
+
+    def _process_control(self) -> None:
+        """
+        Set subscription of all topics received from control socket
+        """
+        while True:
+            try:
+                option, topic = self.__socket_control_recv.recv_multipart(flags=NOBLOCK)
+            except zmq.Again:
+                return
+
+            self.__socket_sub.setsockopt(int(option), topic)
+
     @staticmethod
     def _on_unexpected_disconnected():
         print("RpcServer has no response over {tolerance} seconds, please check you connection."
@@ -336,9 +423,28 @@ class RpcClient:
 
     def subscribe_topic(self, topic: str) -> None:
         """
-        Subscribe data
+        Subscribe data of topics starting with topic string
+        """
+        self._set_subscription(zmq.SUBSCRIBE, topic)
+
+    def unsubscribe_topic(self, topic: str) -> None:
+        """
+        Unsubscribe data
+        """
+        self._set_subscription(zmq.UNSUBSCRIBE, topic)
+
+    def _set_subscription(self, option: int, topic: str) -> None:
+        """
+        Zmq socket is not thread safe, so subscription is set directly
+        before RpcClient thread starts, otherwise sent to the thread.
         """
-        self.__socket_sub.setsockopt_string(zmq.SUBSCRIBE, topic)
+        with self.__control_lock:
+            if not self.__thread:
+                self.__socket_sub.setsockopt_string(option, topic)
+            elif not self.__socket_control_send.closed:
+                self.__socket_control_send.send_multipart(
+                    [str(option).encode("utf-8"), topic.encode("utf-8")]
+                )
 
 
 def generate_certificates(name: str) -> None:
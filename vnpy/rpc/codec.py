@@ -0,0 +1,741 @@
+"""
+Codecs used by RpcServer and RpcClient to convert messages into bytes.
+
+BinaryCodec encodes vn.py data objects with a compact schema (no field
+names, numbers packed by struct, enums by index) and any other object
+with pickle. Both sides of the connection must register same classes
+in same order.
+
+PickleCodec is the default, which keeps compatible with RpcServer and
+RpcClient of older version. BinaryCodec only decodes pickle but never
+encodes it, so peer of older version cannot read its messages.
+"""
+
+import pickle
+from dataclasses import fields, is_dataclass, MISSING
+from datetime import datetime, timedelta
+from enum import Enum
+from operator import getitem, itemgetter
+from struct import Struct, error as StructError
+from typing import Any, Callable, Dict, List, Tuple
+
+from vnpy.event import Event
+from vnpy.trader import constant, object as trader_object
+
+
+PICKLE_PROTOCOL: int = pickle.HIGHEST_PROTOCOL
+
+# First byte of message encoded by BinaryCodec
+BINARY_MAGIC: int = 0xB1
+
+# First byte of message pickled with protocol 2 or higher
+PICKLE_MAGIC: int = 0x80
+
+# Tag of value in binary message
+TAG_NONE: int = 0
+TAG_TRUE: int = 1
+TAG_FALSE: int = 2
+TAG_INT: int = 3
+TAG_FLOAT: int = 4
+TAG_STR: int = 5
+TAG_BYTES: int = 6
+TAG_LIST: int = 7
+TAG_TUPLE: int = 8
+TAG_DICT: int = 9
+TAG_DATETIME: int = 10
+TAG_ENUM: int = 11
+TAG_EVENT: int = 12
+TAG_OBJECT: int = 13
+TAG_PICKLE: int = 14
+
+# Kind of attribute in schema
+KIND_NUMBER: int = 0
+KIND_BOOL: int = 1
+KIND_ENUM: int = 2
+KIND_DATETIME: int = 3
+KIND_STR: int = 4
+KIND_VALUE: int = 5
+
+# Integers in float fields are only kept exact within double precision
+MAX_EXACT_INT: int = 2 ** 53
+
+# Datetime is stored as microseconds (with fold) since epoch, naive clock
+EPOCH: datetime = datetime(1970, 1, 1)
+EPOCH_ORDINAL: int = EPOCH.toordinal()
+NULL_DATETIME: int = -2 ** 63
+
+# Strs of object are joined by separator
+STR_SEPARATOR: str = "\0"
+
+BOOL_TYPES: set = {bool}
+STR_TYPES: set = {str}
+
+TAG_STRUCT: Struct = Struct("<B")
+INT_STRUCT: Struct = Struct("<Bq")
+FLOAT_STRUCT: Struct = Struct("<Bd")
+SIZE_STRUCT: Struct = Struct("<BI")
+ENUM_STRUCT: Struct = Struct("<BHH")
+OBJECT_STRUCT: Struct = Struct("<BH")
+DATETIME_STRUCT: Struct = Struct("<BqB")
+UNSIGNED_STRUCT: Struct = Struct("<I")
+DOUBLE_STRUCT: Struct = Struct("<d")
+EVENT_STRUCT: Struct = Struct("<BdI")
+
+
+class SchemaError(Exception):
+    """
+    Object cannot be encoded with schema of its class.
+    """
+    pass
+
+
+# Errors raised when encoding object not matching its schema
+ENCODE_ERRORS: tuple = (
+    SchemaError, KeyError, TypeError, ValueError,
+    AttributeError, OverflowError, StructError
+)
+
+
+class BaseCodec:
+    """
+    Convert message object to bytes and back.
+    """
+
+    def encode(self, obj: Any) -> bytes:
+        """"""
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        """"""
+        raise NotImplementedError
+
+
+class PickleCodec(BaseCodec):
+    """
+    Codec using pickle for all objects.
+    """
+
+    def encode(self, obj: Any) -> bytes:
+        """"""
+        return pickle.dumps(obj, PICKLE_PROTOCOL)
+
+    def decode(self, data: bytes) -> Any:
+        """"""
+        return pickle.loads(data)
+
+
+def create_getter(names: List[str]) -> Callable[[dict], tuple]:
+    """
+    Create function to get values of names from dict as a tuple.
+    """
+    if not names:
+        return lambda d: ()
+    elif len(names) == 1:
+        name = names[0]
+        return lambda d: (d[name],)
+    else:
+        return itemgetter(*names)
+
+
+def get_attribute_kind(value_type: type) -> int:
+    """"""
+    if value_type is bool:
+        return KIND_BOOL
+    elif value_type in (float, int):
+        return KIND_NUMBER
+    elif value_type is str:
+        return KIND_STR
+    elif value_type is datetime:
+        return KIND_DATETIME
+    elif isinstance(value_type, type) and issubclass(value_type, Enum):
+        return KIND_ENUM
+    return KIND_VALUE
+
+
+def get_dummy_value(value_type: type) -> Any:
+    """
+    Get value used for creating dummy object of dataclass.
+    """
+    if value_type in (bool, float, int, str):
+        return value_type()
+    elif value_type is datetime:
+        return EPOCH
+    elif isinstance(value_type, type) and issubclass(value_type, Enum):
+        return list(value_type)[0]
+    return None
+
+
+class DataSchema:
+    """
+    Binary layout of all attributes of a dataclass object, including
+    those created in __post_init__.
+    """
+
+    def __init__(self, codec: "BinaryCodec", cls: type, class_id: int):
+        """"""
+        self.codec: "BinaryCodec" = codec
+        self.cls: type = cls
+        self.class_id: int = class_id
+
+        # Create dummy object to find attributes created in __post_init__
+        kinds: Dict[str, int] = {}
+        enum_types: Dict[str, type] = {}
+        kwargs: dict = {}
+
+        for field in fields(cls):
+            if field.default is MISSING and field.default_factory is MISSING:
+                kwargs[field.name] = get_dummy_value(field.type)
+
+            kinds[field.name] = get_attribute_kind(field.type)
+            if kinds[field.name] == KIND_ENUM:
+                enum_types[field.name] = field.type
+
+        dummy = cls(**kwargs)
+
+        for name, value in dummy.__dict__.items():
+            if name not in kinds:
+                kinds[name] = get_attribute_kind(type(value))
+                if kinds[name] == KIND_ENUM:
+                    enum_types[name] = type(value)
+
+        # Attributes in order of object dict
+        self.names: List[str] = list(dummy.__dict__.keys())
+        self.size: int = len(self.names)
+
+        groups: Dict[int, List[str]] = {kind: [] for kind in range(KIND_VALUE + 1)}
+        for name in self.names:
+            groups[kinds[name]].append(name)
+
+        self.number_names: List[str] = groups[KIND_NUMBER]
+        self.bool_names: List[str] = groups[KIND_BOOL]
+        self.enum_names: List[str] = groups[KIND_ENUM]
+        self.datetime_names: List[str] = groups[KIND_DATETIME]
+        self.str_names: List[str] = groups[KIND_STR]
+        self.value_names: List[str] = groups[KIND_VALUE]
+
+        self.get_numbers = create_getter(self.number_names)
+        self.get_bools = create_getter(self.bool_names)
+        self.get_enums = create_getter(self.enum_names)
+        self.get_datetimes = create_getter(self.datetime_names)
+        self.get_strs = create_getter(self.str_names)
+        self.get_values = create_getter(self.value_names)
+
+        # Enum is stored as index, and None as number of members.
+        # Members are looked up by id since hash of enum is slow.
+        self.enum_maps: List[Dict[int, int]] = []
+        self.enum_members: List[list] = []
+        enum_format = ""
+
+        for name in self.enum_names:
+            members = list(enum_types[name]) + [None]
+            self.enum_members.append(members)
+            self.enum_maps.append({id(member): i for i, member in enumerate(members)})
+
+            if len(members) <= 256:
+                enum_format += "B"
+            else:
+                enum_format += "H"
+
+        # Mask of int values stored in number attributes, cached by types
+        self.mask_size: int = (len(self.number_names) + 7) // 8
+        self.masks: Dict[tuple, Tuple[bytes, Callable]] = {}
+        self.int_positions: Dict[int, List[int]] = {}
+
+        # Strs are joined by separator into one utf-8 data
+        self.str_count: int = len(self.str_names)
+
+        self.head_struct: Struct = Struct(
+            "<"
+            + "d" * len(self.number_names)
+            + "?" * len(self.bool_names)
+            + enum_format
+            + "q" * len(self.datetime_names)
+            + "B" * len(self.datetime_names)
+            + ("I" if self.str_count else "")
+        )
+
+        # Position of each attribute in decoded values
+        grouped_names = (
+            self.number_names
+            + self.bool_names
+            + self.enum_names
+            + self.datetime_names
+            + self.str_names
+            + self.value_names
+        )
+        positions = [grouped_names.index(name) for name in self.names]
+        self.arrange = create_getter(positions)
+
+    def get_mask(self, number_types: tuple) -> Tuple[bytes, Callable]:
+        """
+        Get mask of int values, and getter of int values for range check.
+        """
+        mask_data = self.masks.get(number_types, None)
+        if mask_data:
+            return mask_data
+
+        mask = 0
+        positions = []
+        for i, number_type in enumerate(number_types):
+            if number_type is int:
+                mask |= 1 << i
+                positions.append(i)
+            elif number_type is not float:
+                raise SchemaError(f"invalid number type {number_type}")
+
+        mask_data = (mask.to_bytes(self.mask_size, "little"), create_getter(positions))
+        self.masks[number_types] = mask_data
+        return mask_data
+
+    def get_int_positions(self, mask: int) -> List[int]:
+        """"""
+        positions = self.int_positions.get(mask, None)
+        if positions is None:
+            positions = [i for i in range(len(self.number_names)) if mask >> i & 1]
+            self.int_positions[mask] = positions
+        return positions
+
+    def encode(self, obj: Any, parts: List[bytes]) -> None:
+        """"""
+        d = obj.__dict__
+        if len(d) != self.size:
+            raise SchemaError("attributes not matching schema")
+
+        codec = self.codec
+
+        numbers = self.get_numbers(d)
+        mask, get_ints = self.get_mask(tuple(map(type, numbers)))
+        for value in get_ints(numbers):
+            if not -MAX_EXACT_INT <= value <= MAX_EXACT_INT:
+                raise SchemaError(f"int out of range {value}")
+
+        bools = self.get_bools(d)
+        if not set(map(type, bools)) <= BOOL_TYPES:
+            raise SchemaError("invalid bool")
+
+        enums = map(getitem, self.enum_maps, map(id, self.get_enums(d)))
+
+        timestamps = []
+        tz_lengths = []
+        tz_data = []
+        for dt in self.get_datetimes(d):
+            timestamp, tz = codec.encode_datetime(dt)
+            timestamps.append(timestamp)
+            tz_lengths.append(len(tz))
+            tz_data.append(tz)
+
+        head = [*numbers, *bools, *enums, *timestamps, *tz_lengths]
+
+        if self.str_count:
+            strs = self.get_strs(d)
+            if not set(map(type, strs)) <= STR_TYPES:
+                raise SchemaError("invalid str")
+
+            text = STR_SEPARATOR.join(strs)
+            if text.count(STR_SEPARATOR) != self.str_count - 1:
+                raise SchemaError("separator in str")
+
+            str_data = text.encode("utf-8")
+            head.append(len(str_data))
+            tz_data.append(str_data)
+
+        parts.append(OBJECT_STRUCT.pack(TAG_OBJECT, self.class_id))
+        parts.append(mask)
+        parts.append(self.head_struct.pack(*head))
+        parts.extend(tz_data)
+
+        for value in self.get_values(d):
+            codec.encode_value(value, parts)
+
+    def decode(self, data: bytes, offset: int) -> Tuple[Any, int]:
+        """"""
+        codec = self.codec
+
+        end = offset + self.mask_size
+        mask = int.from_bytes(data[offset:end], "little")
+        offset = end
+
+        head = self.head_struct.unpack_from(data, offset)
+        offset += self.head_struct.size
+
+        n = len(self.number_names)
+        values = list(head[:n])
+        if mask:
+            for i in self.get_int_positions(mask):
+                values[i] = int(values[i])
+
+        values.extend(head[n:n + len(self.bool_names)])
+        n += len(self.bool_names)
+
+        values.extend(map(getitem, self.enum_members, head[n:n + len(self.enum_names)]))
+        n += len(self.enum_names)
+
+        count = len(self.datetime_names)
+        if count:
+            timestamps = head[n:n + count]
+            tz_lengths = head[n + count:n + count * 2]
+            n += count * 2
+
+            for timestamp, tz_length in zip(timestamps, tz_lengths):
+                end = offset + tz_length
+                values.append(codec.decode_datetime(timestamp, data[offset:end]))
+                offset = end
+
+        if self.str_count:
+            end = offset + head[n]
+            values.extend(data[offset:end].decode("utf-8").split(STR_SEPARATOR))
+            offset = end
+
+        for _ in self.value_names:
+            value, offset = codec.decode_value(data, offset)
+            values.append(value)
+
+        obj = self.cls.__new__(self.cls)
+        obj.__dict__.update(zip(self.names, self.arrange(values)))
+        return obj, offset
+
+
+class BinaryCodec(BaseCodec):
+    """
+    Codec using schema based binary encoding for registered dataclasses
+    and enums, and pickle for other objects.
+
+    Messages pickled by peers using PickleCodec can also be decoded,
+    but not the other way round.
+    """
+
+    def __init__(self):
+        """"""
+        self.schemas: Dict[type, DataSchema] = {}
+        self.schema_list: List[DataSchema] = []
+
+        self.enum_ids: Dict[type, int] = {}
+        self.enum_list: List[list] = []
+
+        # Tzinfo is pickled once and cached on both sides
+        self.tz_data: Dict[Any, bytes] = {None: b""}
+        self.tz_objects: Dict[bytes, Any] = {b"": None}
+
+        self.encoders: Dict[type, Callable[[Any, List[bytes]], None]] = {
+            type(None): self.encode_none,
+            bool: self.encode_bool,
+            int: self.encode_int,
+            float: self.encode_float,
+            str: self.encode_str,
+            bytes: self.encode_bytes,
+            list: self.encode_list,
+            tuple: self.encode_tuple,
+            dict: self.encode_dict,
+            datetime: self.encode_datetime_value,
+            Event: self.encode_event,
+        }
+
+        self.decoders: List[Callable[[bytes, int], Tuple[Any, int]]] = [
+            self.decode_none,
+            self.decode_true,
+            self.decode_false,
+            self.decode_int,
+            self.decode_float,
+            self.decode_str,
+            self.decode_bytes,
+            self.decode_list,
+            self.decode_tuple,
+            self.decode_dict,
+            self.decode_datetime_value,
+            self.decode_enum,
+            self.decode_event,
+            self.decode_object,
+            self.decode_pickle,
+        ]
+
+        self.register_module(constant)
+        self.register_module(trader_object)
+
+    def register_module(self, module: Any) -> None:
+        """
+        Register all enums and dataclasses defined in module.
+        """
+        for value in list(vars(module).values()):
+            if not isinstance(value, type) or value.__module__ != module.__name__:
+                continue
+
+            if issubclass(value, Enum):
+                self.register_enum(value)
+            elif is_dataclass(value):
+                self.register_dataclass(value)
+
+    def register_enum(self, enum_type: type) -> None:
+        """"""
+        if enum_type in self.enum_ids:
+            return
+
+        self.enum_ids[enum_type] = len(self.enum_list)
+        self.enum_list.append(list(enum_type))
+
+    def register_dataclass(self, cls: type) -> None:
+        """"""
+        if cls in self.schemas:
+            return
+
+        schema = DataSchema(self, cls, len(self.schema_list))
+        self.schemas[cls] = schema
+        self.schema_list.append(schema)
+
+    def encode(self, obj: Any) -> bytes:
+        """"""
+        parts = [TAG_STRUCT.pack(BINARY_MAGIC)]
+        self.encode_value(obj, parts)
+        return b"".join(parts)
+
+    def decode(self, data: bytes) -> Any:
+        """"""
+        if data[0] == PICKLE_MAGIC:
+            return pickle.loads(data)
+        elif data[0] != BINARY_MAGIC:
+            raise ValueError("unknown message format")
+
+        value, _ = self.decode_value(data, 1)
+        return value
+
+    def encode_value(self, value: Any, parts: List[bytes]) -> None:
+        """"""
+        value_type = type(value)
+
+        encoder = self.encoders.get(value_type, None)
+        if encoder:
+            encoder(value, parts)
+            return
+
+        schema = self.schemas.get(value_type, None)
+        if schema:
+            n = len(parts)
+            try:
+                schema.encode(value, parts)
+                return
+            except ENCODE_ERRORS:
+                del parts[n:]
+
+        enum_id = self.enum_ids.get(value_type, None)
+        if enum_id is not None:
+            parts.append(ENUM_STRUCT.pack(TAG_ENUM, enum_id, self.enum_list[enum_id].index(value)))
+            return
+
+        self.encode_pickle(value, parts)
+
+    def decode_value(self, data: bytes, offset: int) -> Tuple[Any, int]:
+        """"""
+        return self.decoders[data[offset]](data, offset + 1)
+
+    def encode_datetime(self, dt: datetime) -> Tuple[int, bytes]:
+        """
+        Convert datetime into timestamp and pickled tzinfo.
+        """
+        if dt is None:
+            return NULL_DATETIME, b""
+
+        if type(dt) is not datetime:
+            raise SchemaError("invalid datetime")
+
+        timestamp = (
+            (dt.toordinal() - EPOCH_ORDINAL) * 86400
+            + dt.hour * 3600
+            + dt.minute * 60
+            + dt.second
+        ) * 1_000_000 + dt.microsecond
+
+        tz = self.tz_data.get(dt.tzinfo, None)
+        if tz is None:
+            tz = pickle.dumps(dt.tzinfo, PICKLE_PROTOCOL)
+            if len(tz) > 255:
+                raise SchemaError("tzinfo too large")
+            self.tz_data[dt.tzinfo] = tz
+
+        return timestamp * 2 + dt.fold, tz
+
+    def decode_datetime(self, timestamp: int, tz: bytes) -> datetime:
+        """"""
+        if timestamp == NULL_DATETIME:
+            return None
+
+        dt = EPOCH + timedelta(microseconds=timestamp >> 1)
+
+        tzinfo = self.tz_objects.get(tz, None)
+        if tzinfo is None and tz:
+            tzinfo = pickle.loads(tz)
+            self.tz_objects[tz] = tzinfo
+
+        return dt.replace(tzinfo=tzinfo, fold=timestamp & 1)
+
+    def encode_none(self, value: None, parts: List[bytes]) -> None:
+        """"""
+        parts.append(TAG_STRUCT.pack(TAG_NONE))
+
+    def decode_none(self, data: bytes, offset: int) -> Tuple[None, int]:
+        """"""
+        return None, offset
+
+    def encode_bool(self, value: bool, parts: List[bytes]) -> None:
+        """"""
+        parts.append(TAG_STRUCT.pack(TAG_TRUE if value else TAG_FALSE))
+
+    def decode_true(self, data: bytes, offset: int) -> Tuple[bool, int]:
+        """"""
+        return True, offset
+
+    def decode_false(self, data: bytes, offset: int) -> Tuple[bool, int]:
+        """"""
+        return False, offset
+
+    def encode_int(self, value: int, parts: List[bytes]) -> None:
+        """"""
+        try:
+            parts.append(INT_STRUCT.pack(TAG_INT, value))
+        except StructError:
+            self.encode_pickle(value, parts)
+
+    def decode_int(self, data: bytes, offset: int) -> Tuple[int, int]:
+        """"""
+        return INT_STRUCT.unpack_from(data, offset - 1)[1], offset + 8
+
+    def encode_float(self, value: float, parts: List[bytes]) -> None:
+        """"""
+        parts.append(FLOAT_STRUCT.pack(TAG_FLOAT, value))
+
+    def decode_float(self, data: bytes, offset: int) -> Tuple[float, int]:
+        """"""
+        return DOUBLE_STRUCT.unpack_from(data, offset)[0], offset + 8
+
+    def encode_str(self, value: str, parts: List[bytes]) -> None:
+        """"""
+        b = value.encode("utf-8")
+        parts.append(SIZE_STRUCT.pack(TAG_STR, len(b)))
+        parts.append(b)
+
+    def decode_str(self, data: bytes, offset: int) -> Tuple[str, int]:
+        """"""
+        length = UNSIGNED_STRUCT.unpack_from(data, offset)[0]
+        offset += 4
+        end = offset + length
+        return data[offset:end].decode("utf-8"), end
+
+    def encode_bytes(self, value: bytes, parts: List[bytes]) -> None:
+        """"""
+        parts.append(SIZE_STRUCT.pack(TAG_BYTES, len(value)))
+        parts.append(value)
+
+    def decode_bytes(self, data: bytes, offset: int) -> Tuple[bytes, int]:
+        """"""
+        length = UNSIGNED_STRUCT.unpack_from(data, offset)[0]
+        offset += 4
+        end = offset + length
+        return data[offset:end], end
+
+    def encode_list(self, value: list, parts: List[bytes]) -> None:
+        """"""
+        parts.append(SIZE_STRUCT.pack(TAG_LIST, len(value)))
+        for item in value:
+            self.encode_value(item, parts)
+
+    def decode_list(self, data: bytes, offset: int) -> Tuple[list, int]:
+        """"""
+        length = UNSIGNED_STRUCT.unpack_from(data, offset)[0]
+        offset += 4
+
+        value = []
+        for _ in range(length):
+            item, offset = self.decode_value(data, offset)
+            value.append(item)
+        return value, offset
+
+    def encode_tuple(self, value: tuple, parts: List[bytes]) -> None:
+        """"""
+        parts.append(SIZE_STRUCT.pack(TAG_TUPLE, len(value)))
+        for item in value:
+            self.encode_value(item, parts)
+
+    def decode_tuple(self, data: bytes, offset: int) -> Tuple[tuple, int]:
+        """"""
+        value, offset = self.decode_list(data, offset)
+        return tuple(value), offset
+
+    def encode_dict(self, value: dict, parts: List[bytes]) -> None:
+        """"""
+        parts.append(SIZE_STRUCT.pack(TAG_DICT, len(value)))
+        for k, v in value.items():
+            self.encode_value(k, parts)
+            self.encode_value(v, parts)
+
+    def decode_dict(self, data: bytes, offset: int) -> Tuple[dict, int]:
+        """"""
+        length = UNSIGNED_STRUCT.unpack_from(data, offset)[0]
+        offset += 4
+
+        value = {}
+        for _ in range(length):
+            k, offset = self.decode_value(data, offset)
+            v, offset = self.decode_value(data, offset)
+            value[k] = v
+        return value, offset
+
+    def encode_datetime_value(self, value: datetime, parts: List[bytes]) -> None:
+        """"""
+        try:
+            timestamp, tz = self.encode_datetime(value)
+        except ENCODE_ERRORS:
+            self.encode_pickle(value, parts)
+            return
+
+        parts.append(DATETIME_STRUCT.pack(TAG_DATETIME, timestamp, len(tz)))
+        parts.append(tz)
+
+    def decode_datetime_value(self, data: bytes, offset: int) -> Tuple[datetime, int]:
+        """"""
+        _, timestamp, tz_length = DATETIME_STRUCT.unpack_from(data, offset - 1)
+        offset += DATETIME_STRUCT.size - 1
+        end = offset + tz_length
+        return self.decode_datetime(timestamp, data[offset:end]), end
+
+    def decode_enum(self, data: bytes, offset: int) -> Tuple[Enum, int]:
+        """"""
+        _, enum_id, index = ENUM_STRUCT.unpack_from(data, offset - 1)
+        return self.enum_list[enum_id][index], offset + ENUM_STRUCT.size - 1
+
+    def encode_event(self, value: Event, parts: List[bytes]) -> None:
+        """"""
+        if len(value.__dict__) != 3 or type(value.type) is not str:
+            self.encode_pickle(value, parts)
+            return
+
+        event_type = value.type.encode("utf-8")
+        parts.append(EVENT_STRUCT.pack(TAG_EVENT, value.put_time, len(event_type)))
+        parts.append(event_type)
+        self.encode_value(value.data, parts)
+
+    def decode_event(self, data: bytes, offset: int) -> Tuple[Event, int]:
+        """"""
+        _, put_time, length = EVENT_STRUCT.unpack_from(data, offset - 1)
+        offset += EVENT_STRUCT.size - 1
+        end = offset + length
+        event_type = data[offset:end].decode("utf-8")
+
+        event_data, offset = self.decode_value(data, end)
+
+        event = Event(event_type, event_data)
+        event.put_time = put_time
+        return event, offset
+
+    def decode_object(self, data: bytes, offset: int) -> Tuple[Any, int]:
+        """"""
+        _, class_id = OBJECT_STRUCT.unpack_from(data, offset - 1)
+        return self.schema_list[class_id].decode(data, offset + OBJECT_STRUCT.size - 1)
+
+    def encode_pickle(self, value: Any, parts: List[bytes]) -> None:
+        """"""
+        b = pickle.dumps(value, PICKLE_PROTOCOL)
+        parts.append(SIZE_STRUCT.pack(TAG_PICKLE, len(b)))
+        parts.append(b)
+
+    def decode_pickle(self, data: bytes, offset: int) -> Tuple[Any, int]:
+        """"""
+        value, end = self.decode_bytes(data, offset)
+        return pickle.loads(value), end
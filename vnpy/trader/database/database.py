@@ -1,14 +1,17 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Sequence, List, Dict, TYPE_CHECKING
+from typing import Optional, Sequence, List, Dict, Union, TYPE_CHECKING
 from pytz import timezone
 
+import numpy as np
+
 from vnpy.trader.setting import SETTINGS
+from vnpy.trader.object import BarData
 
 if TYPE_CHECKING:
     from vnpy.trader.constant import Interval, Exchange  # noqa
-    from vnpy.trader.object import BarData, TickData  # noqa
+    from vnpy.trader.object import TickData  # noqa
 
 
 DB_TZ = timezone(SETTINGS["database.timezone"])
@@ -22,6 +25,152 @@ class Driver(Enum):
     INFLUX = "influxdb"
 
 
+BAR_ARRAY_FIELDS = [
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+    "volume",
+    "open_interest"
+]
+
+
+class BarArray:
+    """
+    Columnar bar data of one symbol/exchange/interval loaded from database.
+
+    Datetime is stored as datetime64 in database timezone (without tzinfo),
+    BarData object is only created when requested by index.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval",
+        datetime: np.ndarray,
+        open_price: np.ndarray,
+        high_price: np.ndarray,
+        low_price: np.ndarray,
+        close_price: np.ndarray,
+        volume: np.ndarray,
+        open_interest: np.ndarray
+    ):
+        """"""
+        self.symbol: str = symbol
+        self.exchange: "Exchange" = exchange
+        self.interval: "Interval" = interval
+        self.vt_symbol: str = f"{symbol}.{exchange.value}"
+
+        self.datetime: np.ndarray = datetime
+        self.open_price: np.ndarray = open_price
+        self.high_price: np.ndarray = high_price
+        self.low_price: np.ndarray = low_price
+        self.close_price: np.ndarray = close_price
+        self.volume: np.ndarray = volume
+        self.open_interest: np.ndarray = open_interest
+
+        self.datetimes: List[datetime] = []
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.datetime)
+
+    def __getitem__(self, ix: Union[int, slice]) -> Union["BarData", List["BarData"]]:
+        """"""
+        if isinstance(ix, slice):
+            return [self.get_bar(i) for i in range(*ix.indices(len(self)))]
+        return self.get_bar(ix)
+
+    def __iter__(self):
+        """"""
+        for ix in range(len(self)):
+            yield self.get_bar(ix)
+
+    def get_datetimes(self) -> List[datetime]:
+        """
+        Get datetime list (with database timezone) of all bars.
+        """
+        if len(self.datetimes) != len(self.datetime):
+            self.datetimes = [
+                dt.replace(tzinfo=DB_TZ)
+                for dt in self.datetime.astype("datetime64[us]").tolist()
+            ]
+        return self.datetimes
+
+    def get_bar(self, ix: int) -> "BarData":
+        """
+        Create BarData object of bar at index.
+        """
+        return BarData(
+            symbol=self.symbol,
+            exchange=self.exchange,
+            datetime=self.get_datetimes()[ix],
+            interval=self.interval,
+            volume=float(self.volume[ix]),
+            open_price=float(self.open_price[ix]),
+            high_price=float(self.high_price[ix]),
+            low_price=float(self.low_price[ix]),
+            close_price=float(self.close_price[ix]),
+            open_interest=float(self.open_interest[ix]),
+            gateway_name="DB"
+        )
+
+    @classmethod
+    def from_rows(
+        cls,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval",
+        rows: Sequence[tuple]
+    ) -> "BarArray":
+        """
+        Create BarArray from rows of (datetime, open_price, high_price,
+        low_price, close_price, volume, open_interest).
+        """
+        if rows:
+            columns = list(zip(*rows))
+        else:
+            columns = [[] for _ in range(len(BAR_ARRAY_FIELDS) + 1)]
+
+        # Datetime may be python datetime, numpy datetime64 or epoch int
+        dt_array = np.array(columns[0])
+        if dt_array.dtype.kind != "M":
+            dt_array = dt_array.astype("datetime64[us]")
+
+        arrays = [np.array(column, dtype=float) for column in columns[1:]]
+        return cls(symbol, exchange, interval, dt_array, *arrays)
+
+    @classmethod
+    def from_bars(
+        cls,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval",
+        bars: Sequence["BarData"]
+    ) -> "BarArray":
+        """
+        Create BarArray from list of BarData.
+        """
+        rows = []
+        for bar in bars:
+            dt = bar.datetime
+            if dt.tzinfo:
+                dt = dt.astimezone(DB_TZ).replace(tzinfo=None)
+
+            rows.append((
+                dt,
+                bar.open_price,
+                bar.high_price,
+                bar.low_price,
+                bar.close_price,
+                bar.volume,
+                bar.open_interest
+            ))
+
+        return cls.from_rows(symbol, exchange, interval, rows)
+
+
 class BaseDatabaseManager(ABC):
 
     @abstractmethod
@@ -35,6 +184,22 @@ class BaseDatabaseManager(ABC):
     ) -> Sequence["BarData"]:
         pass
 
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: "Exchange",
+        interval: "Interval",
+        start: datetime,
+        end: datetime
+    ) -> BarArray:
+        """
+        Load bar data into numpy arrays without creating BarData objects.
+        Database managers should override this with a columnar query,
+        default implementation converts result of load_bar_data.
+        """
+        bars = self.load_bar_data(symbol, exchange, interval, start, end)
+        return BarArray.from_bars(symbol, exchange, interval, bars)
+
     @abstractmethod
     def load_tick_data(
         self,
@@ -0,0 +1,493 @@
+"""
+Local memory-mapped bar data cache in front of database manager.
+
+Bar data is stored under .vntrader/bar_cache as one npy file per
+vt_symbol/interval/day. A day file means bars of that day are complete
+in cache, so only missing days are queried from database. Empty days
+are only saved between days with data (e.g. weekends), since data of
+days before the first bar or after the last bar loaded may be saved
+into database later. Days from today (in database timezone) on are
+always loaded from database.
+"""
+
+import os
+import shutil
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData, TickData
+from vnpy.trader.utility import get_folder_path
+
+from .database import BaseDatabaseManager, BarArray, BAR_ARRAY_FIELDS, DB_TZ
+
+
+BAR_DTYPE = np.dtype(
+    [("datetime", "datetime64[us]")]
+    + [(field, "float64") for field in BAR_ARRAY_FIELDS]
+)
+
+CACHE_FOLDER = "bar_cache"
+
+
+class BarCache:
+    """
+    On-disk bar data cache partitioned by vt_symbol, interval and day.
+    """
+
+    def __init__(self, folder: Path = None):
+        """"""
+        if not folder:
+            folder = get_folder_path(CACHE_FOLDER)
+        self.folder: Path = folder
+
+        # (vt_symbol, interval): set of cached days
+        self.indexes: Dict[Tuple[str, str], Set[date]] = {}
+
+    def get_path(self, vt_symbol: str, interval: Interval) -> Path:
+        """"""
+        return self.folder.joinpath(vt_symbol, interval.value)
+
+    def get_index(self, vt_symbol: str, interval: Interval) -> Set[date]:
+        """
+        Get days present in cache, loaded from file names at first use.
+        """
+        key = (vt_symbol, interval.value)
+        index = self.indexes.get(key, None)
+
+        if index is None:
+            index = set()
+
+            path = self.get_path(vt_symbol, interval)
+            if path.exists():
+                for filename in os.listdir(path):
+                    if filename.endswith(".npy"):
+                        index.add(datetime.strptime(filename[:8], "%Y%m%d").date())
+
+            self.indexes[key] = index
+
+        return index
+
+    def get_missing_ranges(
+        self,
+        vt_symbol: str,
+        interval: Interval,
+        start: date,
+        end: date
+    ) -> List[Tuple[date, date]]:
+        """
+        Get ranges of consecutive days (both included) not in cache.
+        """
+        index = self.get_index(vt_symbol, interval)
+
+        ranges = []
+        gap_start = None
+        d = start
+
+        while d <= end:
+            if d not in index:
+                if not gap_start:
+                    gap_start = d
+            elif gap_start:
+                ranges.append((gap_start, d - timedelta(days=1)))
+                gap_start = None
+
+            d += timedelta(days=1)
+
+        if gap_start:
+            ranges.append((gap_start, end))
+
+        return ranges
+
+    def save_days(
+        self,
+        vt_symbol: str,
+        interval: Interval,
+        start: date,
+        end: date,
+        data: np.ndarray
+    ) -> None:
+        """
+        Save data of days from start to end (both included) into day files.
+        Empty days before the first bar or after the last bar are skipped.
+        """
+        if not len(data):
+            return
+
+        path = self.get_path(vt_symbol, interval)
+        path.mkdir(parents=True, exist_ok=True)
+
+        index = self.get_index(vt_symbol, interval)
+        days = data["datetime"].astype("datetime64[D]")
+
+        d = max(start, days[0].item())
+        end = min(end, days[-1].item())
+
+        while d <= end:
+            day_data = data[days == np.datetime64(d)]
+
+            # Write into temp file first so that readers never see half file
+            filepath = path.joinpath(f"{d:%Y%m%d}.npy")
+            temp_path = path.joinpath(f"{d:%Y%m%d}.{os.getpid()}.tmp")
+            with open(temp_path, "wb") as f:
+                np.save(f, day_data)
+            os.replace(temp_path, filepath)
+
+            index.add(d)
+            d += timedelta(days=1)
+
+    def load_days(
+        self,
+        vt_symbol: str,
+        interval: Interval,
+        start: date,
+        end: date
+    ) -> Tuple[List[np.ndarray], List[date]]:
+        """
+        Load memory-mapped data of days from start to end in cache.
+
+        Day files removed by another process (e.g. invalidated when saving
+        bar data) are dropped from index, and returned as removed days.
+        """
+        path = self.get_path(vt_symbol, interval)
+        index = self.get_index(vt_symbol, interval)
+
+        result = []
+        removed_days = []
+        d = start
+
+        while d <= end:
+            if d in index:
+                filepath = path.joinpath(f"{d:%Y%m%d}.npy")
+                try:
+                    day_data = np.load(filepath, mmap_mode="r")
+                except FileNotFoundError:
+                    index.discard(d)
+                    removed_days.append(d)
+                else:
+                    if len(day_data):
+                        result.append(day_data)
+
+            d += timedelta(days=1)
+
+        return result, removed_days
+
+    def load_pieces(
+        self,
+        vt_symbol: str,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        loader: Callable[[datetime, datetime], np.ndarray]
+    ) -> List[np.ndarray]:
+        """
+        Load data from start to end (database timezone without tzinfo)
+        as views of memory-mapped day files, and data of today.
+
+        Days missing in cache are loaded by loader and saved into cache,
+        while days from today on are always loaded by loader.
+        """
+        # Only complete days before today can be cached
+        today = datetime.now(DB_TZ).date()
+        cache_end = min(end.date(), today - timedelta(days=1))
+
+        if start.date() <= cache_end:
+            missing_ranges = self.get_missing_ranges(
+                vt_symbol, interval, start.date(), cache_end
+            )
+        else:
+            missing_ranges = []
+
+        while True:
+            # Load missing days and save into cache
+            for range_start, range_end in missing_ranges:
+                data = loader(
+                    datetime.combine(range_start, time.min),
+                    datetime.combine(range_end, time.max)
+                )
+                self.save_days(vt_symbol, interval, range_start, range_end, data)
+
+            # Load data in cache
+            datas, removed_days = self.load_days(
+                vt_symbol, interval, start.date(), cache_end
+            )
+            if not removed_days:
+                break
+
+            # Days removed from cache meanwhile are loaded again
+            missing_ranges = [(d, d) for d in removed_days]
+
+        # Load data of today by loader directly
+        if end.date() > cache_end:
+            data = loader(
+                max(start, datetime.combine(cache_end + timedelta(days=1), time.min)),
+                end
+            )
+            datas.append(data)
+
+        # Filter data within start and end, data of each piece is sorted
+        start_dt = np.datetime64(start)
+        end_dt = np.datetime64(end)
+        pieces = []
+
+        for data in datas:
+            dt = data["datetime"]
+            ix_start = np.searchsorted(dt, start_dt, side="left")
+            ix_end = np.searchsorted(dt, end_dt, side="right")
+
+            if ix_end > ix_start:
+                pieces.append(data[ix_start:ix_end])
+
+        return pieces
+
+    def load(
+        self,
+        vt_symbol: str,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        loader: Callable[[datetime, datetime], np.ndarray],
+        dtype: np.dtype = BAR_DTYPE
+    ) -> np.ndarray:
+        """
+        Load data from start to end into one structured array, which is
+        allocated once and filled by pieces.
+        """
+        pieces = self.load_pieces(vt_symbol, interval, start, end, loader)
+        data = np.empty(sum(len(piece) for piece in pieces), dtype=dtype)
+
+        ix = 0
+        for piece in pieces:
+            data[ix:ix + len(piece)] = piece
+            ix += len(piece)
+
+        return data
+
+    def load_columns(
+        self,
+        vt_symbol: str,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        loader: Callable[[datetime, datetime], np.ndarray],
+        dtype: np.dtype = BAR_DTYPE
+    ) -> Dict[str, np.ndarray]:
+        """
+        Load data from start to end into one contiguous array per field,
+        filled by pieces directly without intermediate structured array.
+        """
+        pieces = self.load_pieces(vt_symbol, interval, start, end, loader)
+        count = sum(len(piece) for piece in pieces)
+
+        columns = {}
+        for name in dtype.names:
+            column = np.empty(count, dtype=dtype.fields[name][0])
+
+            ix = 0
+            for piece in pieces:
+                column[ix:ix + len(piece)] = piece[name]
+                ix += len(piece)
+
+            columns[name] = column
+
+        return columns
+
+    def invalidate(
+        self,
+        vt_symbol: str,
+        interval: Interval,
+        days: Set[date] = None
+    ) -> None:
+        """
+        Remove days (or all data if days not given) from cache.
+        """
+        path = self.get_path(vt_symbol, interval)
+        index = self.get_index(vt_symbol, interval)
+
+        if days is None:
+            shutil.rmtree(path, ignore_errors=True)
+            index.clear()
+            return
+
+        for d in days:
+            filepath = path.joinpath(f"{d:%Y%m%d}.npy")
+            if filepath.exists():
+                filepath.unlink()
+            index.discard(d)
+
+    def invalidate_symbol(self, symbol: str) -> None:
+        """
+        Remove all data of symbol (of any exchange) from cache.
+        """
+        for vt_symbol in os.listdir(self.folder):
+            if vt_symbol.split(".")[0] == symbol:
+                shutil.rmtree(self.folder.joinpath(vt_symbol), ignore_errors=True)
+
+        for key in list(self.indexes.keys()):
+            if key[0].split(".")[0] == symbol:
+                self.indexes.pop(key)
+
+
+def to_db_datetime(dt: datetime) -> datetime:
+    """
+    Convert datetime into database timezone without tzinfo.
+    """
+    if dt.tzinfo:
+        dt = dt.astimezone(DB_TZ).replace(tzinfo=None)
+    return dt
+
+
+def to_records(bar_array: BarArray) -> np.ndarray:
+    """
+    Convert BarArray into structured array for cache storage.
+    """
+    data = np.zeros(len(bar_array), dtype=BAR_DTYPE)
+    data["datetime"] = bar_array.datetime
+
+    for field in BAR_ARRAY_FIELDS:
+        data[field] = getattr(bar_array, field)
+
+    return data
+
+
+class CachedDatabaseManager(BaseDatabaseManager):
+    """
+    Database manager which serves bar data from local cache, and only
+    queries missing days from the backend database manager.
+    """
+
+    def __init__(self, database_manager: BaseDatabaseManager, cache: BarCache = None):
+        """"""
+        self.database_manager: BaseDatabaseManager = database_manager
+
+        if not cache:
+            cache = BarCache()
+        self.cache: BarCache = cache
+
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> BarArray:
+        """"""
+        vt_symbol = f"{symbol}.{exchange.value}"
+
+        def load_records(start: datetime, end: datetime) -> np.ndarray:
+            """"""
+            bar_array = self.database_manager.load_bar_array(
+                symbol, exchange, interval, start, end
+            )
+            return to_records(bar_array)
+
+        columns = self.cache.load_columns(
+            vt_symbol,
+            interval,
+            to_db_datetime(start),
+            to_db_datetime(end),
+            load_records
+        )
+
+        return BarArray(
+            symbol,
+            exchange,
+            interval,
+            columns["datetime"],
+            *[columns[field] for field in BAR_ARRAY_FIELDS]
+        )
+
+    def load_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime
+    ) -> Sequence[BarData]:
+        """"""
+        bar_array = self.load_bar_array(symbol, exchange, interval, start, end)
+        return list(bar_array)
+
+    def load_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime
+    ) -> Sequence[TickData]:
+        """"""
+        return self.database_manager.load_tick_data(symbol, exchange, start, end)
+
+    def save_bar_data(self, datas: Sequence[BarData]):
+        """
+        Save bar data into database, and invalidate days touched in cache.
+        """
+        result = self.database_manager.save_bar_data(datas)
+
+        touched: Dict[Tuple[str, Interval], Set[date]] = {}
+        for bar in datas:
+            key = (bar.vt_symbol, bar.interval)
+            days = touched.setdefault(key, set())
+            days.add(to_db_datetime(bar.datetime).date())
+
+        for (vt_symbol, interval), days in touched.items():
+            self.cache.invalidate(vt_symbol, interval, days)
+
+        return result
+
+    def save_tick_data(self, datas: Sequence[TickData]):
+        """"""
+        return self.database_manager.save_tick_data(datas)
+
+    def get_newest_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> Optional[BarData]:
+        """"""
+        return self.database_manager.get_newest_bar_data(symbol, exchange, interval)
+
+    def get_oldest_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> Optional[BarData]:
+        """"""
+        return self.database_manager.get_oldest_bar_data(symbol, exchange, interval)
+
+    def get_newest_tick_data(
+        self,
+        symbol: str,
+        exchange: Exchange
+    ) -> Optional[TickData]:
+        """"""
+        return self.database_manager.get_newest_tick_data(symbol, exchange)
+
+    def get_bar_data_statistics(self) -> List[Dict]:
+        """"""
+        return self.database_manager.get_bar_data_statistics()
+
+    def delete_bar_data(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval
+    ) -> int:
+        """
+        Delete bar data in database, and all its data in cache.
+        """
+        count = self.database_manager.delete_bar_data(symbol, exchange, interval)
+        self.cache.invalidate(f"{symbol}.{exchange.value}", interval)
+        return count
+
+    def clean(self, symbol: str):
+        """"""
+        self.database_manager.clean(symbol)
+        self.cache.invalidate_symbol(symbol)
@@ -7,7 +7,7 @@ from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
 from vnpy.trader.utility import generate_vt_symbol
 
-from .database import BaseDatabaseManager, Driver, DB_TZ
+from .database import BaseDatabaseManager, BarArray, BAR_ARRAY_FIELDS, Driver, DB_TZ
 
 
 influx_database = ""
@@ -88,6 +88,37 @@ class InfluxManager(BaseDatabaseManager):
 
         return data
 
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> BarArray:
+        # Query with full datetimes, so that range within a day (e.g. from
+        # bar cache) is not truncated to date
+        query = (
+            "select * from bar_data"
+            " where vt_symbol=$vt_symbol"
+            " and interval=$interval"
+            f" and time >= '{to_influx_time(start)}'"
+            f" and time <= '{to_influx_time(end)}';"
+        )
+
+        bind_params = {
+            "vt_symbol": generate_vt_symbol(symbol, exchange),
+            "interval": interval.value
+        }
+
+        # Return time as epoch microseconds to skip string parsing
+        result = influx_client.query(query, bind_params=bind_params, epoch="u")
+        points = result.get_points()
+
+        fields = ["time"] + BAR_ARRAY_FIELDS
+        rows = [tuple(d[field] for field in fields) for d in points]
+        return BarArray.from_rows(symbol, exchange, interval, rows)
+
     def load_tick_data(
         self, symbol: str, exchange: Exchange, start: datetime, end: datetime
     ) -> Sequence[TickData]:
@@ -264,3 +295,13 @@ class InfluxManager(BaseDatabaseManager):
 
     def clean(self, symbol: str):
         pass
+
+
+def to_influx_time(dt: datetime) -> str:
+    """
+    Convert datetime into time string of influxdb. Bar time is saved as
+    database timezone without tzinfo, which influxdb takes as UTC.
+    """
+    if dt.tzinfo:
+        dt = dt.astimezone(DB_TZ).replace(tzinfo=None)
+    return dt.isoformat() + "Z"
@@ -7,7 +7,7 @@ from mongoengine import DateTimeField, Document, FloatField, StringField, connec
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
 
-from .database import BaseDatabaseManager, Driver, DB_TZ
+from .database import BaseDatabaseManager, BarArray, BAR_ARRAY_FIELDS, Driver, DB_TZ
 
 
 def init(_: Driver, settings: dict):
@@ -211,6 +211,31 @@ class MongoManager(BaseDatabaseManager):
         data = [db_bar.to_bar() for db_bar in s]
         return data
 
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> BarArray:
+        s = (
+            DbBarData.objects(
+                symbol=symbol,
+                exchange=exchange.value,
+                interval=interval.value,
+                datetime__gte=start,
+                datetime__lte=end,
+            )
+            .order_by("datetime")
+            .only("datetime", *BAR_ARRAY_FIELDS)
+            .as_pymongo()
+        )
+
+        fields = ["datetime"] + BAR_ARRAY_FIELDS
+        rows = [tuple(d[field] for field in fields) for d in s]
+        return BarArray.from_rows(symbol, exchange, interval, rows)
+
     def load_tick_data(
         self, symbol: str, exchange: Exchange, start: datetime, end: datetime
     ) -> Sequence[TickData]:
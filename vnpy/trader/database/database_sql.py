@@ -1,6 +1,9 @@
 """"""
+import csv
+import sqlite3
 from datetime import datetime
-from typing import List, Dict, Optional, Sequence, Type
+from io import StringIO
+from typing import Any, List, Dict, Optional, Sequence, Type
 
 from peewee import (
     AutoField,
@@ -20,7 +23,32 @@ from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
 from vnpy.trader.utility import get_file_path
 
-from .database import BaseDatabaseManager, Driver, DB_TZ
+from .database import BaseDatabaseManager, BarArray, Driver, DB_TZ
+
+
+# Default number of rows written by one statement
+CHUNK_SIZES = {
+    Driver.SQLITE: 500,
+    Driver.MYSQL: 1000,
+    Driver.POSTGRESQL: 1000,
+}
+
+# Max number of bound parameters in one statement
+if sqlite3.sqlite_version_info >= (3, 32, 0):
+    SQLITE_MAX_VARIABLES = 32766
+else:
+    SQLITE_MAX_VARIABLES = 999
+
+MAX_VARIABLES = {
+    Driver.SQLITE: SQLITE_MAX_VARIABLES,
+    Driver.MYSQL: 65535,
+    Driver.POSTGRESQL: 32767,
+}
+
+# Rows more than this are written into PostgreSQL with COPY
+COPY_THRESHOLD = 10000
+# Marker of NULL in csv data of COPY, so that empty string stays empty
+COPY_NULL = "\\N"
 
 
 def init(driver: Driver, settings: dict):
@@ -31,8 +59,12 @@ def init(driver: Driver, settings: dict):
     }
     assert driver in init_funcs
 
+    chunk_size = settings.get("chunk_size", 0)
+    if not chunk_size:
+        chunk_size = CHUNK_SIZES[driver]
+
     db = init_funcs[driver](settings)
-    bar, tick = init_models(db, driver)
+    bar, tick = init_models(db, driver, chunk_size)
     return SqlManager(bar, tick)
 
 
@@ -63,7 +95,140 @@ class ModelBase(Model):
         return self.__data__
 
 
-def init_models(db: Database, driver: Driver):
+def get_conflict_key(data: dict, conflict_target: Sequence[Any]) -> tuple:
+    """"""
+    return tuple(data[field.name] for field in conflict_target)
+
+
+def remove_duplicates(dicts: List[dict], conflict_target: Sequence[Any]) -> List[dict]:
+    """
+    Keep only the last one of rows with the same unique key, since
+    PostgreSQL cannot update one row twice in a single statement.
+    """
+    result = {}
+    for d in dicts:
+        result[get_conflict_key(d, conflict_target)] = d
+    return list(result.values())
+
+
+def get_chunk_size(
+    driver: Driver,
+    model: Type[Model],
+    chunk_size: int
+) -> int:
+    """
+    Limit chunk size so that parameters of one statement not exceed
+    the max number allowed by database.
+    """
+    field_count = len(model._meta.sorted_fields)
+    return max(1, min(chunk_size, MAX_VARIABLES[driver] // field_count))
+
+
+def upsert_many(
+    driver: Driver,
+    model: Type[Model],
+    dicts: List[dict],
+    conflict_target: Sequence[Any],
+    chunk_size: int
+) -> None:
+    """
+    Write rows with multi-row insert statements, update if exists.
+    """
+    chunk_size = get_chunk_size(driver, model, chunk_size)
+
+    if driver is Driver.POSTGRESQL:
+        preserve = [
+            field for field in model._meta.sorted_fields
+            if field not in conflict_target and field is not model._meta.primary_key
+        ]
+
+        for c in chunked(dicts, chunk_size):
+            model.insert_many(c).on_conflict(
+                conflict_target=conflict_target,
+                preserve=preserve,
+            ).execute()
+    else:
+        for c in chunked(dicts, chunk_size):
+            model.insert_many(c).on_conflict_replace().execute()
+
+
+def copy_upsert(
+    db: Database,
+    model: Type[Model],
+    dicts: List[dict],
+    conflict_target: Sequence[Any]
+) -> None:
+    """
+    Write rows into PostgreSQL with COPY into a temp staging table, then
+    merge into target table with a single INSERT ... ON CONFLICT.
+
+    Must be called within transaction.
+    """
+    table = model._meta.table_name
+    staging = f"{table}_staging"
+
+    columns = [
+        field.column_name for field in model._meta.sorted_fields
+        if field is not model._meta.primary_key
+    ]
+    keys = [field.column_name for field in conflict_target]
+
+    column_str = ", ".join(f'"{c}"' for c in columns)
+    key_str = ", ".join(f'"{c}"' for c in keys)
+    update_str = ", ".join(
+        f'"{c}" = EXCLUDED."{c}"' for c in columns if c not in keys
+    )
+
+    # Write rows in csv format, None is written as NULL marker so that
+    # empty string is not loaded as NULL.
+    buf = StringIO()
+    writer = csv.writer(buf)
+    for d in dicts:
+        writer.writerow([
+            COPY_NULL if v is None else v
+            for v in (d.get(c, None) for c in columns)
+        ])
+    buf.seek(0)
+
+    cursor = db.cursor()
+    cursor.execute(
+        f'CREATE TEMP TABLE "{staging}" ON COMMIT DROP AS '
+        f'SELECT {column_str} FROM "{table}" WITH NO DATA'
+    )
+    cursor.copy_expert(
+        f'COPY "{staging}" ({column_str}) FROM STDIN '
+        f"WITH (FORMAT csv, NULL '{COPY_NULL}')", buf
+    )
+    cursor.execute(
+        f'INSERT INTO "{table}" ({column_str}) '
+        f'SELECT {column_str} FROM "{staging}" '
+        f'ON CONFLICT ({key_str}) DO UPDATE SET {update_str}'
+    )
+    cursor.execute(f'DROP TABLE "{staging}"')
+
+
+def save_many(
+    db: Database,
+    driver: Driver,
+    model: Type[Model],
+    dicts: List[dict],
+    conflict_target: Sequence[Any],
+    chunk_size: int
+) -> None:
+    """
+    Save rows in bulk, update if exists.
+    """
+    if driver is Driver.POSTGRESQL:
+        dicts = remove_duplicates(dicts, conflict_target)
+
+    with db.atomic():
+        if driver is Driver.POSTGRESQL and len(dicts) > COPY_THRESHOLD:
+            copy_upsert(db, model, dicts, conflict_target)
+        else:
+            upsert_many(driver, model, dicts, conflict_target, chunk_size)
+
+
+def init_models(db: Database, driver: Driver, chunk_size: int):
     class DbBarData(ModelBase):
         """
         Candlestick bar data for database storage.
@@ -138,22 +303,19 @@ def init_models(db: Database, driver: Driver):
             save a list of objects, update if exists.
             """
             dicts = [i.to_dict() for i in objs]
-            with db.atomic():
-                if driver is Driver.POSTGRESQL:
-                    for bar in dicts:
-                        DbBarData.insert(bar).on_conflict(
-                            update=bar,
-                            conflict_target=(
-                                DbBarData.symbol,
-                                DbBarData.exchange,
-                                DbBarData.interval,
-                                DbBarData.datetime,
-                            ),
-                        ).execute()
-                else:
-                    for c in chunked(dicts, 50):
-                        DbBarData.insert_many(
-                            c).on_conflict_replace().execute()
+            save_many(
+                db,
+                driver,
+                DbBarData,
+                dicts,
+                (
+                    DbBarData.symbol,
+                    DbBarData.exchange,
+                    DbBarData.interval,
+                    DbBarData.datetime,
+                ),
+                chunk_size
+            )
 
     class DbTickData(ModelBase):
         """
@@ -316,20 +478,18 @@ def init_models(db: Database, driver: Driver):
         @staticmethod
         def save_all(objs: List["DbTickData"]):
             dicts = [i.to_dict() for i in objs]
-            with db.atomic():
-                if driver is Driver.POSTGRESQL:
-                    for tick in dicts:
-                        DbTickData.insert(tick).on_conflict(
-                            update=tick,
-                            conflict_target=(
-                                DbTickData.symbol,
-                                DbTickData.exchange,
-                                DbTickData.datetime,
-                            ),
-                        ).execute()
-                else:
-                    for c in chunked(dicts, 50):
-                        DbTickData.insert_many(c).on_conflict_replace().execute()
+            save_many(
+                db,
+                driver,
+                DbTickData,
+                dicts,
+                (
+                    DbTickData.symbol,
+                    DbTickData.exchange,
+                    DbTickData.datetime,
+                ),
+                chunk_size
+            )
 
     db.connect()
     db.create_tables([DbBarData, DbTickData])
@@ -365,6 +525,37 @@ class SqlManager(BaseDatabaseManager):
         data = [db_bar.to_bar() for db_bar in s]
         return data
 
+    def load_bar_array(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+    ) -> BarArray:
+        s = (
+            self.class_bar.select(
+                self.class_bar.datetime,
+                self.class_bar.open_price,
+                self.class_bar.high_price,
+                self.class_bar.low_price,
+                self.class_bar.close_price,
+                self.class_bar.volume,
+                self.class_bar.open_interest,
+            )
+            .where(
+                (self.class_bar.symbol == symbol)
+                & (self.class_bar.exchange == exchange.value)
+                & (self.class_bar.interval == interval.value)
+                & (self.class_bar.datetime >= start)
+                & (self.class_bar.datetime <= end)
+            )
+            .order_by(self.class_bar.datetime)
+            .tuples()
+        )
+
+        return BarArray.from_rows(symbol, exchange, interval, list(s))
+
     def load_tick_data(
         self, symbol: str, exchange: Exchange, start: datetime, end: datetime
     ) -> Sequence[TickData]:
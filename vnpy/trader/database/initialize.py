@@ -5,16 +5,21 @@ from .database import BaseDatabaseManager, Driver
 def init(settings: dict) -> BaseDatabaseManager:
     driver = Driver(settings["driver"])
     if driver is Driver.MONGODB:
-        return init_mongo(driver=driver, settings=settings)
+        _database_manager = init_mongo(driver=driver, settings=settings)
     elif driver is Driver.INFLUX:
-        return init_influx(driver=driver, settings=settings)
+        _database_manager = init_influx(driver=driver, settings=settings)
     else:
-        return init_sql(driver=driver, settings=settings)
+        _database_manager = init_sql(driver=driver, settings=settings)
+
+    if settings.get("cache", False):
+        _database_manager = init_cache(_database_manager)
+
+    return _database_manager
 
 
 def init_sql(driver: Driver, settings: dict):
     from .database_sql import init
-    keys = {'database', "host", "port", "user", "password"}
+    keys = {'database', "host", "port", "user", "password", "chunk_size"}
     settings = {k: v for k, v in settings.items() if k in keys}
     _database_manager = init(driver, settings)
     return _database_manager
@@ -30,3 +35,9 @@ def init_influx(driver: Driver, settings: dict):
     from .database_influx import init
     _database_manager = init(driver, settings=settings)
     return _database_manager
+
+
+def init_cache(database_manager: BaseDatabaseManager):
+    from .database_cache import CachedDatabaseManager
+    _database_manager = CachedDatabaseManager(database_manager)
+    return _database_manager
@@ -93,41 +93,41 @@ class BaseGateway(ABC):
     def on_tick(self, tick: TickData) -> None:
         """
         Tick event push.
-        Tick event of a specific vt_symbol is also pushed.
+        Event type is the specific vt_symbol topic, which is also
+        delivered to handlers registered for all tick events.
         """
-        self.on_event(EVENT_TICK, tick)
         self.on_event(EVENT_TICK + tick.vt_symbol, tick)
 
     def on_trade(self, trade: TradeData) -> None:
         """
         Trade event push.
-        Trade event of a specific vt_symbol is also pushed.
+        Event type is the specific vt_symbol topic, which is also
+        delivered to handlers registered for all trade events.
         """
-        self.on_event(EVENT_TRADE, trade)
         self.on_event(EVENT_TRADE + trade.vt_symbol, trade)
 
     def on_order(self, order: OrderData) -> None:
         """
         Order event push.
-        Order event of a specific vt_orderid is also pushed.
+        Event type is the specific vt_orderid topic, which is also
+        delivered to handlers registered for all order events.
         """
-        self.on_event(EVENT_ORDER, order)
         self.on_event(EVENT_ORDER + order.vt_orderid, order)
 
     def on_position(self, position: PositionData) -> None:
         """
         Position event push.
-        Position event of a specific vt_symbol is also pushed.
+        Event type is the specific vt_symbol topic, which is also
+        delivered to handlers registered for all position events.
         """
-        self.on_event(EVENT_POSITION, position)
         self.on_event(EVENT_POSITION + position.vt_symbol, position)
 
     def on_account(self, account: AccountData) -> None:
         """
         Account event push.
-        Account event of a specific vt_accountid is also pushed.
+        Event type is the specific vt_accountid topic, which is also
+        delivered to handlers registered for all account events.
         """
-        self.on_event(EVENT_ACCOUNT, account)
         self.on_event(EVENT_ACCOUNT + account.vt_accountid, account)
 
     def on_log(self, log: LogData) -> None:
@@ -0,0 +1,193 @@
+"""
+In-process cache of history data loaded for backtesting.
+
+Unlike functools.lru_cache which limits number of results, the cache is
+bounded by estimated memory size of data, so that long running processes
+(e.g. optimization workers) never keep unlimited history data alive.
+"""
+
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import numpy as np
+
+from .database.database import BarArray
+from .setting import SETTINGS
+
+
+def get_object_size(obj: Any) -> int:
+    """
+    Get shallow size of object and its attributes.
+    """
+    size = sys.getsizeof(obj)
+
+    attributes = getattr(obj, "__dict__", None)
+    if attributes is None:
+        return size
+
+    size += sys.getsizeof(attributes)
+
+    for value in attributes.values():
+        if isinstance(value, np.ndarray):
+            size += value.nbytes
+        else:
+            size += sys.getsizeof(value)
+
+    return size
+
+
+def get_data_size(data: Any) -> int:
+    """
+    Estimate memory size of history data: a BarArray, or a list of objects
+    with same type (e.g. BarData, TickData).
+    """
+    if isinstance(data, BarArray):
+        size = get_object_size(data)
+
+        # Datetime list is created during replay
+        size += len(data) * (sys.getsizeof(datetime.now()) + 8)
+        return size
+
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+
+    if isinstance(data, (list, tuple)):
+        size = sys.getsizeof(data)
+        if data:
+            size += len(data) * get_object_size(data[0])
+        return size
+
+    return get_object_size(data)
+
+
+class HistoryCache:
+    """
+    LRU cache of history data with size budget in bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        """"""
+        self.max_bytes: int = max_bytes
+        self.total_bytes: int = 0
+
+        # key: (data, size), least recently used first
+        self.data: OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+        self.lock: Lock = Lock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.data)
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Get data of key, or call loader to load data if not cached.
+        """
+        with self.lock:
+            if key in self.data:
+                self.data.move_to_end(key)
+                self.hits += 1
+                return self.data[key][0]
+
+            self.misses += 1
+
+        # Loading is not locked since it may take long
+        data = loader()
+        size = get_data_size(data)
+
+        with self.lock:
+            # Data larger than whole budget is not cached
+            if size > self.max_bytes:
+                return data
+
+            if key in self.data:
+                self.total_bytes -= self.data.pop(key)[1]
+
+            self.data[key] = (data, size)
+            self.total_bytes += size
+
+            self.evict()
+
+        return data
+
+    def evict(self) -> None:
+        """
+        Remove least recently used data until within budget.
+        """
+        while self.total_bytes > self.max_bytes and self.data:
+            _, (_, size) = self.data.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """"""
+        with self.lock:
+            self.max_bytes = max_bytes
+            self.evict()
+
+    def invalidate(self, condition: Callable[[Hashable], bool] = None) -> int:
+        """
+        Remove data with key matching condition (all data if condition not
+        given), and return number of data removed.
+        """
+        with self.lock:
+            if condition:
+                keys = [key for key in self.data.keys() if condition(key)]
+            else:
+                keys = list(self.data.keys())
+
+            for key in keys:
+                self.total_bytes -= self.data.pop(key)[1]
+
+            return len(keys)
+
+    def get_statistics(self) -> Dict[str, int]:
+        """"""
+        with self.lock:
+            return {
+                "count": len(self.data),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+# Cache shared by all backtesting engines in the process
+history_cache: HistoryCache = HistoryCache(SETTINGS["backtesting.cache_size"] * 1024 * 1024)
+
+
+def cached_history(func: Callable) -> Callable:
+    """
+    Decorator to cache result of history data loading function in the
+    shared history cache. Cache key is (function name, arguments).
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs) -> Any:
+        key = (name, args, tuple(sorted(kwargs.items())))
+        return history_cache.get(key, lambda: func(*args, **kwargs))
+
+    def invalidate(condition: Callable[[tuple], bool] = None) -> int:
+        """
+        Remove cached results of the function with arguments matching
+        condition (all results if condition not given).
+        """
+        def check(key: Hashable) -> bool:
+            if key[0] != name:
+                return False
+            return not condition or condition(key[1])
+
+        return history_cache.invalidate(check)
+
+    wrapper.invalidate = invalidate
+    return wrapper
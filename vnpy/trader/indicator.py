@@ -0,0 +1,903 @@
+"""
+Streaming technical indicators updated per bar without recalculating
+the whole window.
+
+Values follow the definition of the talib function with the same name.
+Indicators based on smoothing (EMA/ATR/NATR/RSI/CMO/MACD/KELTNER) depend
+on where the smoothing is seeded, so they take the size of data window
+talib is calculated on (all bars received if size is 0), and give the
+same result as talib on the latest size bars.
+"""
+
+from collections import deque
+from itertools import islice
+from math import nan, sqrt
+from typing import Deque, Tuple
+
+import numpy as np
+
+
+class Indicator:
+    """
+    Base class of streaming indicator.
+    """
+
+    def __init__(self):
+        """"""
+        self.count: int = 0
+        self.value: float = nan
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """
+        Update new bar data into indicator.
+        """
+        pass
+
+
+class RollingSum:
+    """
+    Sum of last n values, recalculated every n updates to avoid
+    accumulated floating point error.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        self.n: int = n
+        self.values: Deque[float] = deque(maxlen=n)
+        self.sum: float = 0
+        self.updates: int = 0
+
+    def update(self, value: float) -> None:
+        """"""
+        if len(self.values) == self.n:
+            self.sum -= self.values[0]
+
+        self.values.append(value)
+        self.sum += value
+
+        self.updates += 1
+        if self.updates >= self.n:
+            self.sum = sum(self.values)
+            self.updates = 0
+
+    @property
+    def full(self) -> bool:
+        """"""
+        return len(self.values) == self.n
+
+
+class RollingVariance:
+    """
+    Population variance of last n values, from sums of values minus a
+    shift close to their mean, so that the sums stay small and precise.
+    Shift and sums are recalculated every n updates.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        self.n: int = n
+        self.values: Deque[float] = deque(maxlen=n)
+        self.shift: float = 0
+        self.sum: float = 0
+        self.sum_square: float = 0
+        self.updates: int = 0
+
+    def update(self, value: float) -> None:
+        """"""
+        values = self.values
+
+        if not values:
+            self.shift = value
+        elif len(values) == self.n:
+            old_value = values[0] - self.shift
+            self.sum -= old_value
+            self.sum_square -= old_value * old_value
+
+        values.append(value)
+        new_value = value - self.shift
+        self.sum += new_value
+        self.sum_square += new_value * new_value
+
+        self.updates += 1
+        if self.updates >= self.n:
+            self.shift = sum(values) / len(values)
+            self.sum = sum(v - self.shift for v in values)
+            self.sum_square = sum((v - self.shift) ** 2 for v in values)
+            self.updates = 0
+
+    @property
+    def full(self) -> bool:
+        """"""
+        return len(self.values) == self.n
+
+    @property
+    def variance(self) -> float:
+        """"""
+        count = len(self.values)
+        variance = (self.sum_square - self.sum * self.sum / count) / count
+        return max(variance, 0)
+
+
+class RollingExtreme:
+    """
+    Max or min of last n values, using monotonic deque.
+    """
+
+    def __init__(self, n: int, maximum: bool = True):
+        """"""
+        self.n: int = n
+        self.maximum: bool = maximum
+        self.count: int = 0
+        self.values: Deque[Tuple[int, float]] = deque()
+
+    def update(self, value: float) -> None:
+        """"""
+        values = self.values
+
+        if self.maximum:
+            while values and values[-1][1] <= value:
+                values.pop()
+        else:
+            while values and values[-1][1] >= value:
+                values.pop()
+
+        values.append((self.count, value))
+        self.count += 1
+
+        if values[0][0] <= self.count - 1 - self.n:
+            values.popleft()
+
+    @property
+    def value(self) -> float:
+        """"""
+        if self.count < self.n:
+            return nan
+        return self.values[0][1]
+
+
+class ExponentialSmoothing:
+    """
+    Exponential smoothing seeded with the mean of first n values, same as
+    talib calculated on the latest size values (all values if size is 0).
+
+    When the window slides, the seed at window start changes, and the
+    difference it makes is carried to the latest value with a constant
+    decay factor, so each update still costs O(1).
+    """
+
+    def __init__(self, n: int, alpha: float, size: int = 0):
+        """"""
+        self.n: int = n
+        self.alpha: float = alpha
+        self.decay: float = 1 - alpha
+        self.size: int = size
+
+        self.count: int = 0
+        self.value: float = nan
+        self.head: float = 0
+        self.updates: int = 0
+
+        if size:
+            self.values: Deque[float] = deque(maxlen=size + 1)
+            self.factor: float = self.decay ** (size - n)
+
+    def update(self, value: float) -> None:
+        """"""
+        self.count += 1
+
+        # Window shorter than period has no result
+        if self.size:
+            if self.size < self.n:
+                return
+            self.values.append(value)
+
+        # Seed with mean of first n values
+        if self.count < self.n:
+            self.head += value
+            return
+        elif self.count == self.n:
+            self.head += value
+            self.value = self.head / self.n
+            return
+
+        self.value += (value - self.value) * self.alpha
+
+        if not self.size or self.count <= self.size:
+            return
+
+        # Move seed of window from values[0:n] to values[1:n + 1]
+        values = self.values
+        n = self.n
+
+        self.updates += 1
+        if self.updates >= n:
+            next_head = sum(islice(values, 1, n + 1))
+            self.updates = 0
+        else:
+            next_head = self.head - values[0] + values[n]
+
+        change = (next_head - self.decay * self.head) / n - self.alpha * values[n]
+        self.value += change * self.factor
+        self.head = next_head
+
+
+class SmaIndicator(Indicator):
+    """
+    Simple moving average.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+        self.rolling: RollingSum = RollingSum(n)
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+        self.rolling.update(close_price)
+
+        if self.rolling.full:
+            self.value = self.rolling.sum / self.rolling.n
+
+
+class WmaIndicator(Indicator):
+    """
+    Linear weighted moving average, newest value weighted n.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+        self.n: int = n
+        self.rolling: RollingSum = RollingSum(n)
+        self.weighted_sum: float = 0
+        self.updates: int = 0
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+        rolling = self.rolling
+
+        if rolling.full:
+            # Weight of every value in window drops by 1
+            self.weighted_sum += self.n * close_price - rolling.sum
+        else:
+            self.weighted_sum += (len(rolling.values) + 1) * close_price
+
+        rolling.update(close_price)
+
+        self.updates += 1
+        if self.updates >= self.n:
+            self.weighted_sum = sum(
+                (i + 1) * value for i, value in enumerate(rolling.values)
+            )
+            self.updates = 0
+
+        if rolling.full:
+            self.value = self.weighted_sum * 2 / (self.n * (self.n + 1))
+
+
+class StdIndicator(Indicator):
+    """
+    Standard deviation (population, same as talib STDDEV).
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+        self.rolling: RollingVariance = RollingVariance(n)
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+        self.rolling.update(close_price)
+
+        if self.rolling.full:
+            self.value = sqrt(self.rolling.variance)
+
+
+class EmaIndicator(Indicator):
+    """
+    Exponential moving average, seeded with the SMA of first n values.
+    """
+
+    def __init__(self, n: int, size: int = 0):
+        """"""
+        super().__init__()
+        self.smoothing: ExponentialSmoothing = ExponentialSmoothing(
+            n, 2 / (n + 1), size
+        )
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+        self.smoothing.update(close_price)
+        self.value = self.smoothing.value
+
+
+class TrangeIndicator(Indicator):
+    """
+    True range.
+    """
+
+    def __init__(self):
+        """"""
+        super().__init__()
+        self.pre_close: float = nan
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+
+        if self.count > 1:
+            self.value = max(
+                high_price - low_price,
+                abs(high_price - self.pre_close),
+                abs(low_price - self.pre_close)
+            )
+
+        self.pre_close = close_price
+
+
+class AtrIndicator(Indicator):
+    """
+    Average True Range with Wilder smoothing.
+    """
+
+    def __init__(self, n: int, size: int = 0):
+        """"""
+        super().__init__()
+        self.trange: TrangeIndicator = TrangeIndicator()
+
+        # First bar of window has no true range
+        self.smoothing: ExponentialSmoothing = ExponentialSmoothing(
+            n, 1 / n, max(size - 1, 0)
+        )
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+        self.trange.update(open_price, high_price, low_price, close_price, volume)
+
+        if self.count == 1:
+            return
+
+        self.smoothing.update(self.trange.value)
+        self.value = self.smoothing.value
+
+
+class NatrIndicator(Indicator):
+    """
+    Normalized ATR.
+    """
+
+    def __init__(self, n: int, size: int = 0):
+        """"""
+        super().__init__()
+        self.atr: AtrIndicator = AtrIndicator(n, size)
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+        self.atr.update(open_price, high_price, low_price, close_price, volume)
+
+        if close_price:
+            self.value = self.atr.value / close_price * 100
+        else:
+            self.value = 0
+
+
+class RsiIndicator(Indicator):
+    """
+    Relative Strength Index with Wilder smoothing.
+    """
+
+    def __init__(self, n: int, size: int = 0):
+        """"""
+        super().__init__()
+        self.pre_close: float = nan
+
+        # First bar of window has no price change
+        self.gain: ExponentialSmoothing = ExponentialSmoothing(
+            n, 1 / n, max(size - 1, 0)
+        )
+        self.loss: ExponentialSmoothing = ExponentialSmoothing(
+            n, 1 / n, max(size - 1, 0)
+        )
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+        pre_close = self.pre_close
+        self.pre_close = close_price
+
+        if self.count == 1:
+            return
+
+        change = close_price - pre_close
+        self.gain.update(max(change, 0))
+        self.loss.update(max(-change, 0))
+
+        self.calculate(self.gain.value, self.loss.value)
+
+    def calculate(self, avg_gain: float, avg_loss: float) -> None:
+        """"""
+        total = avg_gain + avg_loss
+        if total:
+            self.value = 100 * avg_gain / total
+        else:
+            self.value = 0
+
+
+class CmoIndicator(RsiIndicator):
+    """
+    Chande Momentum Oscillator, smoothed the same way as RSI in talib.
+    """
+
+    def calculate(self, avg_gain: float, avg_loss: float) -> None:
+        """"""
+        total = avg_gain + avg_loss
+        if total:
+            self.value = 100 * (avg_gain - avg_loss) / total
+        else:
+            self.value = 0
+
+
+def get_ema_weights(length: int, n: int, alpha: float) -> np.ndarray:
+    """
+    Get weights of last EMA value on each of length values (oldest
+    first), with EMA seeded by mean of first n values.
+    """
+    decay = 1 - alpha
+
+    weights = np.empty(length)
+    weights[:n] = decay ** (length - n) / n
+    weights[n:] = alpha * decay ** np.arange(length - n - 1, -1, -1)
+    return weights
+
+
+def get_ema_input_weights(output_weights: np.ndarray, n: int, alpha: float) -> np.ndarray:
+    """
+    Get weights on input values of EMA, given weights on every EMA value
+    from the seed (index n - 1) to the end.
+    """
+    decay = 1 - alpha
+    length = len(output_weights) + n - 1
+
+    weights = np.empty(length)
+    carry = 0
+
+    for i in range(length - 1, n - 1, -1):
+        carry += output_weights[i - n + 1]
+        weights[i] = alpha * carry
+        carry *= decay
+
+    carry += output_weights[0]
+    weights[:n] = carry / n
+    return weights
+
+
+class MacdIndicator(Indicator):
+    """
+    MACD, value is a tuple of (macd, signal, hist).
+
+    Same as talib, fast EMA is seeded at the bar where slow EMA seed ends.
+    With size given, MACD on a fixed window is a weighted sum of close
+    prices in window, and the weights are calculated once. Weights too
+    small to change the result are left out.
+    """
+
+    def __init__(
+        self,
+        fast_period: int,
+        slow_period: int,
+        signal_period: int,
+        size: int = 0
+    ):
+        """"""
+        super().__init__()
+        self.value = (nan, nan, nan)
+
+        self.slow_period: int = slow_period
+        self.lag: int = slow_period - fast_period
+        self.lookback: int = slow_period + signal_period - 1
+
+        self.fast_ema: ExponentialSmoothing = ExponentialSmoothing(
+            fast_period, 2 / (fast_period + 1)
+        )
+        self.slow_ema: ExponentialSmoothing = ExponentialSmoothing(
+            slow_period, 2 / (slow_period + 1)
+        )
+        self.signal_ema: ExponentialSmoothing = ExponentialSmoothing(
+            signal_period, 2 / (signal_period + 1)
+        )
+
+        self.size: int = size
+        if size:
+            self.closes: np.ndarray = np.zeros(size * 2)
+            self.index: int = 0
+            self.init_weights(fast_period, slow_period, signal_period)
+
+    def init_weights(
+        self,
+        fast_period: int,
+        slow_period: int,
+        signal_period: int
+    ) -> None:
+        """
+        Calculate weights of macd and signal on close prices in window.
+        """
+        size = self.size
+        if size < self.lookback:
+            return
+
+        fast_alpha = 2 / (fast_period + 1)
+        slow_alpha = 2 / (slow_period + 1)
+        signal_alpha = 2 / (signal_period + 1)
+
+        macd_weights = get_ema_weights(size, slow_period, slow_alpha) * -1
+        macd_weights[self.lag:] += get_ema_weights(
+            size - self.lag, fast_period, fast_alpha
+        )
+
+        # Weights of signal on every macd value from slow EMA seed
+        output_weights = get_ema_weights(
+            size - slow_period + 1, signal_period, signal_alpha
+        )
+        signal_weights = get_ema_input_weights(
+            output_weights, slow_period, slow_alpha
+        ) * -1
+        signal_weights[self.lag:] += get_ema_input_weights(
+            output_weights, fast_period, fast_alpha
+        )
+
+        # Skip oldest values with weights under precision of result
+        total = np.abs(macd_weights) + np.abs(signal_weights)
+        tail = np.cumsum(total) < total.sum() * 1e-17
+        self.offset: int = int(tail.sum())
+
+        self.macd_weights: np.ndarray = macd_weights[self.offset:]
+        self.signal_weights: np.ndarray = signal_weights[self.offset:]
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+
+        if self.size:
+            self.update_window(close_price)
+        else:
+            self.update_smoothing(close_price)
+
+    def update_window(self, close_price: float) -> None:
+        """
+        Calculate from close prices in window once it is full.
+        """
+        i = self.index
+        size = self.size
+
+        self.closes[i] = self.closes[i + size] = close_price
+        self.index = (i + 1) % size
+
+        if self.count < size:
+            self.update_smoothing(close_price)
+            return
+        elif size < self.lookback:
+            return
+
+        closes = self.closes[self.index + self.offset:self.index + size]
+        macd = float(np.dot(self.macd_weights, closes))
+        signal = float(np.dot(self.signal_weights, closes))
+        self.value = (macd, signal, macd - signal)
+
+    def update_smoothing(self, close_price: float) -> None:
+        """
+        Calculate with EMAs of all close prices received.
+        """
+        if self.count > self.lag:
+            self.fast_ema.update(close_price)
+        self.slow_ema.update(close_price)
+
+        if self.count < self.slow_period:
+            return
+
+        macd = self.fast_ema.value - self.slow_ema.value
+        self.signal_ema.update(macd)
+
+        if self.count < self.lookback:
+            return
+
+        signal = self.signal_ema.value
+        self.value = (macd, signal, macd - signal)
+
+
+class BollIndicator(Indicator):
+    """
+    Bollinger channel, value is a tuple of (up, down).
+    """
+
+    def __init__(self, n: int, dev: float):
+        """"""
+        super().__init__()
+        self.value = (nan, nan)
+
+        self.dev: float = dev
+        self.sma: SmaIndicator = SmaIndicator(n)
+        self.std: StdIndicator = StdIndicator(n)
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+        self.sma.update(open_price, high_price, low_price, close_price, volume)
+        self.std.update(open_price, high_price, low_price, close_price, volume)
+
+        mid = self.sma.value
+        width = self.std.value * self.dev
+        self.value = (mid + width, mid - width)
+
+
+class KeltnerIndicator(Indicator):
+    """
+    Keltner channel, value is a tuple of (up, down).
+    """
+
+    def __init__(self, n: int, dev: float, size: int = 0):
+        """"""
+        super().__init__()
+        self.value = (nan, nan)
+
+        self.dev: float = dev
+        self.sma: SmaIndicator = SmaIndicator(n)
+        self.atr: AtrIndicator = AtrIndicator(n, size)
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+        self.sma.update(open_price, high_price, low_price, close_price, volume)
+        self.atr.update(open_price, high_price, low_price, close_price, volume)
+
+        mid = self.sma.value
+        width = self.atr.value * self.dev
+        self.value = (mid + width, mid - width)
+
+
+class DonchianIndicator(Indicator):
+    """
+    Donchian channel, value is a tuple of (up, down).
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+        self.value = (nan, nan)
+
+        self.high_max: RollingExtreme = RollingExtreme(n, True)
+        self.low_min: RollingExtreme = RollingExtreme(n, False)
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+        self.high_max.update(high_price)
+        self.low_min.update(low_price)
+
+        self.value = (self.high_max.value, self.low_min.value)
+
+
+class WillrIndicator(DonchianIndicator):
+    """
+    Williams' %R.
+    """
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        super().update(open_price, high_price, low_price, close_price, volume)
+
+        highest, lowest = self.value
+        diff = highest - lowest
+
+        if diff:
+            self.value = -100 * (highest - close_price) / diff
+        else:
+            self.value = 0
+
+
+class MomIndicator(Indicator):
+    """
+    Momentum: close - close of n bars ago.
+    """
+
+    def __init__(self, n: int):
+        """"""
+        super().__init__()
+        self.closes: Deque[float] = deque(maxlen=n + 1)
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+        self.closes.append(close_price)
+
+        if len(self.closes) == self.closes.maxlen:
+            self.calculate(close_price, self.closes[0])
+
+    def calculate(self, close_price: float, pre_close: float) -> None:
+        """"""
+        self.value = close_price - pre_close
+
+
+class RocIndicator(MomIndicator):
+    """
+    Rate of change: (close / close of n bars ago - 1) * 100.
+    """
+
+    def calculate(self, close_price: float, pre_close: float) -> None:
+        """"""
+        if pre_close:
+            self.value = (close_price / pre_close - 1) * 100
+        else:
+            self.value = 0
+
+
+class RocpIndicator(MomIndicator):
+    """
+    Rate of change percentage: close / close of n bars ago - 1.
+    """
+
+    def calculate(self, close_price: float, pre_close: float) -> None:
+        """"""
+        if pre_close:
+            self.value = close_price / pre_close - 1
+        else:
+            self.value = 0
+
+
+class RocrIndicator(MomIndicator):
+    """
+    Rate of change ratio: close / close of n bars ago.
+    """
+
+    def calculate(self, close_price: float, pre_close: float) -> None:
+        """"""
+        if pre_close:
+            self.value = close_price / pre_close
+        else:
+            self.value = 0
+
+
+class Rocr100Indicator(MomIndicator):
+    """
+    Rate of change ratio in 100 scale: close / close of n bars ago * 100.
+    """
+
+    def calculate(self, close_price: float, pre_close: float) -> None:
+        """"""
+        if pre_close:
+            self.value = close_price / pre_close * 100
+        else:
+            self.value = 0
+
+
+class BopIndicator(Indicator):
+    """
+    Balance of power: (close - open) / (high - low).
+    """
+
+    def update(
+        self,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float
+    ) -> None:
+        """"""
+        self.count += 1
+
+        diff = high_price - low_price
+        if diff > 0:
+            self.value = (close_price - open_price) / diff
+        else:
+            self.value = 0
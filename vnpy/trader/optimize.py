@@ -0,0 +1,404 @@
+"""
+Parameter optimization of backtesting with multiple processes.
+
+History data is put into shared memory by the main process and attached
+by each worker once when the pool starts, so that tasks only carry the
+parameter setting, and results are streamed back as soon as finished.
+
+On Python 3.7 where multiprocessing.shared_memory is not available, arrays
+are shared with memory-mapped temp files instead.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+from functools import reduce
+from itertools import product
+from multiprocessing import Pool, cpu_count
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    SharedMemory = None
+
+
+# Result of one backtesting: (setting, target value, statistics)
+OptimizationResult = Tuple[dict, float, dict]
+
+
+class OptimizationSetting:
+    """
+    Setting for running optimization.
+    """
+
+    def __init__(self):
+        """"""
+        self.params: Dict[str, List] = {}
+        self.target_name: str = ""
+        self.random_count: int = 0
+
+    def add_parameter(
+        self,
+        name: str,
+        start: float,
+        end: float = None,
+        step: float = None
+    ) -> None:
+        """
+        Add parameter with a single value, or values from start to end
+        by step. Raise ValueError if range or step is invalid.
+        """
+        if not end and not step:
+            self.params[name] = [start]
+            return
+
+        if end is None or start >= end:
+            raise ValueError(
+                f"Start of parameter {name} must be less than end"
+            )
+
+        if step is None or step <= 0:
+            raise ValueError(
+                f"Step of parameter {name} must be greater than 0"
+            )
+
+        value = start
+        value_list = []
+
+        while value <= end:
+            value_list.append(value)
+            value += step
+
+        self.params[name] = value_list
+
+    def set_target(self, target_name: str) -> None:
+        """"""
+        self.target_name = target_name
+
+    def set_random_count(self, count: int) -> None:
+        """
+        Use random search with given number of settings sampled from
+        the grid, 0 for searching the whole grid.
+        """
+        self.random_count = count
+
+    def get_total_count(self) -> int:
+        """
+        Get number of settings in the whole grid.
+        """
+        return reduce(lambda x, y: x * len(y), self.params.values(), 1)
+
+    def generate_setting(self) -> List[dict]:
+        """
+        Generate settings of grid search, or random search if random
+        count is set.
+        """
+        keys = list(self.params.keys())
+        values = list(self.params.values())
+        total_count = self.get_total_count()
+
+        if not self.random_count or self.random_count >= total_count:
+            return [dict(zip(keys, p)) for p in product(*values)]
+
+        # Decode sampled grid index into value of each parameter,
+        # so that the whole grid is never created in memory.
+        settings = []
+
+        for index in random.sample(range(total_count), self.random_count):
+            setting = {}
+
+            for key, value_list in zip(reversed(keys), reversed(values)):
+                index, ix = divmod(index, len(value_list))
+                setting[key] = value_list[ix]
+
+            settings.append({key: setting[key] for key in keys})
+
+        return settings
+
+
+class SharedArrays:
+    """
+    Numpy arrays copied into shared memory blocks, or memory-mapped temp
+    files if shared memory is not supported.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        """"""
+        self.blocks: List[SharedMemory] = []
+        self.specs: Dict[str, Tuple[str, str, tuple]] = {}
+        self.temp_dir: str = ""
+
+        if not SharedMemory:
+            self.temp_dir = tempfile.mkdtemp(prefix="vnpy_optimize_")
+
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+
+            if SharedMemory:
+                # Size of shared memory must be positive
+                block = SharedMemory(create=True, size=max(array.nbytes, 1))
+                buf = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+                buf[:] = array[:]
+
+                self.blocks.append(block)
+                location = block.name
+            else:
+                location = os.path.join(self.temp_dir, f"{name}.dat")
+                array.tofile(location)
+
+            self.specs[name] = (location, array.dtype.str, array.shape)
+
+    def close(self) -> None:
+        """
+        Release shared memory blocks or temp files.
+        """
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+
+        self.blocks.clear()
+
+        if self.temp_dir:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self.temp_dir = ""
+
+
+def attach_arrays(
+    specs: Dict[str, Tuple[str, str, tuple]]
+) -> Tuple[Dict[str, np.ndarray], list]:
+    """
+    Attach arrays created by SharedArrays. Arrays are only valid before
+    returned blocks (shared memory or memory maps) are closed.
+    """
+    arrays = {}
+    blocks = []
+
+    for name, (location, dtype, shape) in specs.items():
+        dtype = np.dtype(dtype)
+
+        if SharedMemory:
+            block = SharedMemory(name=location)
+            array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            blocks.append(block)
+        elif int(np.prod(shape)):
+            array = np.memmap(location, dtype=dtype, mode="r", shape=shape)
+            blocks.append(array)
+        else:
+            # Empty file cannot be memory-mapped
+            array = np.empty(shape, dtype=dtype)
+
+        arrays[name] = array
+
+    return arrays, blocks
+
+
+def get_setting_key(setting: dict) -> tuple:
+    """"""
+    return tuple(setting.items())
+
+
+class OptimizationPool:
+    """
+    Pool of worker processes running backtesting of settings, shared by
+    brute force and genetic algorithm optimization.
+
+    Evaluate function receives a setting dict and returns OptimizationResult,
+    it runs in worker process after initializer called once.
+
+    Worker processes are only started when a setting is not found by
+    load_result, so that fully stored optimization never starts them.
+    """
+
+    def __init__(
+        self,
+        evaluate_func: Callable[[dict], OptimizationResult],
+        initializer: Callable = None,
+        initargs: tuple = (),
+        max_workers: int = None,
+        output: Callable[[str], Any] = print,
+        callback: Callable[[OptimizationResult, int, int], Any] = None,
+        load_result: Callable[[dict], Optional[OptimizationResult]] = None,
+        save_result: Callable[[OptimizationResult], Any] = None
+    ):
+        """"""
+        self.evaluate_func = evaluate_func
+        self.initializer = initializer
+        self.initargs = initargs
+        self.max_workers: int = max_workers or cpu_count()
+        self.output = output
+        self.callback = callback
+
+        # For reading and writing results in result store
+        self.load_result = load_result
+        self.save_result = save_result
+
+        self.pool: Pool = None
+
+        # Results of settings already evaluated
+        self.results: Dict[tuple, OptimizationResult] = {}
+
+    def __enter__(self) -> "OptimizationPool":
+        """"""
+        return self
+
+    def __exit__(self, *args) -> None:
+        """"""
+        self.close()
+
+    def start(self) -> None:
+        """"""
+        self.pool = Pool(
+            self.max_workers,
+            initializer=self.initializer,
+            initargs=self.initargs
+        )
+
+    def close(self) -> None:
+        """"""
+        if self.pool:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def evaluate(self, settings: List[dict]) -> List[OptimizationResult]:
+        """
+        Run backtesting of settings not evaluated before, results are
+        returned in the same order of settings.
+        """
+        tasks = []
+        task_keys = set()
+
+        for setting in settings:
+            key = get_setting_key(setting)
+            if key in self.results or key in task_keys:
+                continue
+
+            # Use result stored by previous optimization if exists
+            if self.load_result:
+                result = self.load_result(setting)
+                if result:
+                    self.results[key] = result
+                    continue
+
+            tasks.append(setting)
+            task_keys.add(key)
+
+        if tasks and not self.pool:
+            self.start()
+
+        total = len(tasks)
+        for finished, result in enumerate(
+            self.pool.imap_unordered(self.evaluate_func, tasks),
+            start=1
+        ):
+            self.results[get_setting_key(result[0])] = result
+
+            if self.save_result:
+                self.save_result(result)
+
+            if self.callback:
+                self.callback(result, finished, total)
+
+        return [self.results[get_setting_key(setting)] for setting in settings]
+
+    def get_sorted_results(self) -> List[OptimizationResult]:
+        """
+        Get all results evaluated, sorted by target value.
+        """
+        results = list(self.results.values())
+        results.sort(reverse=True, key=lambda result: result[1])
+        return results
+
+    def run_bf_optimization(
+        self,
+        optimization_setting: OptimizationSetting
+    ) -> List[OptimizationResult]:
+        """
+        Run brute force (grid or random search) optimization.
+        """
+        settings = optimization_setting.generate_setting()
+        self.output(f"Parameter optimization space: {len(settings)}, processes: {self.max_workers}")
+
+        self.evaluate(settings)
+        return self.get_sorted_results()
+
+    def run_ga_optimization(
+        self,
+        optimization_setting: OptimizationSetting,
+        population_size: int = 100,
+        ngen_size: int = 30
+    ) -> List[OptimizationResult]:
+        """
+        Run genetic algorithm optimization.
+        """
+        from deap import algorithms, base, creator, tools
+
+        if not hasattr(creator, "FitnessMax"):
+            creator.create("FitnessMax", base.Fitness, weights=(1.0,))
+            creator.create("Individual", list, fitness=creator.FitnessMax)
+
+        params = optimization_setting.params
+        names = list(params.keys())
+
+        def generate_individual() -> list:
+            """"""
+            return [random.choice(params[name]) for name in names]
+
+        def mutate_individual(individual: list, indpb: float) -> tuple:
+            """"""
+            for i, name in enumerate(names):
+                if random.random() < indpb:
+                    individual[i] = random.choice(params[name])
+            return individual,
+
+        def map_fitness(func: Callable, individuals: List[list]) -> List[tuple]:
+            """
+            Evaluate a generation of individuals with the worker pool.
+            """
+            settings = [dict(zip(names, individual)) for individual in individuals]
+            results = self.evaluate(settings)
+            return [(result[1],) for result in results]
+
+        toolbox = base.Toolbox()
+        toolbox.register("individual", tools.initIterate, creator.Individual, generate_individual)
+        toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+        toolbox.register("mate", tools.cxUniform, indpb=0.5)
+        toolbox.register("mutate", mutate_individual, indpb=1)
+        toolbox.register("select", tools.selNSGA2)
+        toolbox.register("evaluate", self.evaluate_func)
+        toolbox.register("map", map_fitness)
+
+        total_size = optimization_setting.get_total_count()
+        pop_size = population_size                  # number of individuals in each generation
+        lambda_ = pop_size                          # number of children to produce at each generation
+        mu = int(pop_size * 0.8)                    # number of individuals to select for the next generation
+
+        cxpb = 0.95         # probability that an offspring is produced by crossover
+        mutpb = 1 - cxpb    # probability that an offspring is produced by mutation
+        ngen = ngen_size    # number of generation
+
+        pop = toolbox.population(pop_size)
+
+        self.output(f"Parameter optimization space: {total_size}, processes: {self.max_workers}")
+        self.output(f"Population size of each generation: {pop_size}")
+        self.output(f"Individuals selected for next generation: {mu}")
+        self.output(f"Number of generations: {ngen}")
+        self.output(f"Crossover probability: {cxpb:.0%}")
+        self.output(f"Mutation probability: {mutpb:.0%}")
+
+        algorithms.eaMuPlusLambda(
+            pop,
+            toolbox,
+            mu,
+            lambda_,
+            cxpb,
+            mutpb,
+            ngen,
+            verbose=False
+        )
+
+        return self.get_sorted_results()
@@ -0,0 +1,132 @@
+"""
+Active orders of backtesting indexed by symbol and sorted by price.
+
+Orders of each symbol are kept in one list for buy side and one for sell
+side, sorted from the most easily crossed price. So matching with a bar
+or tick only walks the orders really crossed, instead of all orders.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Tuple
+
+from .constant import Direction
+
+
+# Key of sorted list: (sort price, sequence, order id)
+BookKey = Tuple[float, int, str]
+
+
+class OrderBook:
+    """
+    Limit order book crosses buy orders with price above market price,
+    and sell orders with price below. Stop order book is the opposite.
+    """
+
+    def __init__(self, stop: bool = False):
+        """"""
+        self.stop: bool = stop
+        self.count: int = 0
+
+        self.keys: Dict[str, Tuple[str, Direction, BookKey]] = {}
+        self.long_books: Dict[str, List[BookKey]] = {}
+        self.short_books: Dict[str, List[BookKey]] = {}
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.keys)
+
+    def __contains__(self, order_id: str) -> bool:
+        """"""
+        return order_id in self.keys
+
+    def get_book(self, vt_symbol: str, direction: Direction) -> List[BookKey]:
+        """"""
+        if direction == Direction.LONG:
+            books = self.long_books
+        else:
+            books = self.short_books
+
+        book = books.get(vt_symbol, None)
+        if book is None:
+            book = []
+            books[vt_symbol] = book
+        return book
+
+    def get_sort_price(self, direction: Direction, price: float) -> float:
+        """
+        Sort price is ascending from the most easily crossed order.
+        """
+        if (direction == Direction.LONG) != self.stop:
+            return -price
+        return price
+
+    def add(
+        self,
+        order_id: str,
+        vt_symbol: str,
+        direction: Direction,
+        price: float
+    ) -> None:
+        """"""
+        self.count += 1
+
+        key = (self.get_sort_price(direction, price), self.count, order_id)
+        insort(self.get_book(vt_symbol, direction), key)
+
+        self.keys[order_id] = (vt_symbol, direction, key)
+
+    def remove(self, order_id: str) -> None:
+        """"""
+        data = self.keys.pop(order_id, None)
+        if not data:
+            return
+
+        vt_symbol, direction, key = data
+        book = self.get_book(vt_symbol, direction)
+
+        ix = bisect_left(book, key)
+        if ix < len(book) and book[ix] == key:
+            del book[ix]
+
+    def clear(self) -> None:
+        """"""
+        self.count = 0
+        self.keys.clear()
+        self.long_books.clear()
+        self.short_books.clear()
+
+    def get_crossed(
+        self,
+        prices: Dict[str, Tuple[Optional[float], Optional[float]]]
+    ) -> List[str]:
+        """
+        Get id of orders crossed by (long cross price, short cross price)
+        of each vt_symbol, sorted by time added. Side with price None is
+        never crossed.
+
+        * limit order: buy price >= long price, sell price <= short price
+        * stop order: buy price <= long price, sell price >= short price
+        """
+        if not self.keys:
+            return []
+
+        keys = []
+
+        for vt_symbol, (long_price, short_price) in prices.items():
+            for direction, price in [
+                (Direction.LONG, long_price),
+                (Direction.SHORT, short_price)
+            ]:
+                if price is None:
+                    continue
+
+                book = self.get_book(vt_symbol, direction)
+                if not book:
+                    continue
+
+                sort_price = self.get_sort_price(direction, price)
+                ix = bisect_right(book, (sort_price, float("inf")))
+                keys.extend(book[:ix])
+
+        keys.sort(key=lambda key: key[1])
+        return [key[2] for key in keys]
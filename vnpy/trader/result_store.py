@@ -0,0 +1,231 @@
+"""
+Local store of backtesting statistics, so that a run with the same
+strategy code, setting, data range and cost model is never repeated.
+"""
+
+import hashlib
+import inspect
+import json
+import pickle
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from peewee import (
+    BlobField,
+    CharField,
+    DateTimeField,
+    Model,
+    SqliteDatabase,
+    TextField
+)
+
+from .constant import Interval
+from .utility import extract_vt_symbol, get_file_path
+
+
+def get_class_source(cls: type) -> bytes:
+    """
+    Get source code of class. For class compiled without source
+    (e.g. pyd file), the file content is used.
+    """
+    try:
+        return inspect.getsource(cls).encode("utf-8")
+    except (OSError, TypeError):
+        try:
+            with open(inspect.getfile(cls), "rb") as f:
+                return f.read()
+        except (OSError, TypeError):
+            return cls.__qualname__.encode("utf-8")
+
+
+def get_class_hash(strategy_class: type) -> str:
+    """
+    Get hash of source code of strategy class and all its base classes
+    (e.g. strategy template), since any of them may change the result.
+    """
+    sha = hashlib.sha1()
+
+    for cls in strategy_class.__mro__:
+        if cls is object:
+            continue
+        sha.update(get_class_source(cls))
+
+    return sha.hexdigest()
+
+
+def get_data_end(vt_symbols: List[str], interval: Interval = None) -> Optional[datetime]:
+    """
+    Get datetime (without tzinfo, as used by database query) of the newest
+    bar of symbols in database, or the newest tick if interval not given.
+
+    Used as end of backtesting when not specified, so that fingerprint
+    only changes when newer data is saved.
+    """
+    from .database import database_manager
+
+    dts = []
+
+    for vt_symbol in vt_symbols:
+        symbol, exchange = extract_vt_symbol(vt_symbol)
+
+        if interval:
+            data = database_manager.get_newest_bar_data(symbol, exchange, interval)
+        else:
+            data = database_manager.get_newest_tick_data(symbol, exchange)
+
+        if data:
+            dts.append(data.datetime.replace(tzinfo=None))
+
+    if not dts:
+        return None
+    return max(dts)
+
+
+def get_fingerprint(
+    strategy_class: type,
+    setting: dict,
+    parameters: Dict[str, Any]
+) -> str:
+    """
+    Get fingerprint of a backtesting run with strategy class, strategy
+    setting and engine parameters (symbols, date range, cost model, ...).
+    """
+    data = {
+        "class_name": strategy_class.__name__,
+        "class_hash": get_class_hash(strategy_class),
+        "setting": setting,
+        "parameters": parameters
+    }
+    text = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    """
+    Backtesting statistics stored in sqlite file under .vntrader folder.
+    """
+
+    def __init__(self, filename: str = "backtesting_result.db"):
+        """"""
+        path = str(get_file_path(filename))
+        self.db: SqliteDatabase = SqliteDatabase(path)
+
+        class DbBacktestingResult(Model):
+            """
+            Statistics of one backtesting run, unique by fingerprint.
+            """
+
+            fingerprint: str = CharField(unique=True)
+            class_name: str = CharField(index=True)
+            class_hash: str = CharField()
+            vt_symbols: str = CharField()
+            start: datetime = DateTimeField(null=True)
+            end: datetime = DateTimeField(null=True)
+            setting: str = TextField()
+            statistics: bytes = BlobField()
+            datetime: datetime = DateTimeField()
+
+            class Meta:
+                database = self.db
+
+        self.class_result = DbBacktestingResult
+
+        self.db.connect()
+        self.db.create_tables([DbBacktestingResult])
+
+    def get(self, fingerprint: str) -> Optional[dict]:
+        """
+        Get statistics of backtesting run with fingerprint.
+        """
+        s = self.class_result.get_or_none(
+            self.class_result.fingerprint == fingerprint
+        )
+        if not s:
+            return None
+        return pickle.loads(s.statistics)
+
+    def put(
+        self,
+        fingerprint: str,
+        strategy_class: type,
+        vt_symbols: List[str],
+        start: datetime,
+        end: datetime,
+        setting: dict,
+        statistics: dict
+    ) -> None:
+        """
+        Save statistics of backtesting run, replace if exists.
+        """
+        data = {
+            "fingerprint": fingerprint,
+            "class_name": strategy_class.__name__,
+            "class_hash": get_class_hash(strategy_class),
+            "vt_symbols": ",".join(vt_symbols),
+            "start": start,
+            "end": end,
+            "setting": json.dumps(setting, sort_keys=True, default=str),
+            "statistics": pickle.dumps(statistics),
+            "datetime": datetime.now()
+        }
+        self.class_result.insert(data).on_conflict_replace().execute()
+
+    def query(
+        self,
+        class_name: str = "",
+        vt_symbol: str = ""
+    ) -> List[dict]:
+        """
+        Query stored results, filtered by strategy class name and symbol.
+        """
+        s = self.class_result.select()
+
+        if class_name:
+            s = s.where(self.class_result.class_name == class_name)
+
+        if vt_symbol:
+            s = s.where(self.class_result.vt_symbols.contains(vt_symbol))
+
+        results = []
+
+        for data in s.order_by(self.class_result.datetime.desc()):
+            results.append({
+                "fingerprint": data.fingerprint,
+                "class_name": data.class_name,
+                "vt_symbols": data.vt_symbols.split(","),
+                "start": data.start,
+                "end": data.end,
+                "setting": json.loads(data.setting),
+                "statistics": pickle.loads(data.statistics),
+                "datetime": data.datetime
+            })
+
+        return results
+
+    def prune(
+        self,
+        class_name: str = "",
+        before: datetime = None,
+        strategy_class: type = None
+    ) -> int:
+        """
+        Delete stored results and return number deleted:
+        * class_name: only results of the strategy class name
+        * before: only results saved before the datetime
+        * strategy_class: only results of older source code of the class
+        """
+        query = self.class_result.delete()
+
+        if class_name:
+            query = query.where(self.class_result.class_name == class_name)
+
+        if before:
+            query = query.where(self.class_result.datetime < before)
+
+        if strategy_class:
+            query = query.where(
+                (self.class_result.class_name == strategy_class.__name__)
+                & (self.class_result.class_hash != get_class_hash(strategy_class))
+            )
+
+        return query.execute()
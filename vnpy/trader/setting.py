@@ -35,6 +35,10 @@ SETTINGS: Dict[str, Any] = {
     "database.user": "root",
     "database.password": "",
     "database.authentication_source": "admin",  # for mongodb
+    "database.cache": False,                    # local bar data cache
+    "database.chunk_size": 0,                   # rows per insert, 0 for driver default
+
+    "backtesting.cache_size": 1024,             # MB of history data cached in each process
 
     "genus.parent_host": "",
     "genus.parent_port": "",
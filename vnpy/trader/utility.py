@@ -15,6 +15,29 @@ import talib
 
 from .object import BarData, TickData
 from .constant import Exchange, Interval
+from .indicator import (
+    Indicator,
+    SmaIndicator,
+    EmaIndicator,
+    StdIndicator,
+    AtrIndicator,
+    NatrIndicator,
+    TrangeIndicator,
+    RsiIndicator,
+    CmoIndicator,
+    MacdIndicator,
+    BollIndicator,
+    KeltnerIndicator,
+    DonchianIndicator,
+    WillrIndicator,
+    MomIndicator,
+    RocIndicator,
+    RocpIndicator,
+    RocrIndicator,
+    Rocr100Indicator,
+    WmaIndicator,
+    BopIndicator
+)
 
 
 log_formatter = logging.Formatter('[%(asctime)s] %(message)s')
@@ -127,6 +150,27 @@ def round_to(value: float, target: float) -> float:
     return rounded
 
 
+def round_to_array(values: np.ndarray, target: float) -> np.ndarray:
+    """
+    Round array of price to price tick value, same result as round_to.
+    """
+    target = Decimal(str(target))
+
+    # Price tick as integer divided by power of 10
+    scale = 10 ** max(-target.as_tuple().exponent, 0)
+    multiple = int(target * scale)
+
+    quotients = values / float(target)
+    rounded = np.rint(quotients)
+
+    # Quotient close to half may be rounded wrongly due to float error
+    ambiguous = np.abs(quotients - np.floor(quotients) - 0.5) < 1e-6
+    for ix in np.flatnonzero(ambiguous):
+        rounded[ix] = round(Decimal(str(float(values[ix]))) / target)
+
+    return rounded * multiple / scale
+
+
 def floor_to(value: float, target: float) -> float:
     """
     Similar to math.floor function, but to target float number.
@@ -324,20 +368,45 @@ class ArrayManager(object):
     For:
     1. time series container of bar data
     2. calculating technical indicator value
+
+    Notice:
+    1. with ring=True, bar data is stored in a circular buffer so that
+    update_bar costs O(1) regardless of size
+    2. in ring mode the xxx_array attributes are the mirrored buffers
+    (2 * size long), always use the open/high/low/close/volume/open_interest
+    properties to get the time series
+    3. with stream=True, latest value (array=False) of sma/ema/wma/std/atr/
+    natr/trange/rsi/cmo/macd/boll/keltner/donchian/willr/mom/roc/rocp/rocr/
+    rocr_100/bop is calculated by streaming indicators, with the same result
+    as talib on the latest size bars. Other indicators and array results
+    still use talib in stream mode.
     """
 
-    def __init__(self, size: int = 100):
+    def __init__(self, size: int = 100, ring: bool = False, stream: bool = False):
         """Constructor"""
         self.count: int = 0
         self.size: int = size
         self.inited: bool = False
 
-        self.open_array: np.ndarray = np.zeros(size)
-        self.high_array: np.ndarray = np.zeros(size)
-        self.low_array: np.ndarray = np.zeros(size)
-        self.close_array: np.ndarray = np.zeros(size)
-        self.volume_array: np.ndarray = np.zeros(size)
-        self.open_interest_array: np.ndarray = np.zeros(size)
+        # Each value is written twice (at index and index + size) in ring
+        # mode, so the latest size values are always a contiguous slice.
+        self.ring: bool = ring
+        self.index: int = 0
+
+        if ring:
+            buffer_size = size * 2
+        else:
+            buffer_size = size
+
+        self.open_array: np.ndarray = np.zeros(buffer_size)
+        self.high_array: np.ndarray = np.zeros(buffer_size)
+        self.low_array: np.ndarray = np.zeros(buffer_size)
+        self.close_array: np.ndarray = np.zeros(buffer_size)
+        self.volume_array: np.ndarray = np.zeros(buffer_size)
+        self.open_interest_array: np.ndarray = np.zeros(buffer_size)
+
+        self.stream: bool = stream
+        self.indicators: Dict[tuple, Indicator] = {}
 
     def update_bar(self, bar: BarData) -> None:
         """
@@ -347,6 +416,24 @@ class ArrayManager(object):
         if not self.inited and self.count >= self.size:
             self.inited = True
 
+        if self.ring:
+            self.update_ring(bar)
+        else:
+            self.update_shift(bar)
+
+        for indicator in self.indicators.values():
+            indicator.update(
+                bar.open_price,
+                bar.high_price,
+                bar.low_price,
+                bar.close_price,
+                bar.volume
+            )
+
+    def update_shift(self, bar: BarData) -> None:
+        """
+        Shift data arrays by one slot and write new bar data at the end.
+        """
         self.open_array[:-1] = self.open_array[1:]
         self.high_array[:-1] = self.high_array[1:]
         self.low_array[:-1] = self.low_array[1:]
@@ -361,52 +448,106 @@ class ArrayManager(object):
         self.volume_array[-1] = bar.volume
         self.open_interest_array[-1] = bar.open_interest
 
+    def update_ring(self, bar: BarData) -> None:
+        """
+        Write new bar data into the circular buffer.
+        """
+        i = self.index
+        j = i + self.size
+
+        self.open_array[i] = self.open_array[j] = bar.open_price
+        self.high_array[i] = self.high_array[j] = bar.high_price
+        self.low_array[i] = self.low_array[j] = bar.low_price
+        self.close_array[i] = self.close_array[j] = bar.close_price
+        self.volume_array[i] = self.volume_array[j] = bar.volume
+        self.open_interest_array[i] = self.open_interest_array[j] = bar.open_interest
+
+        self.index = (i + 1) % self.size
+
+    def get_series(self, buffer: np.ndarray) -> np.ndarray:
+        """
+        Get time series (oldest first) from data buffer.
+        """
+        if not self.ring:
+            return buffer
+        return buffer[self.index:self.index + self.size]
+
+    def get_indicator(self, indicator_class: type, *params) -> Indicator:
+        """
+        Get streaming indicator, create and warm it up with bar data
+        already in array manager if not exists.
+        """
+        key = (indicator_class, params)
+        indicator = self.indicators.get(key, None)
+
+        if not indicator:
+            indicator = indicator_class(*params)
+            self.indicators[key] = indicator
+
+            start = max(self.size - self.count, 0)
+            data = zip(
+                self.open[start:],
+                self.high[start:],
+                self.low[start:],
+                self.close[start:],
+                self.volume[start:]
+            )
+            for open_price, high_price, low_price, close_price, volume in data:
+                indicator.update(
+                    open_price, high_price, low_price, close_price, volume
+                )
+
+        return indicator
+
     @property
     def open(self) -> np.ndarray:
         """
         Get open price time series.
         """
-        return self.open_array
+        return self.get_series(self.open_array)
 
     @property
     def high(self) -> np.ndarray:
         """
         Get high price time series.
         """
-        return self.high_array
+        return self.get_series(self.high_array)
 
     @property
     def low(self) -> np.ndarray:
         """
         Get low price time series.
         """
-        return self.low_array
+        return self.get_series(self.low_array)
 
     @property
     def close(self) -> np.ndarray:
         """
         Get close price time series.
         """
-        return self.close_array
+        return self.get_series(self.close_array)
 
     @property
     def volume(self) -> np.ndarray:
         """
         Get trading volume time series.
         """
-        return self.volume_array
+        return self.get_series(self.volume_array)
 
     @property
     def open_interest(self) -> np.ndarray:
         """
         Get trading volume time series.
         """
-        return self.open_interest_array
+        return self.get_series(self.open_interest_array)
 
     def sma(self, n: int, array: bool = False) -> Union[float, np.ndarray]:
         """
         Simple moving average.
         """
+        if self.stream and not array:
+            return self.get_indicator(SmaIndicator, n).value
+
         result = talib.SMA(self.close, n)
         if array:
             return result
@@ -416,6 +557,9 @@ class ArrayManager(object):
         """
         Exponential moving average.
         """
+        if self.stream and not array:
+            return self.get_indicator(EmaIndicator, n, self.size).value
+
         result = talib.EMA(self.close, n)
         if array:
             return result
@@ -434,6 +578,9 @@ class ArrayManager(object):
         """
         WMA.
         """
+        if self.stream and not array:
+            return self.get_indicator(WmaIndicator, n).value
+
         result = talib.WMA(self.close, n)
         if array:
             return result
@@ -452,6 +599,9 @@ class ArrayManager(object):
         """
         CMO.
         """
+        if self.stream and not array:
+            return self.get_indicator(CmoIndicator, n, self.size).value
+
         result = talib.CMO(self.close, n)
         if array:
             return result
@@ -461,6 +611,9 @@ class ArrayManager(object):
         """
         MOM.
         """
+        if self.stream and not array:
+            return self.get_indicator(MomIndicator, n).value
+
         result = talib.MOM(self.close, n)
         if array:
             return result
@@ -479,6 +632,9 @@ class ArrayManager(object):
         """
         ROC.
         """
+        if self.stream and not array:
+            return self.get_indicator(RocIndicator, n).value
+
         result = talib.ROC(self.close, n)
         if array:
             return result
@@ -488,6 +644,9 @@ class ArrayManager(object):
         """
         ROCR.
         """
+        if self.stream and not array:
+            return self.get_indicator(RocrIndicator, n).value
+
         result = talib.ROCR(self.close, n)
         if array:
             return result
@@ -497,6 +656,9 @@ class ArrayManager(object):
         """
         ROCP.
         """
+        if self.stream and not array:
+            return self.get_indicator(RocpIndicator, n).value
+
         result = talib.ROCP(self.close, n)
         if array:
             return result
@@ -506,6 +668,9 @@ class ArrayManager(object):
         """
         ROCR100.
         """
+        if self.stream and not array:
+            return self.get_indicator(Rocr100Indicator, n).value
+
         result = talib.ROCR100(self.close, n)
         if array:
             return result
@@ -524,6 +689,9 @@ class ArrayManager(object):
         """
         Standard deviation.
         """
+        if self.stream and not array:
+            return self.get_indicator(StdIndicator, n).value
+
         result = talib.STDDEV(self.close, n)
         if array:
             return result
@@ -551,6 +719,9 @@ class ArrayManager(object):
         """
         Average True Range (ATR).
         """
+        if self.stream and not array:
+            return self.get_indicator(AtrIndicator, n, self.size).value
+
         result = talib.ATR(self.high, self.low, self.close, n)
         if array:
             return result
@@ -560,6 +731,9 @@ class ArrayManager(object):
         """
         NATR.
         """
+        if self.stream and not array:
+            return self.get_indicator(NatrIndicator, n, self.size).value
+
         result = talib.NATR(self.high, self.low, self.close, n)
         if array:
             return result
@@ -569,6 +743,9 @@ class ArrayManager(object):
         """
         Relative Strenght Index (RSI).
         """
+        if self.stream and not array:
+            return self.get_indicator(RsiIndicator, n, self.size).value
+
         result = talib.RSI(self.close, n)
         if array:
             return result
@@ -587,6 +764,15 @@ class ArrayManager(object):
         """
         MACD.
         """
+        if self.stream and not array:
+            return self.get_indicator(
+                MacdIndicator,
+                fast_period,
+                slow_period,
+                signal_period,
+                self.size
+            ).value
+
         macd, signal, hist = talib.MACD(
             self.close, fast_period, slow_period, signal_period
         )
@@ -643,6 +829,9 @@ class ArrayManager(object):
         """
         WILLR.
         """
+        if self.stream and not array:
+            return self.get_indicator(WillrIndicator, n).value
+
         result = talib.WILLR(self.high, self.low, self.close, n)
         if array:
             return result
@@ -661,6 +850,9 @@ class ArrayManager(object):
         """
         TRANGE.
         """
+        if self.stream and not array:
+            return self.get_indicator(TrangeIndicator).value
+
         result = talib.TRANGE(self.high, self.low, self.close)
         if array:
             return result
@@ -678,6 +870,9 @@ class ArrayManager(object):
         """
         Bollinger Channel.
         """
+        if self.stream and not array:
+            return self.get_indicator(BollIndicator, n, dev).value
+
         mid = self.sma(n, array)
         std = self.std(n, array)
 
@@ -698,6 +893,9 @@ class ArrayManager(object):
         """
         Keltner Channel.
         """
+        if self.stream and not array:
+            return self.get_indicator(KeltnerIndicator, n, dev, self.size).value
+
         mid = self.sma(n, array)
         atr = self.atr(n, array)
 
@@ -715,6 +913,9 @@ class ArrayManager(object):
         """
         Donchian Channel.
         """
+        if self.stream and not array:
+            return self.get_indicator(DonchianIndicator, n).value
+
         up = talib.MAX(self.high, n)
         down = talib.MIN(self.low, n)
 
@@ -800,6 +1001,9 @@ class ArrayManager(object):
         """
         BOP.
         """
+        if self.stream and not array:
+            return self.get_indicator(BopIndicator).value
+
         result = talib.BOP(self.open, self.high, self.low, self.close)
 
         if array: